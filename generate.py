@@ -1,5 +1,6 @@
 import os
 import json
+import hashlib
 import time
 import requests
 from typing import Any, Dict, List, Optional, Tuple
@@ -8,7 +9,39 @@ from zoneinfo import ZoneInfo
 import re
 
 # Import saju calculation module
-from saju import calculate_fortune_data
+from saju import (
+    FortuneResult,
+    calculate_fortune,
+    chart_fingerprint,
+    team_chart,
+    RELATION_REGISTRY,
+    GOOD_DAY_THRESHOLD,
+    birthplace_longitude,
+    day_pillars,
+    get_natal_chart,
+    good_days,
+    write_good_days_ics,
+    write_good_days_json,
+    calculate_fortune_data_batch,
+    batch_rows,
+    batch_to_results,
+    affinity_ranking,
+    best_collaborators,
+    compatibility_labels,
+    set_relation_rules,
+    decode_shinsal,
+    SHINSAL_STARS,
+    STRENGTH_LABELS,
+    HOUR_CODES,
+    set_hour_convention,
+    DAILY_INDEX_KINDS,
+    daily_index_batch,
+    invert_daily_index,
+    day_pillar_index,
+    days_from_civil,
+    civil_from_days,
+    parse_date,
+)
 
 # Import shared utilities from main.py
 from main import (
@@ -47,6 +80,43 @@ FOCUS_THEMES = [
     "자기성찰",
 ]
 
+# Branch labels used in the prompt, in saju.BATCH_POSITIONS order
+POSITION_LABELS = {"year": "년지", "month": "월지", "day": "일지", "hour": "시지", "today": "오늘"}
+
+# Inverted day-pillar index, kept next to the output JSON (see update_daily_index);
+# the generate workflow carries it between runs in the Actions cache
+DAILY_INDEX_FILE = "daily_index.json"
+DAILY_INDEX_VERSION = 1
+
+# Per-member good days calendars (see export_good_days), under output_dir;
+# the generate workflow uploads them as the "good-days" artifact
+GOOD_DAYS_DIR = "good_days"
+GOOD_DAYS_FORMATS = ("ics", "json")
+
+# Prompt items for the 신살/12운성 lines: saju.SHINSAL_STARS plus "12운성"
+SHINSAL_ITEMS = SHINSAL_STARS + ["12운성"]
+
+# System prompt of the team post (build_team_prompt)
+TEAM_SYSTEM_TEXT = """너는 한국어로 작성되는 팀 단위 일일 운세 칼럼의 전문 작가다.
+아래 출력은 엔터테인먼트와 팀 분위기를 위한 창작물이며, 과학적 사실이나 실제 예언을 주장하지 않는다.
+
+⚠️ 작성 규칙
+- 개인이 아니라 팀 전체의 하루 흐름을 다룬다. 특정 개인을 지목하지 않는다.
+- 주어진 집계 수치만 근거로 삼고, 숫자를 새로 만들거나 바꾸지 않는다.
+- 사주 용어는 2~3개까지만 쓰고, 바로 일상 언어로 풀어 쓴다.
+- 긍정 일변도가 되지 않도록 균형 톤을 유지한다.
+- 공포·질병·재난·죽음·폭력·투자 종목은 언급하지 않는다.
+
+[출력 형식]
+- 첫 줄: 오늘 날짜 (입력 정보의 오늘 날짜를 그대로 사용)
+- 둘째 줄: 오늘 팀의 기운을 상징하는 짧은 문구 1개 (양쪽에 이모지 1개씩)
+- 1문단: 팀 전체의 오행 분위기와 오늘 간지가 더하는 흐름
+- 2문단: 협업에서 살리면 좋은 점과 조심하면 좋은 점 (합·충 집계 참고)
+- 마지막: "오늘 팀을 위한 한 줄" 제목 아래 글머리 기호(•) 1줄
+
+[분량 가이드]
+- 전체 350~500자 이내 (절대 초과 금지)"""
+
 # ============================================================================
 # Utilities
 # ============================================================================
@@ -60,6 +130,23 @@ def load_config() -> Dict[str, Any]:
         "anthropic_key": env("ANTHROPIC_API_KEY", required=True),
         "anthropic_model": env("CLAUDE_MODEL", "claude-sonnet-4-6"),
         "output_dir": env("OUTPUT_DIR", "output"),
+        # saju_data in the output JSON: "full" (expanded dict) or "compact" (pillar codes)
+        "saju_output": env("SAJU_OUTPUT", "full").strip().lower(),
+        # Relation types to leave out (comma-separated saju.RELATION_KEYS)
+        "disabled_rules": [k.strip() for k in env("SAJU_DISABLED_RULES", "").split(",") if k.strip()],
+        # 신살/12운성 items rendered in the prompt (comma-separated SHINSAL_ITEMS)
+        "shinsal_items": [k.strip() for k in env("SAJU_PROMPT_SHINSAL", ",".join(SHINSAL_ITEMS)).split(",") if k.strip()],
+        # Members listed in the daily affinity leaderboard (0 = off)
+        "leaderboard_size": int(env("LEADERBOARD_SIZE", "5")),
+        # One extra Claude call for the team post (saju.team_chart); send.py posts it with SEND_TEAM_FORTUNE=1
+        "team_fortune": env_bool("TEAM_FORTUNE", False),
+        # Good days calendar per member: "ics", "json" or "" (off), over the next GOOD_DAYS_SPAN days
+        "good_days_format": env("GOOD_DAYS_FORMAT", "").strip().lower(),
+        "good_days_span": int(env("GOOD_DAYS_SPAN", "30")),
+        "good_days_threshold": int(env("GOOD_DAYS_THRESHOLD", str(GOOD_DAY_THRESHOLD))),
+        # Exact birth times: hour boundaries (saju.HOUR_CONVENTIONS) and late 자시 handling (saju.ZI_MODES)
+        "hour_convention": env("SAJU_HOUR_CONVENTION", "solar").strip().lower(),
+        "zi_mode": env("SAJU_ZI_MODE", "조자시"),
     }
 
     # Column overrides
@@ -69,6 +156,10 @@ def load_config() -> Dict[str, Any]:
         "birthday_col": env("BIRTHDAY_COL_ID", DEFAULT_COLS["birthday_col"]),
         "private_col": env("PRIVATE_COL_ID", DEFAULT_COLS["private_col"]),
         "assignee_col": env("ASSIGNEE_COL_ID", DEFAULT_COLS["assignee_col"]),
+        "lunar_col": env("LUNAR_COL_ID", DEFAULT_COLS["lunar_col"]),
+        "lunar_leap_col": env("LUNAR_LEAP_COL_ID", DEFAULT_COLS["lunar_leap_col"]),
+        "birth_time_col": env("BIRTH_TIME_COL_ID", DEFAULT_COLS["birth_time_col"]),
+        "birthplace_col": env("BIRTHPLACE_COL_ID", DEFAULT_COLS["birthplace_col"]),
     }
 
     # Option overrides (gender)
@@ -109,16 +200,80 @@ def get_today_ganji() -> str:
     return f"{stem}{branch}"
 
 
+def format_shinsal(
+    saju_data: Dict[str, Any],
+    items: Optional[List[str]] = None,
+) -> Tuple[str, str]:
+    """
+    Render the compact 신살/12운성 codes of calculate_fortune_data.
+
+    Args:
+        saju_data: Pre-calculated saju data with a "shinsal" code per position
+        items: SHINSAL_ITEMS to include (None = all)
+
+    Returns:
+        (stars, stages) text; either is "" when nothing is selected or found
+    """
+    codes = saju_data.get("shinsal") or {}
+    items = SHINSAL_ITEMS if items is None else items
+    branches = {pos: info.get("branch", "") for pos, info in saju_data.get("four_pillars", {}).items()}
+    branches["today"] = saju_data.get("today_pillar", {}).get("branch", "")
+
+    stars, stages = [], []
+    for pos, label in POSITION_LABELS.items():
+        if pos not in codes:
+            continue
+        stage, found = decode_shinsal(codes[pos], items)
+        if stage == "모름":
+            continue
+        if found:
+            stars.append(f"{label} {branches[pos]} {'·'.join(found)}")
+        if "12운성" in items:
+            stages.append(f"{label} {stage}")
+    return ", ".join(stars), ", ".join(stages)
+
+
 def build_improved_prompt(
     name: str,
     birthday: str,
     gender: str,
     time_code: str,
     today: str,
-    saju_data: Dict[str, Any]
+    saju_data: Dict[str, Any],
+    collaborator_hint: Optional[str] = None,
+    shinsal_items: Optional[List[str]] = None,
+    birth_time: Optional[str] = None,
+    fingerprint: Optional[str] = None,
 ) -> str:
+    """Build an improved prompt that includes pre-calculated saju data (see build_prompt_parts)."""
+    return "\n\n".join(build_prompt_parts(
+        name, birthday, gender, time_code, today, saju_data,
+        collaborator_hint=collaborator_hint,
+        shinsal_items=shinsal_items,
+        birth_time=birth_time,
+        fingerprint=fingerprint,
+    ))
+
+
+def build_prompt_parts(
+    name: str,
+    birthday: str,
+    gender: str,
+    time_code: str,
+    today: str,
+    saju_data: Dict[str, Any],
+    collaborator_hint: Optional[str] = None,
+    shinsal_items: Optional[List[str]] = None,
+    birth_time: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+) -> Tuple[str, str]:
     """
-    Build an improved prompt that includes pre-calculated saju data.
+    Build the prompt as (chart part, member part).
+
+    The chart part only depends on the saju data, so members with the same
+    chart fingerprint get the same text and can share a prompt cache entry
+    (see claude_generate_fortune); name, date and collaborator go in the
+    member part.
 
     Args:
         name: Person's name
@@ -127,12 +282,21 @@ def build_improved_prompt(
         time_code: Birth time code ('0'-'12')
         today: Today's date in Korean format (from today_kst())
         saju_data: Pre-calculated saju data from calculate_fortune_data
+        collaborator_hint: Optional "today's best collaborator" text
+        shinsal_items: 신살/12운성 items to render (SHINSAL_ITEMS; None = all)
+        birth_time: Exact birth time (HH:MM), shown with the 시 it maps to
+        fingerprint: chart_fingerprint of the saju data; picks the focus
+            theme, so equal charts get equal chart parts (random if None)
 
     Returns:
-        Korean prompt string for Claude
+        (chart part, member part) Korean prompt strings for Claude
     """
     gender_ko = "남성" if gender == "m" else "여성"
     time_ko = TIME_CODE_TO_LABEL.get(time_code, "모름")
+    if birth_time:
+        # The 시 comes from the saju result (true solar time / 자시 rules)
+        hour_code = saju_data.get("input", {}).get("time_code", 12)
+        time_ko = f"{birth_time} ({HOUR_CODES[hour_code][0]})"
 
     # Extract key saju data for prompt injection
     four_pillars = saju_data.get("four_pillars", {})
@@ -150,9 +314,19 @@ def build_improved_prompt(
         if god_info:
             day_ten_gods_str = god_info
 
+    # Branch ten gods (지지 십성, from each branch's 지장간 정기)
+    branch_gods = [
+        f"{label} {ten_gods[pos]['branch']} {ten_gods[pos]['branch_ten_god']}"
+        f"(지장간 {'·'.join(h['stem'] for h in ten_gods[pos].get('hidden_stems', []))})"
+        for pos, label in POSITION_LABELS.items()
+        if pos in ten_gods and ten_gods[pos].get("branch_ten_god", "모름") != "모름"
+    ]
+    branch_ten_gods_str = ", ".join(branch_gods) if branch_gods else "정보 없음"
+
     # Extract harmonies and clashes
     harmonies_clashes = saju_data.get("harmonies_and_clashes", {})
-    harmony_clash_str = json.dumps(harmonies_clashes, ensure_ascii=False) if harmonies_clashes else "정보 없음"
+    found = {key: items for key, items in harmonies_clashes.items() if items}
+    harmony_clash_str = json.dumps(found, ensure_ascii=False) if found else "정보 없음"
 
     # Get today's pillar info
     today_pillar = saju_data.get("today_pillar", {})
@@ -160,37 +334,84 @@ def build_improved_prompt(
     today_branch = today_pillar.get("branch", "")
     today_ganzi = f"{today_stem}{today_branch}" if today_stem and today_branch else ""
 
-    # Randomly pick a focus theme for variation
-    import random
-    focus_theme = random.choice(FOCUS_THEMES)
+    # Current 대운 (10-year luck cycle)
+    daeun = saju_data.get("daeun") or {}
+    current_daeun = daeun.get("current")
+    daeun_str = "정보 없음"
+    if current_daeun:
+        daeun_str = (
+            f"{current_daeun['stem']}{current_daeun['branch']} 대운 "
+            f"({current_daeun['age']}~{current_daeun['age'] + 9}세, {current_daeun['ten_god']}, "
+            f"{daeun.get('direction', '')}, 대운수 {daeun.get('start_age', '')})"
+        )
 
-    prompt = f"""⚠️ 아래 사주 데이터는 만세력 기반으로 정확히 계산된 값입니다. 이 값을 그대로 사용하세요. 절대 임의로 변경하지 마세요.
+    # 오행 distribution, 신강/신약 and today's affinity score
+    strength = saju_data.get("element_strength") or {}
+    strength_str = "정보 없음"
+    if strength:
+        distribution = " · ".join(f"{el} {pct:g}%" for el, pct in strength["distribution"].items())
+        favorable = "·".join(strength["favorable_elements"]) or "없음"
+        strength_str = f"{distribution} ({strength['strength']}, 도움이 되는 오행: {favorable})"
+    affinity = saju_data.get("today_affinity")
+    affinity_str = f"{affinity:+d} (-100~100)" if affinity is not None else "정보 없음"
+
+    shinsal_str, stage_str = format_shinsal(saju_data, shinsal_items)
+    shinsal_lines = ""
+    if shinsal_str:
+        shinsal_lines += f"\n- 신살: {shinsal_str}"
+    if stage_str:
+        shinsal_lines += f"\n- 12운성: {stage_str}"
+
+    collaborator_line = ""
+    if collaborator_hint:
+        collaborator_line = f"\n- 오늘의 협업 추천: {collaborator_hint} (일주 궁합 기준, 한 문장으로 자연스럽게 언급하세요)"
+
+    # Focus theme for variation: fixed per fingerprint (it changes with the
+    # date), random without one
+    if fingerprint:
+        focus_theme = FOCUS_THEMES[int(fingerprint.rpartition(":")[2], 16) % len(FOCUS_THEMES)]
+    else:
+        import random
+        focus_theme = random.choice(FOCUS_THEMES)
+
+    chart_part = f"""⚠️ 아래 사주 데이터는 만세력 기반으로 정확히 계산된 값입니다. 이 값을 그대로 사용하세요. 절대 임의로 변경하지 마세요.
 
 [사주팔자 데이터]
 - 나이(생년월일): {birthday} ({day_ganzi})
 - 성별: {gender_ko}
 - 출생시간: {time_ko}
 - 현재의 십성: {day_ten_gods_str}
+- 지지 십성: {branch_ten_gods_str}
 - 합충 관계: {harmony_clash_str}
 - 오늘의 간지: {today_ganzi}
+- 현재 대운: {daeun_str}
+- 오행 분포: {strength_str}
+- 오늘의 기운 점수: {affinity_str}{shinsal_lines}
 
 [변동 요소]
 - 오늘의 주요 해석 각도: {focus_theme}
 - 오늘 간지({today_ganzi})의 특성을 고려하여 해석하세요.
 - 위의 합충 데이터와 오늘의 관계를 구체적으로 언급하세요.
+- 현재 대운의 흐름 속에서 오늘이 갖는 의미를 한두 문장으로 짚어주세요."""
 
-[입력 정보]
+    member_part = f"""[입력 정보]
 - 이름: {name}
 - 생년월일(양력): {birthday}
 - 성별: {gender_ko}
 - 출생시간: {time_ko}
-- 오늘 날짜: {today}
+- 오늘 날짜: {today}{collaborator_line}
 
 위 정보를 바탕으로 오늘의 운세를 작성하세요."""
-    return prompt.strip()
+    return chart_part.strip(), member_part.strip()
 
 
-def claude_generate_fortune(api_key: str, model: str, prompt: str) -> str:
+def claude_generate_fortune(
+    api_key: str,
+    model: str,
+    prompt: str,
+    chart_prompt: Optional[str] = None,
+    system_text: Optional[str] = None,
+) -> str:
     """
     Call Claude API to generate fortune text.
 
@@ -198,6 +419,10 @@ def claude_generate_fortune(api_key: str, model: str, prompt: str) -> str:
         api_key: Anthropic API key
         model: Model name (e.g., "claude-sonnet-4-6")
         prompt: The prompt to send
+        chart_prompt: Chart part of the prompt (build_prompt_parts), sent
+            before prompt with a cache breakpoint so members sharing a chart
+            fingerprint reuse the cached system + chart prefix
+        system_text: System prompt (default: the individual fortune column)
 
     Returns:
         Generated fortune text
@@ -209,7 +434,8 @@ def claude_generate_fortune(api_key: str, model: str, prompt: str) -> str:
 
     client = anthropic.Anthropic(api_key=api_key)
 
-    system_text = """너는 한국어로 작성되는 고급 일일 운세 칼럼의 전문 작가다.
+    if system_text is None:
+        system_text = """너는 한국어로 작성되는 고급 일일 운세 칼럼의 전문 작가다.
 아래 출력은 엔터테인먼트와 자기 성찰을 위한 창작물이며, 과학적 사실이나 실제 예언을 주장하지 않는다.
 
 ⚠️ 작성 규칙
@@ -284,7 +510,14 @@ def claude_generate_fortune(api_key: str, model: str, prompt: str) -> str:
         messages=[
             {
                 "role": "user",
-                "content": prompt,
+                "content": prompt if chart_prompt is None else [
+                    {
+                        "type": "text",
+                        "text": chart_prompt,
+                        "cache_control": {"type": "ephemeral"},
+                    },
+                    {"type": "text", "text": prompt},
+                ],
             }
         ],
     )
@@ -302,11 +535,393 @@ def claude_generate_fortune(api_key: str, model: str, prompt: str) -> str:
     return result
 
 
+def build_recs(cfg: Dict[str, Any], items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Records for all items that can be built; the rest are skipped."""
+    recs = []
+    for item in items:
+        try:
+            recs.append(build_rec_from_item(cfg, item))
+        except Exception:
+            continue
+    return recs
+
+
+def record_fingerprint(rec: Dict[str, Any], today_date: str) -> Optional[str]:
+    """saju.chart_fingerprint of a roster record (None if its saju input is invalid)."""
+    return chart_fingerprint(
+        rec["birthday"],
+        "남" if rec["gender"] == "m" else "여",
+        rec["time_code"],
+        today_date,
+        birth_time=rec.get("birth_time"),
+        birthplace=rec.get("birthplace"),
+    )
+
+
+def roster_batch(recs: List[Dict[str, Any]], today_date: str, **kwargs: Any):
+    """calculate_fortune_data_batch over roster records, exact birth times included."""
+    return calculate_fortune_data_batch(
+        birthdays=[r["birthday"] for r in recs],
+        time_codes=[r["time_code"] for r in recs],
+        today_date=today_date,
+        genders=["남" if r["gender"] == "m" else "여" for r in recs],
+        birth_times=[r.get("birth_time") for r in recs],
+        birthplaces=[r.get("birthplace") for r in recs],
+        **kwargs,
+    )
+
+
+def public_mask(recs: List[Dict[str, Any]]) -> List[bool]:
+    """Row mask of the roster records that are not private."""
+    return [not r["is_private"] for r in recs]
+
+
+def precompute_saju_data(
+    recs: List[Dict[str, Any]],
+    columns: Dict[str, Any],
+    today_date: str,
+    item_ids: Optional[set] = None,
+) -> Dict[str, FortuneResult]:
+    """
+    Split the roster batch into per-member saju data.
+
+    Members with the same chart fingerprint share the FortuneResult. Members
+    whose saju input is invalid, and items whose record cannot be built, are
+    left out; generate_fortune_for_item reports their error as before.
+
+    Args:
+        recs: build_recs records of the roster
+        columns: roster_batch result for recs
+        item_ids: Only these members (default: all of recs)
+
+    Returns:
+        Dictionary of item_id -> FortuneResult (to_dict() gives the
+        calculate_fortune_data shape)
+    """
+    keys: Dict[str, str] = {}
+    first_row: Dict[str, int] = {}
+    for row, (rec, ok) in enumerate(zip(recs, columns["valid"].tolist())):
+        if not ok or (item_ids is not None and rec["item_id"] not in item_ids):
+            continue
+        key = record_fingerprint(rec, today_date)
+        keys[rec["item_id"]] = key
+        first_row.setdefault(key, row)
+
+    rows = list(first_row.values())
+    saju_list = batch_to_results(
+        batch_rows(columns, rows),
+        [recs[i]["birthday"] for i in rows],
+        None,
+        today_date,
+        genders=["남" if recs[i]["gender"] == "m" else "여" for i in rows],
+    )
+    by_key = dict(zip(first_row, saju_list))
+    return {item_id: by_key[key] for item_id, key in keys.items()}
+
+
+def precompute_collaborators(
+    recs: List[Dict[str, Any]],
+    columns: Dict[str, Any],
+) -> Dict[str, str]:
+    """
+    Pick today's best collaborator for every member of the roster.
+
+    Uses day-pillar compatibility (saju.best_collaborators). Private members
+    are never suggested to others, but still get a suggestion themselves.
+
+    Args:
+        recs: build_recs records of the roster
+        columns: roster_batch result for recs
+
+    Returns:
+        Dictionary of item_id -> hint text for build_improved_prompt
+    """
+    if len(recs) < 2:
+        return {}
+
+    valid = columns["valid"]
+    recs = [r for r, ok in zip(recs, valid.tolist()) if ok]
+    day_pillars = columns["pillars"][valid, 2]
+    best, _ = best_collaborators(day_pillars, columns["today_pillar"], public_mask(recs))
+
+    hints = {}
+    for rec, own_p, j in zip(recs, day_pillars.tolist(), best.tolist()):
+        if j < 0:
+            continue
+        labels = compatibility_labels(own_p, int(day_pillars[j]))
+        hints[rec["item_id"]] = f"{recs[j]['name']} ({'·'.join(labels) if labels else '무난한 궁합'})"
+    return hints
+
+
+def precompute_leaderboard(
+    cfg: Dict[str, Any],
+    recs: List[Dict[str, Any]],
+    columns: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    """
+    Rank the roster by today's affinity score (saju.today_affinity).
+
+    Private members are left out. Scores come from the roster batch and a
+    sort; only the top entries are turned into dicts.
+
+    Returns:
+        Up to cfg["leaderboard_size"] entries, best first
+    """
+    size = cfg["leaderboard_size"]
+    if size <= 0 or not recs:
+        return []
+
+    order = affinity_ranking(columns["today_affinity"], columns["valid"] & public_mask(recs))[:size]
+    return [
+        {
+            "rank": rank,
+            "item_id": recs[i]["item_id"],
+            "name": recs[i]["name"],
+            "score": int(columns["today_affinity"][i]),
+            "strength": STRENGTH_LABELS[columns["strength"][i]],
+        }
+        for rank, i in enumerate(order.tolist(), 1)
+    ]
+
+
+def precompute_team_chart(
+    recs: List[Dict[str, Any]],
+    columns: Dict[str, Any],
+) -> Optional[Dict[str, Any]]:
+    """
+    Collective chart of the roster for today (saju.team_chart).
+
+    Private members are left out, as in the leaderboard.
+
+    Returns:
+        The team_chart dict, or None when no member has a valid chart
+    """
+    if not recs:
+        return None
+    chart = team_chart(dict(columns, valid=columns["valid"] & public_mask(recs)))
+    return chart if chart["members"] else None
+
+
+def build_team_prompt(chart: Dict[str, Any], today: str) -> str:
+    """
+    Prompt for the team post from a team_chart dict.
+
+    Args:
+        chart: precompute_team_chart result
+        today: Today's date in Korean format
+
+    Returns:
+        Korean prompt string for Claude (system prompt: TEAM_SYSTEM_TEXT)
+    """
+    today_pillar = chart["today_pillar"]
+    elements = chart["element_totals"]
+    natal_str = " · ".join(f"{el} {pct:g}%" for el, pct in elements["natal"].items())
+    with_today_str = " · ".join(f"{el} {pct:g}%" for el, pct in elements["with_today"].items())
+    ten_gods_str = ", ".join(f"{god} {count}명" for god, count in chart["today_ten_gods"].items()) or "정보 없음"
+    labels = {key: label for key, label, _, _ in RELATION_REGISTRY}
+    relations_str = ", ".join(f"{labels.get(key, key)} {count}명" for key, count in chart["relations"].items()) or "없음"
+    strength_str = ", ".join(f"{label} {count}명" for label, count in chart["strength"].items())
+
+    prompt = f"""⚠️ 아래 값은 팀원 {chart["members"]}명의 사주를 만세력으로 계산해 합산한 값입니다. 그대로 사용하세요.
+
+[팀 기운 데이터]
+- 오늘의 간지: {today_pillar["stem"]}{today_pillar["branch"]} ({today_pillar["stem_element"]}/{today_pillar["branch_element"]})
+- 팀 오행 분포: {natal_str}
+- 오늘 간지를 더한 오행 분포: {with_today_str}
+- 오늘 천간이 팀원에게 갖는 십성: {ten_gods_str} (가장 많은 십성: {chart["dominant_ten_god"]})
+- 오늘과 충이 있는 팀원: {chart["clashes"]}명, 합이 있는 팀원: {chart["harmonies"]}명
+- 오늘과의 관계별 인원: {relations_str}
+- 신강/신약 분포: {strength_str}
+- 팀 평균 기운 점수: {chart["average_affinity"]:+g} (-100~100)
+
+[입력 정보]
+- 오늘 날짜: {today}
+
+위 정보를 바탕으로 팀 오늘의 기운을 작성하세요."""
+    return prompt.strip()
+
+
+def generate_team_fortune(cfg: Dict[str, Any], chart: Dict[str, Any], today_kst_str: str) -> Dict[str, Any]:
+    """One Claude call for the team post; same status/error shape as a fortune."""
+    result = {"chart": chart, "fortune_text": "", "status": "error", "error": None}
+    try:
+        result["fortune_text"] = claude_generate_fortune(
+            api_key=cfg["anthropic_key"],
+            model=cfg["anthropic_model"],
+            prompt=build_team_prompt(chart, today_kst_str),
+            system_text=TEAM_SYSTEM_TEXT,
+        )
+        result["status"] = "ok"
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+def export_good_days(
+    cfg: Dict[str, Any],
+    recs: List[Dict[str, Any]],
+    columns: Dict[str, Any],
+    today_date: str,
+    item_ids: Optional[set] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Write each member's good days (saju.good_days) from today on.
+
+    One file per member, cfg["output_dir"]/GOOD_DAYS_DIR/<item_id>.<format>,
+    covering cfg["good_days_span"] days. The day pillars are walked once and
+    every member is scored and written in turn, so memory does not grow with
+    the roster. Members whose saju input is invalid are skipped.
+
+    Args:
+        recs: build_recs records of the roster
+        columns: roster_batch result for recs
+        item_ids: Only these members (default: all of recs)
+
+    Returns:
+        Export summary for the output JSON, or None when the export is off
+    """
+    fmt = cfg["good_days_format"]
+    if not fmt:
+        return None
+    if fmt not in GOOD_DAYS_FORMATS:
+        raise RuntimeError(f"Invalid GOOD_DAYS_FORMAT: {fmt} (expected one of {', '.join(GOOD_DAYS_FORMATS)})")
+
+    last_day = days_from_civil(*parse_date(today_date)) + max(cfg["good_days_span"], 1) - 1
+    end_date = "%04d-%02d-%02d" % civil_from_days(last_day)
+    days = day_pillars(today_date, end_date)
+    threshold = cfg["good_days_threshold"]
+    out_dir = os.path.join(cfg["output_dir"], GOOD_DAYS_DIR)
+    ensure_output_dir(out_dir)
+
+    files = events = 0
+    for rec, ok in zip(recs, columns["valid"].tolist()):
+        if not ok or (item_ids is not None and rec["item_id"] not in item_ids):
+            continue
+        if rec.get("birth_time"):
+            chart = get_natal_chart(rec["birthday"], 12, rec["birth_time"], birthplace_longitude(rec.get("birthplace")))
+        else:
+            chart = get_natal_chart(rec["birthday"], int(rec["time_code"]))
+
+        path = os.path.join(out_dir, f"{rec['item_id']}.{fmt}")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            member_days = good_days(chart, days, threshold)
+            if fmt == "ics":
+                events += write_good_days_ics(f, member_days, f"{rec['name']} 길일", rec["item_id"])
+            else:
+                events += write_good_days_json(
+                    f, member_days, item_id=rec["item_id"], name=rec["name"],
+                    start=today_date, end=end_date, threshold=threshold,
+                )
+        files += 1
+
+    print(f"Good days: {events} days in {files} {fmt} files ({today_date} ~ {end_date})")
+    return {"format": fmt, "start": today_date, "end": end_date, "threshold": threshold, "files": files, "days": events}
+
+
+def member_signature(rec: Dict[str, Any]) -> str:
+    """Digest of the record fields a natal chart depends on."""
+    raw = json.dumps([rec["birthday"], rec["time_code"], rec.get("birth_time"), rec.get("birthplace")],
+                     ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def update_daily_index(
+    cfg: Dict[str, Any],
+    recs: List[Dict[str, Any]],
+    columns: Dict[str, Any],
+) -> List[Dict[str, List[str]]]:
+    """
+    Day pillar -> members it clashes/harmonizes with (saju.daily_index_code).
+
+    The index is stored in cfg["output_dir"]/DAILY_INDEX_FILE with one code
+    per member, keyed by item_id and tagged with member_signature. Only new
+    or edited members are recomputed (from their rows of the roster batch),
+    and the file is rewritten only when the roster or the saju settings
+    changed.
+
+    Returns:
+        60 dicts (one per day pillar) of DAILY_INDEX_KINDS name -> item_ids
+    """
+    path = os.path.join(cfg["output_dir"], DAILY_INDEX_FILE)
+    settings = {
+        "disabled_rules": sorted(cfg["disabled_rules"]),
+        "hour_convention": cfg["hour_convention"],
+        "zi_mode": cfg["zi_mode"],
+    }
+    stored: Dict[str, Any] = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            stored = json.load(f)
+        if stored.get("version") != DAILY_INDEX_VERSION or stored.get("settings") != settings:
+            stored = {}
+    old_members = stored.get("members", {})
+
+    members: Dict[str, Dict[str, str]] = {}
+    stale = []
+    for row, rec in enumerate(recs):
+        sig = member_signature(rec)
+        prev = old_members.get(rec["item_id"])
+        if prev and prev["sig"] == sig:
+            members[rec["item_id"]] = prev
+        else:
+            stale.append((row, sig))
+
+    if not stale and members.keys() == old_members.keys() and "index" in stored:
+        return stored["index"]
+
+    if stale:
+        rows = [row for row, _ in stale]
+        codes = daily_index_batch(columns["pillars"][rows])
+        codes[~columns["valid"][rows]] = 0
+        for (row, sig), code in zip(stale, codes):
+            members[recs[row]["item_id"]] = {"sig": sig, "codes": code.tobytes().hex()}
+
+    index = invert_daily_index({item_id: bytes.fromhex(m["codes"]) for item_id, m in members.items()})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": DAILY_INDEX_VERSION, "settings": settings, "members": members, "index": index},
+                  f, ensure_ascii=False)
+    print(f"Daily index: {len(stale)} of {len(members)} members recomputed")
+    return index
+
+
+def affected_today(
+    recs: List[Dict[str, Any]],
+    index: List[Dict[str, List[str]]],
+    today_date: str,
+) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Members today's pillar clashes or harmonizes with ("오늘 충이 있는 분들").
+
+    Private members are left out.
+
+    Returns:
+        Dictionary of DAILY_INDEX_KINDS name -> [{"item_id", "name"}]
+    """
+    names = {r["item_id"]: r["name"] for r, public in zip(recs, public_mask(recs)) if public}
+    today = index[day_pillar_index(*parse_date(today_date))]
+    return {
+        name: [{"item_id": i, "name": names[i]} for i in today.get(name, []) if i in names]
+        for name, _, _ in DAILY_INDEX_KINDS
+    }
+
+
+def saju_json_encoder(mode: str):
+    """json.dump default= hook that renders FortuneResult in the configured mode."""
+    def encode(obj: Any) -> Any:
+        if isinstance(obj, FortuneResult):
+            return obj.to_compact() if mode == "compact" else obj.to_dict()
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    return encode
+
+
 def generate_fortune_for_item(
     cfg: Dict[str, Any],
     item: Dict[str, Any],
     today_date: str,
     today_kst_str: str,
+    saju_data: Optional[FortuneResult] = None,
+    collaborator_hint: Optional[str] = None,
+    saju_dicts: Optional[Dict[str, Dict[str, Any]]] = None,
 ) -> Dict[str, Any]:
     """
     Generate a fortune for a single item.
@@ -316,6 +931,12 @@ def generate_fortune_for_item(
         item: Item from Slack Lists
         today_date: Today's date in YYYY-MM-DD format
         today_kst_str: Today's date in Korean format
+        saju_data: Pre-calculated saju data (from precompute_saju_data);
+            calculated here if not given
+        collaborator_hint: Today's best collaborator (from precompute_collaborators)
+        saju_dicts: Per-run cache of fingerprint -> saju_data.to_dict(), so
+            members sharing a chart expand it once for the prompt and the
+            output JSON
 
     Returns:
         Dictionary with fortune generation result
@@ -329,6 +950,7 @@ def generate_fortune_for_item(
         "is_private": False,
         "dm_targets": [],
         "saju_data": {},
+        "saju_fingerprint": None,
         "fortune_text": "",
         "status": "error",
         "error": None,
@@ -341,27 +963,44 @@ def generate_fortune_for_item(
         result["is_private"] = rec.get("is_private", False)
         result["dm_targets"] = rec.get("dm_targets", [])
 
-        # Calculate saju data
-        saju_data = calculate_fortune_data(
-            birthday=rec["birthday"],
-            gender="남" if rec["gender"] == "m" else "여",
-            time_code=rec["time_code"],
-            today_date=today_date,
-        )
-
-        if "error" in saju_data:
-            raise RuntimeError(f"Saju calculation error: {saju_data['error']}")
-
-        result["saju_data"] = saju_data
-
-        # Build improved prompt with saju data
-        prompt = build_improved_prompt(
+        # Calculate saju data (unless precomputed for the whole roster)
+        if saju_data is None:
+            saju_data = calculate_fortune(
+                birthday=rec["birthday"],
+                gender="남" if rec["gender"] == "m" else "여",
+                time_code=rec["time_code"],
+                today_date=today_date,
+                birth_time=rec.get("birth_time"),
+                birthplace=rec.get("birthplace"),
+            )
+
+        if saju_data.error is not None:
+            raise RuntimeError(f"Saju calculation error: {saju_data.error}")
+
+        fingerprint = record_fingerprint(rec, today_date)
+        saju_dict = saju_dicts.get(fingerprint) if saju_dicts is not None else None
+        if saju_dict is None:
+            saju_dict = saju_data.to_dict()
+            if saju_dicts is not None:
+                saju_dicts[fingerprint] = saju_dict
+
+        # The compact output mode is encoded from the FortuneResult (saju_json_encoder)
+        result["saju_data"] = saju_data if cfg["saju_output"] == "compact" else saju_dict
+        result["saju_fingerprint"] = fingerprint
+
+        # Build the prompt with saju data; the chart part is shared by
+        # everyone with the same fingerprint
+        chart_prompt, prompt = build_prompt_parts(
             name=rec["name"],
             birthday=rec["birthday"],
             gender=rec["gender"],
             time_code=rec["time_code"],
             today=today_kst_str,
-            saju_data=saju_data,
+            saju_data=saju_dict,
+            birth_time=rec.get("birth_time"),
+            collaborator_hint=collaborator_hint,
+            shinsal_items=cfg["shinsal_items"],
+            fingerprint=result["saju_fingerprint"],
         )
 
         # Call Claude API
@@ -369,6 +1008,7 @@ def generate_fortune_for_item(
             api_key=cfg["anthropic_key"],
             model=cfg["anthropic_model"],
             prompt=prompt,
+            chart_prompt=chart_prompt,
         )
 
         result["fortune_text"] = fortune_text
@@ -384,6 +1024,8 @@ def generate_fortune_for_item(
 def run() -> None:
     """Main execution function."""
     cfg = load_config()
+    set_relation_rules(disabled=cfg["disabled_rules"])
+    set_hour_convention(cfg["hour_convention"], cfg["zi_mode"])
 
     # Ensure output directory exists
     ensure_output_dir(cfg["output_dir"])
@@ -425,6 +1067,7 @@ def run() -> None:
         return
 
     # Test mode handling
+    all_items = items
     if test_mode == "single":
         print(f"TEST_MODE=single: Generating for admin user only")
         if not cfg["admin_user_ids"]:
@@ -437,15 +1080,34 @@ def run() -> None:
     elif test_mode == "all":
         print(f"TEST_MODE=all: Generating for all users (send will go to admin only)")
 
+    # Calculate saju data for the full roster in one batch, before any test
+    # filter; every roster feature below reads these columns
+    recs = build_recs(cfg, all_items)
+    columns = roster_batch(recs, today_date)
+    item_ids = {item.get("id") for item in items}
+
+    collaborators = precompute_collaborators(recs, columns)
+    leaderboard = precompute_leaderboard(cfg, recs, columns)
+    daily_index = update_daily_index(cfg, recs, columns)
+    team = precompute_team_chart(recs, columns) if cfg["team_fortune"] else None
+    good_days_export = export_good_days(cfg, recs, columns, today_date, item_ids)
+    saju_by_item = precompute_saju_data(recs, columns, today_date, item_ids)
+
     # Generate fortunes
     fortunes = []
+    saju_dicts: Dict[str, Dict[str, Any]] = {}
     print(f"\nGenerating fortunes for {len(items)} items...")
 
     for i, item in enumerate(items, 1):
         name = extract_name(item)
         print(f"[{i}/{len(items)}] Processing {name}...", end=" ")
 
-        result = generate_fortune_for_item(cfg, item, today_date, today_kst_full)
+        result = generate_fortune_for_item(
+            cfg, item, today_date, today_kst_full,
+            saju_data=saju_by_item.get(item.get("id")),
+            collaborator_hint=collaborators.get(item.get("id")),
+            saju_dicts=saju_dicts,
+        )
         fortunes.append(result)
 
         if result["status"] == "ok":
@@ -453,11 +1115,21 @@ def run() -> None:
         else:
             print(f"ERROR: {result['error']}")
 
+    team_fortune = None
+    if team is not None:
+        print(f"Generating team fortune ({team['members']} members)...", end=" ")
+        team_fortune = generate_team_fortune(cfg, team, today_kst_full)
+        print("OK" if team_fortune["status"] == "ok" else f"ERROR: {team_fortune['error']}")
+
     # Prepare output
     output = {
         "date": today_date,
         "generated_at": datetime.now(ZoneInfo("Asia/Seoul")).isoformat(),
         "fortunes": fortunes,
+        "leaderboard": leaderboard,
+        "affected_today": affected_today(recs, daily_index, today_date),
+        "team_fortune": team_fortune,
+        "good_days": good_days_export,
     }
 
     # Save to JSON
@@ -465,7 +1137,7 @@ def run() -> None:
     filepath = os.path.join(cfg["output_dir"], filename)
 
     with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+        json.dump(output, f, ensure_ascii=False, indent=2, default=saju_json_encoder(cfg["saju_output"]))
 
     print(f"\nResults saved to {filepath}")
 
@@ -7,6 +7,15 @@ import hashlib
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
+from saju import (
+    HOUR_CODE_CONVENTION,
+    HOUR_CODES,
+    birthplace_longitude,
+    hour_code_label,
+    lunar_to_solar_date,
+    parse_birth_time,
+)
+
 # -----------------------------
 # Slack Lists/Fields defaults (your known IDs)
 # -----------------------------
@@ -16,6 +25,12 @@ DEFAULT_COLS = {
     "birthday_col": "Col0A8JMV8N5A",
     "private_col": "Col0A8BMFER7F",
     "assignee_col": "Col0A8G4DUAMQ",
+    # 음력 생일 checkbox columns (empty = every birthday is solar)
+    "lunar_col": "",
+    "lunar_leap_col": "",
+    # 출생시각(HH:MM)/출생지 text columns (empty = time option only)
+    "birth_time_col": "",
+    "birthplace_col": "",
 }
 
 # Gender option ids (your known mapping)
@@ -41,21 +56,8 @@ DEFAULT_TIME_OPT_TO_CODE = {
     "OptUZH3DWEL": "12",
 }
 
-TIME_CODE_TO_LABEL = {
-    "0": "子(자) 23:30 ~ 01:29",
-    "1": "丑(축) 01:30 ~ 03:29",
-    "2": "寅(인) 03:30 ~ 05:29",
-    "3": "卯(묘) 05:30 ~ 07:29",
-    "4": "辰(진) 07:30 ~ 09:29",
-    "5": "巳(사) 09:30 ~ 11:29",
-    "6": "午(오) 11:30 ~ 13:29",
-    "7": "未(미) 13:30 ~ 15:29",
-    "8": "申(신) 15:30 ~ 17:29",
-    "9": "酉(유) 17:30 ~ 19:29",
-    "10": "戌(술) 19:30 ~ 21:29",
-    "11": "亥(해) 21:30 ~ 23:29",
-    "12": "모름",
-}
+# The time options are clock-time double-hours (saju.HOUR_CODE_CONVENTION)
+TIME_CODE_TO_LABEL = {str(code): hour_code_label(code, HOUR_CODE_CONVENTION) for code in HOUR_CODES}
 
 
 # -----------------------------
@@ -171,6 +173,17 @@ def extract_checkbox(item: Dict[str, Any], col_id: str) -> Optional[bool]:
     return None
 
 
+def extract_text(item: Dict[str, Any], col_id: str) -> Optional[str]:
+    f = field_by_column(item.get("fields", []), col_id)
+    if not f:
+        return None
+    for key in ("text", "value"):
+        v = f.get(key)
+        if isinstance(v, str) and v.strip():
+            return v.strip()
+    return None
+
+
 def extract_user_ids(item: Dict[str, Any], col_id: str) -> List[str]:
     f = field_by_column(item.get("fields", []), col_id)
     if not f:
@@ -183,6 +196,19 @@ def extract_user_ids(item: Dict[str, Any], col_id: str) -> List[str]:
         return [v]
     return []
 
+def extract_lunar_flags(item: Dict[str, Any], cols: Dict[str, str]) -> Tuple[bool, bool]:
+    """(is_lunar, is_leap_month) from the optional 음력/윤달 checkbox columns."""
+    is_lunar = bool(cols.get("lunar_col")) and bool(extract_checkbox(item, cols["lunar_col"]))
+    is_leap = is_lunar and bool(cols.get("lunar_leap_col")) and bool(extract_checkbox(item, cols["lunar_leap_col"]))
+    return is_lunar, is_leap
+
+
+def extract_exact_birth(item: Dict[str, Any], cols: Dict[str, str]) -> Tuple[Optional[str], Optional[str]]:
+    """(birth_time, birthplace) from the optional 출생시각/출생지 columns; None where unset."""
+    birth_time = extract_text(item, cols["birth_time_col"]) if cols.get("birth_time_col") else None
+    birthplace = extract_text(item, cols["birthplace_col"]) if cols.get("birthplace_col") else None
+    return birth_time, birthplace
+
 import re
 
 DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
@@ -204,6 +230,13 @@ def validate_item(cfg: Dict[str, Any], item: Dict[str, Any]) -> Tuple[bool, List
     b = extract_birthday(item, cols["birthday_col"])
     if not b or not DATE_RE.match(b):
         errs.append(f"birthday: missing/invalid in col={cols['birthday_col']} (value={b})")
+    else:
+        is_lunar, is_leap = extract_lunar_flags(item, cols)
+        if is_lunar:
+            try:
+                lunar_to_solar_date(b, is_leap)
+            except ValueError as e:
+                errs.append(f"birthday: invalid lunar date in col={cols['birthday_col']} (value={b}, {e})")
 
     # gender
     gopt = extract_select_option(item, cols["gender_col"])
@@ -223,6 +256,19 @@ def validate_item(cfg: Dict[str, Any], item: Dict[str, Any]) -> Tuple[bool, List
         if tcode is None:
             errs.append(f"time: unknown option_id={topt} (col={cols['time_col']})")
 
+    # exact birth time/place (optional)
+    birth_time, birthplace = extract_exact_birth(item, cols)
+    if birth_time:
+        try:
+            parse_birth_time(birth_time)
+        except ValueError:
+            errs.append(f"birth_time: invalid HH:MM in col={cols['birth_time_col']} (value={birth_time})")
+    if birthplace:
+        try:
+            birthplace_longitude(birthplace)
+        except ValueError as e:
+            errs.append(f"birthplace: {e} (col={cols['birthplace_col']})")
+
     # private checkbox
     priv = extract_checkbox(item, cols["private_col"])
     if priv is None:
@@ -332,6 +378,8 @@ def notify_admins_of_error(token: str, admin_ids: List[str], item_id: str, name:
 def build_prompt(r: Dict[str, Any]) -> str:
     gender_ko = "남성" if r["gender"] == "m" else "여성"
     time_ko = TIME_CODE_TO_LABEL.get(r["time_code"], "모름")
+    if r.get("birth_time"):
+        time_ko = f"{r['birth_time']}" + (f" ({r['birthplace']})" if r.get("birthplace") else "")
     today = r["today"]
 
     return f"""
@@ -504,6 +552,10 @@ def load_config() -> Dict[str, Any]:
         "birthday_col": env("BIRTHDAY_COL_ID", DEFAULT_COLS["birthday_col"]),
         "private_col": env("PRIVATE_COL_ID", DEFAULT_COLS["private_col"]),
         "assignee_col": env("ASSIGNEE_COL_ID", DEFAULT_COLS["assignee_col"]),
+        "lunar_col": env("LUNAR_COL_ID", DEFAULT_COLS["lunar_col"]),
+        "lunar_leap_col": env("LUNAR_LEAP_COL_ID", DEFAULT_COLS["lunar_leap_col"]),
+        "birth_time_col": env("BIRTH_TIME_COL_ID", DEFAULT_COLS["birth_time_col"]),
+        "birthplace_col": env("BIRTHPLACE_COL_ID", DEFAULT_COLS["birthplace_col"]),
     }
 
     # Option overrides (gender)
@@ -540,6 +592,15 @@ def build_rec_from_item(cfg: Dict[str, Any], item: Dict[str, Any]) -> Dict[str,
     if not birthday:
         raise RuntimeError("birthday missing")
 
+    # 음력 생일은 양력으로 바꿔서 계산 (원래 값은 birthday_input에 보존)
+    birthday_input = birthday
+    is_lunar, is_leap = extract_lunar_flags(item, cols)
+    if is_lunar:
+        try:
+            birthday = lunar_to_solar_date(birthday, is_leap)
+        except ValueError as e:
+            raise RuntimeError(f"invalid lunar birthday {birthday}: {e}")
+
     gender_opt = extract_select_option(item, cols["gender_col"])
     if not gender_opt:
         raise RuntimeError("gender select missing")
@@ -554,6 +615,18 @@ def build_rec_from_item(cfg: Dict[str, Any], item: Dict[str, Any]) -> Dict[str,
     if time_code is None:
         raise RuntimeError(f"unknown time option: {time_opt}")
 
+    birth_time, birthplace = extract_exact_birth(item, cols)
+    if birth_time:
+        try:
+            parse_birth_time(birth_time)
+        except ValueError as e:
+            raise RuntimeError(f"invalid birth time: {e}")
+    if birthplace:
+        try:
+            birthplace_longitude(birthplace)
+        except ValueError as e:
+            raise RuntimeError(f"invalid birthplace: {e}")
+
     is_private = extract_checkbox(item, cols["private_col"])
     if is_private is None:
         # treat missing as False
@@ -567,8 +640,12 @@ def build_rec_from_item(cfg: Dict[str, Any], item: Dict[str, Any]) -> Dict[str,
         "item_id": item.get("id"),
         "name": name,
         "birthday": birthday,
+        "birthday_input": birthday_input,
+        "calendar": ("lunar_leap" if is_leap else "lunar") if is_lunar else "solar",
         "gender": gender,
         "time_code": time_code,
+        "birth_time": birth_time,
+        "birthplace": birthplace,
         "is_private": bool(is_private),
         "dm_targets": dm_targets,
     }
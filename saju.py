@@ -6,9 +6,20 @@ Author: Claude Code
 Date: 2026-04-05
 """
 
-from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional
+from array import array
+from bisect import bisect_right
+from datetime import date
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
+import hashlib
 import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
 
 
 # ============================================================================
@@ -23,7 +34,8 @@ HEAVENLY_STEMS_CH = ['甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '
 EARTHLY_BRANCHES = ['자', '축', '인', '묘', '진', '사', '오', '미', '신', '유', '술', '해']
 EARTHLY_BRANCHES_CH = ['子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥']
 
-# Hours mapping (시간대)
+# Hours mapping (시간대). Times are the 'solar' convention; 'clock' starts
+# every double-hour 30 minutes later (see HOUR_CONVENTIONS, hour_code_label)
 HOUR_CODES = {
     0: ('자시', '자'),      # 23:00-01:00
     1: ('축시', '축'),      # 01:00-03:00
@@ -86,6 +98,7 @@ OVERCOMING_CYCLE = {
 }
 
 # Solar Terms Boundaries (approximate dates)
+# Only used outside the exact 절입 table range (see SOLAR TERMS TABLE below)
 SOLAR_TERMS = [
     (2, 4, '인'),      # 입춘 - Start of Spring
     (3, 6, '묘'),      # 경칩 - Awakening of Insects
@@ -143,6 +156,1244 @@ THREE_HARMONIES = {
     ('사', '유', '축'): '합', ('유', '사', '축'): '합', ('축', '사', '유'): '합',
 }
 
+# Half harmonies (반합): two branches of a 삼합 group, one of them its 왕지
+HALF_HARMONIES = [
+    ('신', '자'), ('자', '진'), ('해', '묘'), ('묘', '미'),
+    ('인', '오'), ('오', '술'), ('사', '유'), ('유', '축'),
+]
+
+# Directional harmonies (방합)
+DIRECTIONAL_HARMONIES = [('인', '묘', '진'), ('사', '오', '미'), ('신', '유', '술'), ('해', '자', '축')]
+
+# Hidden harmonies (암합)
+HIDDEN_HARMONIES = [('자', '술'), ('축', '인'), ('묘', '신'), ('오', '해'), ('인', '미')]
+
+# Punishments (형): 삼형 groups and 자형 branches
+THREE_PUNISHMENTS = [('인', '사', '신'), ('축', '술', '미')]
+SELF_PUNISHMENTS = ['진', '오', '유', '해']
+
+# Destructions (육파), harms (육해) and resentments (원진)
+SIX_DESTRUCTIONS = [('자', '유'), ('축', '진'), ('인', '해'), ('묘', '오'), ('사', '신'), ('미', '술')]
+SIX_HARMS = [('자', '미'), ('축', '오'), ('인', '사'), ('묘', '진'), ('신', '해'), ('유', '술')]
+RESENTMENTS = [('자', '미'), ('축', '오'), ('인', '유'), ('묘', '신'), ('진', '해'), ('사', '술')]
+
+# Hidden stems (지장간) per branch as (stem, days), 여기 -> 중기 -> 정기.
+# Days follow the common 월률분야 split of a 30-day month; the last entry
+# (정기) is the branch's main stem.
+HIDDEN_STEMS = {
+    '자': [('임', 10), ('계', 20)],
+    '축': [('계', 9), ('신', 3), ('기', 18)],
+    '인': [('무', 7), ('병', 7), ('갑', 16)],
+    '묘': [('갑', 10), ('을', 20)],
+    '진': [('을', 9), ('계', 3), ('무', 18)],
+    '사': [('무', 7), ('경', 7), ('병', 16)],
+    '오': [('병', 10), ('기', 9), ('정', 11)],
+    '미': [('정', 9), ('을', 3), ('기', 18)],
+    '신': [('무', 7), ('임', 7), ('경', 16)],
+    '유': [('경', 10), ('신', 20)],
+    '술': [('신', 9), ('정', 3), ('무', 18)],
+    '해': [('무', 7), ('갑', 7), ('임', 16)],
+}
+HIDDEN_STEM_DAYS = 30
+
+# 12운성 (twelve life stages) and each stem's 장생 branch; yang stems move
+# forward through the branches from there, yin stems backward
+TWELVE_STAGES = ['장생', '목욕', '관대', '건록', '제왕', '쇠', '병', '사', '묘', '절', '태', '양']
+LIFE_STAGE_START = {
+    '갑': '해', '을': '오', '병': '인', '정': '유', '무': '인',
+    '기': '유', '경': '사', '신': '자', '임': '신', '계': '묘',
+}
+
+# 역마/도화/화개 by the 삼합 group of the base (day or year) branch
+SAMHAP_STARS = [
+    (('신', '자', '진'), {'역마': '인', '도화': '유', '화개': '진'}),
+    (('인', '오', '술'), {'역마': '신', '도화': '묘', '화개': '술'}),
+    (('사', '유', '축'), {'역마': '해', '도화': '오', '화개': '축'}),
+    (('해', '묘', '미'), {'역마': '사', '도화': '자', '화개': '미'}),
+]
+
+
+# ============================================================================
+# INTEGER ENGINE
+# ============================================================================
+# Internally a stem is 0-9, a branch is 0-11 and a pillar is its position in
+# the 60-cycle (0 = 갑자, 59 = 계해). All tables below are derived once from the
+# string mappings above, so those remain the single source of truth; strings
+# are only produced again at the public API boundary.
+
+ELEMENTS = ['목', '화', '토', '금', '수']
+YINYANG = ['양', '음']
+TEN_GODS = ['비견', '겁재', '식신', '상관', '편재', '정재', '편관', '정관', '편인', '정인']
+
+POSITIONS = ['year', 'month', 'day', 'hour']
+UNKNOWN = -1  # Pillar index used for an unknown birth hour (모름)
+
+STEM_INDEX = {stem: i for i, stem in enumerate(HEAVENLY_STEMS)}
+BRANCH_INDEX = {branch: i for i, branch in enumerate(EARTHLY_BRANCHES)}
+ELEMENT_INDEX = {element: i for i, element in enumerate(ELEMENTS)}
+
+STEM_ELEMENT_IDX = [ELEMENT_INDEX[STEM_ELEMENT[s]] for s in HEAVENLY_STEMS]
+BRANCH_ELEMENT_IDX = [ELEMENT_INDEX[BRANCH_ELEMENT[b]] for b in EARTHLY_BRANCHES]
+STEM_YIN = [YINYANG.index(STEM_YINYANG[s]) for s in HEAVENLY_STEMS]
+BRANCH_YIN = [YINYANG.index(BRANCH_YINYANG[b]) for b in EARTHLY_BRANCHES]
+
+PRODUCES_IDX = [ELEMENT_INDEX[PRODUCTION_CYCLE[e]] for e in ELEMENTS]
+OVERCOMES_IDX = [ELEMENT_INDEX[OVERCOMING_CYCLE[e]] for e in ELEMENTS]
+
+# Month branch boundaries: _TERM_DAY[month] is the day the month's 절기 starts
+_TERM_DAY = [0] * 13
+for _month, _day, _branch in SOLAR_TERMS:
+    _TERM_DAY[_month] = _day
+
+
+def _build_ten_god_table() -> List[List[int]]:
+    """TEN_GOD_TABLE[day_stem][target_stem] -> index into TEN_GODS."""
+    table = []
+    for day in range(10):
+        day_el = STEM_ELEMENT_IDX[day]
+        row = []
+        for target in range(10):
+            target_el = STEM_ELEMENT_IDX[target]
+            if day_el == target_el:
+                base = 0   # 비견/겁재
+            elif PRODUCES_IDX[day_el] == target_el:
+                base = 2   # 식신/상관
+            elif OVERCOMES_IDX[day_el] == target_el:
+                base = 4   # 편재/정재
+            elif OVERCOMES_IDX[target_el] == day_el:
+                base = 6   # 편관/정관
+            else:
+                base = 8   # 편인/정인
+            row.append(base + (STEM_YIN[day] != STEM_YIN[target]))
+        table.append(row)
+    return table
+
+
+def _build_pair_table(size: int, index: Dict[str, int], pairs: Dict) -> List[List[bool]]:
+    """Turn a {(a, b): ...} relation dict into a dense size x size bool table."""
+    table = [[False] * size for _ in range(size)]
+    for a, b in pairs:
+        table[index[a]][index[b]] = True
+    return table
+
+
+def _build_triad_groups() -> List[int]:
+    """BRANCH_TRIAD[branch] -> id of the 삼합 group the branch belongs to."""
+    groups: List[frozenset] = []
+    for key in THREE_HARMONIES:
+        group = frozenset(BRANCH_INDEX[b] for b in key)
+        if group not in groups:
+            groups.append(group)
+    triad = [-1] * 12
+    for group_id, group in enumerate(groups):
+        for b in group:
+            triad[b] = group_id
+    return triad
+
+
+TEN_GOD_TABLE = _build_ten_god_table()
+# HIDDEN_STEM_TABLE[branch] -> ((stem, days), ...) in HIDDEN_STEMS order
+HIDDEN_STEM_TABLE = [tuple((STEM_INDEX[s], days) for s, days in HIDDEN_STEMS[b]) for b in EARTHLY_BRANCHES]
+# BRANCH_TEN_GOD_TABLE[day_stem][branch] -> TEN_GODS index of the branch's 정기
+BRANCH_TEN_GOD_TABLE = [[row[HIDDEN_STEM_TABLE[b][-1][0]] for b in range(12)] for row in TEN_GOD_TABLE]
+STEM_HARMONY_TABLE = _build_pair_table(10, STEM_INDEX, HEAVENLY_STEM_HARMONY)
+STEM_CLASH_TABLE = _build_pair_table(10, STEM_INDEX, HEAVENLY_STEM_CLASH)
+BRANCH_SIX_HARMONY_TABLE = _build_pair_table(12, BRANCH_INDEX, EARTHLY_BRANCH_SIX_HARMONY)
+BRANCH_CLASH_TABLE = _build_pair_table(12, BRANCH_INDEX, EARTHLY_BRANCH_CLASH)
+BRANCH_TRIAD = _build_triad_groups()
+
+# Packed relation code between two pillars: REL_* flags in the low 4 bits,
+# the TEN_GODS index of the second stem seen from the first in the high 4 bits
+REL_STEM_HARMONY = 1    # 천간합
+REL_STEM_CLASH = 2      # 천간충
+REL_BRANCH_HARMONY = 4  # 지지육합
+REL_BRANCH_CLASH = 8    # 지지충
+REL_FLAGS = 0x0F
+REL_TEN_GOD_SHIFT = 4
+
+
+def _build_pillar_relations() -> bytes:
+    """PILLAR_RELATIONS[p1 * 60 + p2] -> packed relation code."""
+    codes = bytearray(60 * 60)
+    for p1 in range(60):
+        s1, b1 = p1 % 10, p1 % 12
+        for p2 in range(60):
+            s2, b2 = p2 % 10, p2 % 12
+            code = TEN_GOD_TABLE[s1][s2] << REL_TEN_GOD_SHIFT
+            if STEM_HARMONY_TABLE[s1][s2]:
+                code |= REL_STEM_HARMONY
+            elif STEM_CLASH_TABLE[s1][s2]:
+                code |= REL_STEM_CLASH
+            if BRANCH_SIX_HARMONY_TABLE[b1][b2]:
+                code |= REL_BRANCH_HARMONY
+            elif BRANCH_CLASH_TABLE[b1][b2]:
+                code |= REL_BRANCH_CLASH
+            codes[p1 * 60 + p2] = code
+    return bytes(codes)
+
+
+PILLAR_RELATIONS = _build_pillar_relations()
+
+
+def pillar_relation(p1: int, p2: int) -> int:
+    """Packed relation code between two pillar indices (see REL_* flags)."""
+    return PILLAR_RELATIONS[p1 * 60 + p2]
+
+
+def relation_ten_god(code: int) -> int:
+    """TEN_GODS index stored in a packed relation code."""
+    return code >> REL_TEN_GOD_SHIFT
+
+
+def pillar_relation_matrix():
+    """The 60x60 relation table as a read-only uint8 NumPy array."""
+    np = _numpy()
+    return np.frombuffer(PILLAR_RELATIONS, dtype=np.uint8).reshape(60, 60)
+
+
+# Dates are plain (year, month, day) ints from parse_date; day numbers come
+# from days_from_civil, so the hot path builds no date/datetime objects.
+_DIGITS = {str(i): i for i in range(10)}
+_MONTH_DAYS = [0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+
+def _is_leap_year(year: int) -> bool:
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def parse_date(date_str: str) -> Tuple[int, int, int]:
+    """
+    Strict YYYY-MM-DD parser (zero-padded, must be a real calendar date).
+
+    Returns:
+        Tuple of (year, month, day)
+
+    Raises:
+        ValueError: If date_str is not a valid YYYY-MM-DD date
+    """
+    try:
+        if len(date_str) != 10 or date_str[4] != '-' or date_str[7] != '-':
+            raise ValueError
+        digits = _DIGITS
+        year = digits[date_str[0]] * 1000 + digits[date_str[1]] * 100 + digits[date_str[2]] * 10 + digits[date_str[3]]
+        month = digits[date_str[5]] * 10 + digits[date_str[6]]
+        day = digits[date_str[8]] * 10 + digits[date_str[9]]
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Invalid date (expected YYYY-MM-DD): {date_str!r}")
+    if year < 1 or not (1 <= month <= 12 and 1 <= day <= _MONTH_DAYS[month]
+                        or month == 2 and day == 29 and _is_leap_year(year)):
+        raise ValueError(f"Invalid date (expected YYYY-MM-DD): {date_str!r}")
+    return year, month, day
+
+
+def days_from_civil(year: int, month: int, day: int) -> int:
+    """Days since 1970-01-01 (the datetime64[D] epoch), proleptic Gregorian."""
+    if month <= 2:
+        year -= 1
+        month += 12
+    return 365 * year + year // 4 - year // 100 + year // 400 + (153 * month - 457) // 5 + day - 719469
+
+
+def civil_from_days(days: int) -> Tuple[int, int, int]:
+    """(year, month, day) of a days_from_civil day number."""
+    days += 719468
+    era = days // 146097
+    doe = days - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    month = mp + 3 if mp < 10 else mp - 9
+    return yoe + era * 400 + (month <= 2), month, doy - (153 * mp + 2) // 5 + 1
+
+
+_CIVIL_1900 = days_from_civil(1900, 1, 1)  # 1900-01-01 is 甲戌 (index 10)
+
+
+def pillar_index(stem_idx: int, branch_idx: int) -> int:
+    """Position of (stem, branch) in the 60-cycle. Stem and branch must share parity."""
+    return (6 * stem_idx - 5 * branch_idx) % 60
+
+
+def day_pillar_index(year: int, month: int, day: int) -> int:
+    """60-cycle index of the day pillar."""
+    return (days_from_civil(year, month, day) - _CIVIL_1900 + 10) % 60
+
+
+def year_pillar_index(year: int, month: int, day: int) -> int:
+    """Approximate 60-cycle year pillar index (year changes at 입춘, ~Feb 4)."""
+    if month < 2 or (month == 2 and day < _TERM_DAY[2]):
+        year -= 1
+    # 1984 (after 입춘) is 甲子
+    return (year - 1984) % 60
+
+
+def month_branch_index(month: int, day: int) -> int:
+    """Approximate month branch (0-11) from the SOLAR_TERMS day boundaries."""
+    return (month - (day < _TERM_DAY[month])) % 12
+
+
+def month_stem_index(year_stem_idx, branch_idx):
+    """
+    Month stem (0-9) from the year stem (오호둔); works on ints and arrays.
+    The 인 month of a 갑/기 year is 병인, and 자/축 are the 11th/12th months
+    of the saju year, so a 계묘 year ends with 갑자 and 을축 (not 임자/계축,
+    as the stem cycle restarted at 자 would give).
+    """
+    return (year_stem_idx * 2 + 2 + (branch_idx - 2) % 12) % 10
+
+
+def month_pillar_index(month: int, day: int, year_stem_idx: int) -> int:
+    """Approximate 60-cycle month pillar index; the stem follows the year stem."""
+    branch_idx = month_branch_index(month, day)
+    return pillar_index(month_stem_index(year_stem_idx, branch_idx), branch_idx)
+
+
+def hour_pillar_index(day_stem_idx: int, hour_code: int) -> int:
+    """60-cycle index of the hour pillar, or UNKNOWN for hour code 12."""
+    if hour_code == 12:
+        return UNKNOWN
+    return pillar_index((day_stem_idx * 2 + hour_code) % 10, hour_code)
+
+
+def year_month_pillar_indices(
+    year: int, month: int, day: int, hour_code: int = 12, minute: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    (year, month) pillar indices from the exact 절입 table.
+    Dates outside the table range fall back to the approximate boundaries.
+    minute overrides the birth moment (see solar_term_at).
+    """
+    term = solar_term_at(year, month, day, hour_code, minute)
+    if term is not None:
+        table = _solar_term_table()
+        return table.year_pillar(term[0]), table.month_pillar(term[0])
+    year_p = year_pillar_index(year, month, day)
+    return year_p, month_pillar_index(month, day, year_p % 10)
+
+
+def four_pillar_indices(
+    year: int, month: int, day: int, hour_code: int, minute: Optional[int] = None
+) -> Tuple[int, int, int, int]:
+    """(year, month, day, hour) pillar indices; hour is UNKNOWN when not known."""
+    year_p, month_p = year_month_pillar_indices(year, month, day, hour_code, minute)
+    day_p = day_pillar_index(year, month, day)
+    return year_p, month_p, day_p, hour_pillar_index(day_p % 10, hour_code)
+
+
+# ============================================================================
+# SOLAR TERMS (절기) TABLE
+# ============================================================================
+# data/solar_terms.bin holds the exact entry time of the 12 month-starting
+# 절 (소한, 입춘, ..., 대설) for every year of its range, as uint32 minutes
+# since 1900-01-01 00:00 KST (UTC+9). It is generated by
+# tools/build_solar_terms.py and memory-mapped on first use.
+
+SOLAR_TERMS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'solar_terms.bin')
+_SOLAR_TERMS_MAGIC = b'SJT1'
+_SOLAR_TERMS_HEADER = struct.Struct('<4sHHHH')
+
+def birth_minute(year: int, month: int, day: int, hour_code: int = 12) -> int:
+    """Minutes since 1900-01-01 00:00 KST for a birth date and hour code."""
+    return (days_from_civil(year, month, day) - _CIVIL_1900) * 1440 + HOUR_CODE_MINUTE[hour_code]
+
+
+class SolarTermTable:
+    """Memory-mapped 절입 table; entry k is the k-th 절 since the first 소한."""
+
+    __slots__ = ('first_year', 'last_year', 'stamps', 'month_base', '_mmap')
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, first_year, years, per_year, _ = _SOLAR_TERMS_HEADER.unpack_from(mm)
+        if magic != _SOLAR_TERMS_MAGIC or per_year != 12:
+            raise RuntimeError(f"Unsupported solar term table: {path}")
+
+        stamps = memoryview(mm)[_SOLAR_TERMS_HEADER.size:].cast('I')
+        if sys.byteorder != 'little':
+            stamps = array('I', stamps)
+            stamps.byteswap()
+
+        self._mmap = mm
+        self.stamps = stamps
+        self.first_year = first_year
+        self.last_year = first_year + years - 1
+        # The first entry is the 소한 of first_year, i.e. the 축 month of the
+        # previous saju year
+        self.month_base = month_pillar_index(1, 31, year_pillar_index(first_year - 1, 6, 1) % 10)
+
+    def year_pillar(self, k: int) -> int:
+        """Year pillar index in effect from entry k (소한 still belongs to the old year)."""
+        return (self.first_year + k // 12 - (k % 12 == 0) - 1984) % 60
+
+    def month_pillar(self, k: int) -> int:
+        """Month pillar index in effect from entry k (+1 per 절)."""
+        return (self.month_base + k) % 60
+
+
+@lru_cache(maxsize=None)
+def _solar_term_table() -> SolarTermTable:
+    """Load the 절입 table on first use."""
+    if not os.path.exists(SOLAR_TERMS_PATH):
+        raise RuntimeError(
+            f"Solar term table not found: {SOLAR_TERMS_PATH}. Run: python tools/build_solar_terms.py"
+        )
+    return SolarTermTable(SOLAR_TERMS_PATH)
+
+
+def solar_term_at(
+    year: int, month: int, day: int, hour_code: int = 12, minute: Optional[int] = None
+) -> Optional[Tuple[int, int]]:
+    """
+    Most recent 절 before the given birth moment.
+
+    The moment is the hour code's minute (HOUR_CODE_MINUTE) on the date, or
+    minute (since 1900-01-01 00:00 KST) for an exact birth time.
+
+    Returns:
+        (entry index, minutes since 1900-01-01 00:00 KST), or None outside the table
+    """
+    table = _solar_term_table()
+    if not table.first_year <= year <= table.last_year:
+        return None
+    if minute is None:
+        minute = birth_minute(year, month, day, hour_code)
+    k = bisect_right(table.stamps, minute) - 1
+    if k < 0:
+        return None
+    return k, table.stamps[k]
+
+
+# Relation rule registry. Every relation type is declared once here and
+# compiled at import into dense tables, so one pass over a chart's pairs and
+# triples evaluates all of them:
+#   'stem_pair' / 'branch_pair'  two different stems/branches forming a pair
+#   'branch_self'                the same branch at two positions (자형)
+#   'branch_group'               three different branches of one group
+# Adding a rule means adding a row (and its member data), never a loop.
+RELATION_REGISTRY = [
+    # (result key, type label, kind, members)
+    ('heavenly_stem_harmony', '천간합', 'stem_pair', HEAVENLY_STEM_HARMONY),
+    ('heavenly_stem_clash', '천간충', 'stem_pair', HEAVENLY_STEM_CLASH),
+    ('earthly_branch_six_harmony', '지지육합', 'branch_pair', EARTHLY_BRANCH_SIX_HARMONY),
+    ('earthly_branch_clash', '지지충', 'branch_pair', EARTHLY_BRANCH_CLASH),
+    ('earthly_branch_three_harmony', '지지삼합', 'branch_group', THREE_HARMONIES),
+    ('earthly_branch_half_harmony', '지지반합', 'branch_pair', HALF_HARMONIES),
+    ('earthly_branch_directional_harmony', '지지방합', 'branch_group', DIRECTIONAL_HARMONIES),
+    ('earthly_branch_hidden_harmony', '지지암합', 'branch_pair', HIDDEN_HARMONIES),
+    ('earthly_branch_punishment', '삼형', 'branch_group', THREE_PUNISHMENTS),
+    ('earthly_branch_self_punishment', '자형', 'branch_self', SELF_PUNISHMENTS),
+    ('earthly_branch_destruction', '육파', 'branch_pair', SIX_DESTRUCTIONS),
+    ('earthly_branch_harm', '육해', 'branch_pair', SIX_HARMS),
+    ('earthly_branch_resentment', '원진', 'branch_pair', RESENTMENTS),
+]
+
+RELATION_KEYS = [key for key, _, _, _ in RELATION_REGISTRY]
+
+# Pair rules (pair and self kinds) and group rules, in registry order. The
+# first four pair rules line up with REL_STEM_HARMONY..REL_BRANCH_CLASH, so a
+# PILLAR_RELATIONS flag nibble is also a valid pair rule bitmask.
+PAIR_RULES = [(key, label, kind) for key, label, kind, _ in RELATION_REGISTRY if kind != 'branch_group']
+GROUP_RULES = [(key, label, kind) for key, label, kind, _ in RELATION_REGISTRY if kind == 'branch_group']
+
+
+def _compile_pair_rules() -> array:
+    """PAIR_RULE_BITS[p1 * 60 + p2]: bit r set when PAIR_RULES[r] holds for the pillars."""
+    stem_pairs, branch_pairs = [set() for _ in PAIR_RULES], [set() for _ in PAIR_RULES]
+    r = 0
+    for key, label, kind, members in RELATION_REGISTRY:
+        if kind == 'branch_group':
+            continue
+        for member in members:
+            if kind == 'stem_pair':
+                a, b = STEM_INDEX[member[0]], STEM_INDEX[member[1]]
+                stem_pairs[r].update({(a, b), (b, a)})
+            elif kind == 'branch_pair':
+                a, b = BRANCH_INDEX[member[0]], BRANCH_INDEX[member[1]]
+                branch_pairs[r].update({(a, b), (b, a)})
+            else:
+                branch_pairs[r].add((BRANCH_INDEX[member], BRANCH_INDEX[member]))
+        r += 1
+
+    table = array('H', bytes(2 * 3600))
+    for p1 in range(60):
+        for p2 in range(60):
+            stems, branches = (p1 % 10, p2 % 10), (p1 % 12, p2 % 12)
+            bits = 0
+            for r in range(len(PAIR_RULES)):
+                if stems in stem_pairs[r] or branches in branch_pairs[r]:
+                    bits |= 1 << r
+            table[p1 * 60 + p2] = bits
+    return table
+
+
+def _compile_group_rules() -> bytes:
+    """GROUP_RULE_BITS[(b1 * 12 + b2) * 12 + b3]: bit g set when the branches complete GROUP_RULES[g]."""
+    groups = [
+        [frozenset(BRANCH_INDEX[b] for b in member) for member in members]
+        for _, _, kind, members in RELATION_REGISTRY if kind == 'branch_group'
+    ]
+    table = bytearray(12 ** 3)
+    for b1 in range(12):
+        for b2 in range(12):
+            for b3 in range(12):
+                branches = frozenset((b1, b2, b3))
+                if len(branches) < 3:
+                    continue
+                for g, members in enumerate(groups):
+                    if branches in members:
+                        table[(b1 * 12 + b2) * 12 + b3] |= 1 << g
+    return bytes(table)
+
+
+PAIR_RULE_BITS = _compile_pair_rules()
+GROUP_RULE_BITS = _compile_group_rules()
+
+# Rule ids for every possible bitmask, so emission never scans bit by bit
+_PAIR_RULE_IDS = [tuple(r for r in range(len(PAIR_RULES)) if bits >> r & 1) for bits in range(1 << len(PAIR_RULES))]
+_GROUP_RULE_IDS = [tuple(g for g in range(len(GROUP_RULES)) if bits >> g & 1) for bits in range(1 << len(GROUP_RULES))]
+
+# Per-rule toggles (see set_relation_rules); everything is on by default
+_ACTIVE_RULES = {
+    'keys': list(RELATION_KEYS),
+    'pair_mask': (1 << len(PAIR_RULES)) - 1,
+    'group_mask': (1 << len(GROUP_RULES)) - 1,
+}
+
+
+def set_relation_rules(enabled: Optional[Iterable[str]] = None, disabled: Iterable[str] = ()) -> List[str]:
+    """
+    Choose which relation types are emitted.
+
+    Args:
+        enabled: Result keys to emit (default: all of RELATION_KEYS)
+        disabled: Result keys to leave out
+
+    Returns:
+        The active keys, in RELATION_KEYS order
+
+    Raises:
+        ValueError: On an unknown key
+    """
+    enabled = set(RELATION_KEYS if enabled is None else enabled)
+    disabled = set(disabled)
+    unknown = (enabled | disabled) - set(RELATION_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown relation rules: {sorted(unknown)}")
+    active = enabled - disabled
+    _ACTIVE_RULES['keys'] = [key for key in RELATION_KEYS if key in active]
+    _ACTIVE_RULES['pair_mask'] = sum(1 << r for r, rule in enumerate(PAIR_RULES) if rule[0] in active)
+    _ACTIVE_RULES['group_mask'] = sum(1 << g for g, rule in enumerate(GROUP_RULES) if rule[0] in active)
+    # Cached charts hold relations computed with the old toggles; charts held
+    # elsewhere refresh themselves on next use (NatalChart._sync_rules)
+    get_natal_chart.cache_clear()
+    return list(_ACTIVE_RULES['keys'])
+
+
+def _empty_relations() -> Dict[str, List[Dict]]:
+    """Empty find_harmonies_and_clashes result (active rules only)."""
+    return {key: [] for key in _ACTIVE_RULES['keys']}
+
+
+def _emit_pair(result: Dict[str, List[Dict]], bits: int, pos1: str, p1: int, pos2: str, p2: int) -> None:
+    """Append the entries of the pair rules in bits for one pillar pair."""
+    for r in _PAIR_RULE_IDS[bits]:
+        key, label, kind = PAIR_RULES[r]
+        if kind == 'stem_pair':
+            result[key].append({
+                'positions': [pos1, pos2],
+                'stems': [HEAVENLY_STEMS[p1 % 10], HEAVENLY_STEMS[p2 % 10]],
+                'type': label
+            })
+        else:
+            result[key].append({
+                'positions': [pos1, pos2],
+                'branches': [EARTHLY_BRANCHES[p1 % 12], EARTHLY_BRANCHES[p2 % 12]],
+                'type': label
+            })
+
+
+def _emit_group(result: Dict[str, List[Dict]], bits: int, positions: List[str], pillars: List[int]) -> None:
+    """Append the entries of the group rules in bits for one pillar triple."""
+    for g in _GROUP_RULE_IDS[bits]:
+        key, label, _ = GROUP_RULES[g]
+        result[key].append({
+            'positions': list(positions),
+            'branches': [EARTHLY_BRANCHES[p % 12] for p in pillars],
+            'type': label
+        })
+
+
+# Bitmask rules: a chart's stems and branches are 10-bit / 12-bit masks, and
+# every registry member is a mask whose bits must all be present. This is an
+# exact test for pair and group rules and a necessary one for 자형 (which also
+# needs the branch twice); find_relations does the exact per-position pass.
+
+def _build_relation_rules() -> List[Tuple[str, str, int, str]]:
+    """RELATION_RULES entries: (result key, 'stem' | 'branch', mask, type label)."""
+    rules = []
+    for key, label, kind, members in RELATION_REGISTRY:
+        index = STEM_INDEX if kind == 'stem_pair' else BRANCH_INDEX
+        for member in members:
+            mask = 0
+            for m in ((member,) if kind == 'branch_self' else member):
+                mask |= 1 << index[m]
+            rule = (key, 'stem' if kind == 'stem_pair' else 'branch', mask, label)
+            if rule not in rules:
+                rules.append(rule)
+    return rules
+
+
+RELATION_RULES = _build_relation_rules()
+RULE_MASKS = [mask for _, _, mask, _ in RELATION_RULES]
+STEM_RULE_IDS = [i for i, rule in enumerate(RELATION_RULES) if rule[1] == 'stem']
+BRANCH_RULE_IDS = [i for i, rule in enumerate(RELATION_RULES) if rule[1] == 'branch']
+
+
+def chart_masks(pillar_indices: List[int]) -> Tuple[int, int]:
+    """(stem_mask, branch_mask) of the known pillars in a chart."""
+    stem_mask = branch_mask = 0
+    for p in pillar_indices:
+        if p != UNKNOWN:
+            stem_mask |= 1 << (p % 10)
+            branch_mask |= 1 << (p % 12)
+    return stem_mask, branch_mask
+
+
+@lru_cache(maxsize=None)
+def _rules_for_stem_mask(stem_mask: int) -> Tuple[int, ...]:
+    return tuple(r for r in STEM_RULE_IDS if stem_mask & RULE_MASKS[r] == RULE_MASKS[r])
+
+
+@lru_cache(maxsize=None)
+def _rules_for_branch_mask(branch_mask: int) -> Tuple[int, ...]:
+    return tuple(r for r in BRANCH_RULE_IDS if branch_mask & RULE_MASKS[r] == RULE_MASKS[r])
+
+
+def match_relation_rules(stem_mask: int, branch_mask: int) -> Tuple[int, ...]:
+    """Ids of the RELATION_RULES matched by a chart's masks."""
+    return _rules_for_stem_mask(stem_mask) + _rules_for_branch_mask(branch_mask)
+
+
+def find_relations(positions: List[str], pillar_indices: List[int]) -> Dict[str, List[Dict]]:
+    """
+    Integer core of find_harmonies_and_clashes: every active registry rule
+    in one pass over the pillar pairs and triples.
+
+    Args:
+        positions: Position names, in output order
+        pillar_indices: 60-cycle pillar index per position (UNKNOWN is skipped)
+    """
+    result = _empty_relations()
+    pair_mask, group_mask = _ACTIVE_RULES['pair_mask'], _ACTIVE_RULES['group_mask']
+    entries = [(pos, p) for pos, p in zip(positions, pillar_indices) if p != UNKNOWN]
+
+    for (pos1, p1), (pos2, p2) in combinations(entries, 2):
+        bits = PAIR_RULE_BITS[p1 * 60 + p2] & pair_mask
+        if bits:
+            _emit_pair(result, bits, pos1, p1, pos2, p2)
+
+    if group_mask:
+        for (pos1, p1), (pos2, p2), (pos3, p3) in combinations(entries, 3):
+            bits = GROUP_RULE_BITS[(p1 % 12 * 12 + p2 % 12) * 12 + p3 % 12] & group_mask
+            if bits:
+                _emit_group(result, bits, [pos1, pos2, pos3], [p1, p2, p3])
+
+    return result
+
+
+def chart_masks_batch(pillars):
+    """
+    Vectorized chart_masks.
+
+    Args:
+        pillars: int array of shape (N, K) with pillar indices (UNKNOWN allowed)
+
+    Returns:
+        (stem_masks, branch_masks): int32 arrays of shape (N,)
+    """
+    np = _numpy()
+    pillars = np.asarray(pillars, dtype=np.int32)
+    known = pillars != UNKNOWN
+    stem_bits = np.where(known, 1 << (pillars % 10), 0)
+    branch_bits = np.where(known, 1 << (pillars % 12), 0)
+    return np.bitwise_or.reduce(stem_bits, axis=1), np.bitwise_or.reduce(branch_bits, axis=1)
+
+
+def match_relation_rules_batch(stem_masks, branch_masks):
+    """
+    Vectorized match_relation_rules for a whole roster.
+
+    Returns:
+        bool array of shape (N, len(RELATION_RULES)); column r is True where
+        RELATION_RULES[r] matches the chart.
+    """
+    np = _numpy()
+    rule_masks = np.array(RULE_MASKS, dtype=np.int32)
+    is_stem = np.array([rule[1] == 'stem' for rule in RELATION_RULES])
+    masks = np.where(is_stem[None, :],
+                     np.asarray(stem_masks, dtype=np.int32)[:, None],
+                     np.asarray(branch_masks, dtype=np.int32)[:, None])
+    return (masks & rule_masks) == rule_masks
+
+
+# ============================================================================
+# PILLAR CALENDAR
+# ============================================================================
+# data/pillar_calendar.bin precomputes, for every day of its range, the
+# pillars in effect at noon KST (as pillar_timeline and calculate_today_pillar
+# use them), so date queries are index reads instead of 절입 searches.
+# It is generated from the arithmetic above by tools/build_pillar_calendar.py.
+#
+# Layout (little-endian):
+#     header  magic b'SJC1', first_year (u16), years (u16), days (u32),
+#             crc32 of everything after the header (u32)
+#     days    one byte per day from first_year-01-01: bits 0-5 day pillar,
+#             bit 6 CAL_TERM (a 절 starts: month pillar +1),
+#             bit 7 CAL_NEW_YEAR (입춘: year pillar +1)
+#     months  three byte arrays over the years * 12 months: year pillar and
+#             month pillar on the 1st, and the day of the month's 절
+
+PILLAR_CALENDAR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'pillar_calendar.bin')
+_PILLAR_CALENDAR_MAGIC = b'SJC1'
+_PILLAR_CALENDAR_HEADER = struct.Struct('<4sHHII')
+
+CAL_PILLAR_MASK = 0x3F
+CAL_TERM = 0x40
+CAL_NEW_YEAR = 0x80
+
+
+class PillarCalendar:
+    """Memory-mapped daily pillar calendar (see the layout above)."""
+
+    __slots__ = ('first_year', 'last_year', 'first_day', 'days', 'year_pillars', 'month_pillars',
+                 'term_days', '_mmap')
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, first_year, years, days, crc = _PILLAR_CALENDAR_HEADER.unpack_from(mm)
+        size = _PILLAR_CALENDAR_HEADER.size
+        if magic != _PILLAR_CALENDAR_MAGIC or len(mm) != size + days + 3 * 12 * years:
+            raise RuntimeError(f"Unsupported pillar calendar: {path}")
+        if zlib.crc32(memoryview(mm)[size:]) != crc:
+            raise RuntimeError(f"Pillar calendar checksum mismatch: {path}")
+
+        view = memoryview(mm)
+        months = 12 * years
+        self._mmap = mm
+        self.first_year = first_year
+        self.last_year = first_year + years - 1
+        self.first_day = days_from_civil(first_year, 1, 1)
+        self.days = view[size:size + days]
+        self.year_pillars = view[size + days:size + days + months]
+        self.month_pillars = view[size + days + months:size + days + 2 * months]
+        self.term_days = view[size + days + 2 * months:]
+
+    def pillars(self, year: int, month: int, day: int) -> Optional[Tuple[int, int, int]]:
+        """(year, month, day) pillar indices at noon KST, or None outside the calendar."""
+        if not self.first_year <= year <= self.last_year:
+            return None
+        m = (year - self.first_year) * 12 + month - 1
+        after_term = day >= self.term_days[m]
+        year_p = self.year_pillars[m] + (after_term and month == 2)
+        month_p = self.month_pillars[m] + after_term
+        day_p = self.days[days_from_civil(year, month, day) - self.first_day] & CAL_PILLAR_MASK
+        return year_p % 60, month_p % 60, day_p
+
+
+@lru_cache(maxsize=None)
+def _pillar_calendar() -> PillarCalendar:
+    """Load the pillar calendar on first use."""
+    if not os.path.exists(PILLAR_CALENDAR_PATH):
+        raise RuntimeError(
+            f"Pillar calendar not found: {PILLAR_CALENDAR_PATH}. Run: python tools/build_pillar_calendar.py"
+        )
+    return PillarCalendar(PILLAR_CALENDAR_PATH)
+
+
+def calendar_pillars(year: int, month: int, day: int) -> Tuple[int, int, int]:
+    """
+    (year, month, day) pillar indices in effect at noon KST on a date.
+
+    Reads the pillar calendar; dates outside it use the arithmetic
+    (year_month_pillar_indices and day_pillar_index), which the calendar
+    is built from.
+    """
+    pillars = _pillar_calendar().pillars(year, month, day)
+    if pillars is None:
+        year_p, month_p = year_month_pillar_indices(year, month, day)
+        return year_p, month_p, day_pillar_index(year, month, day)
+    return pillars
+
+
+# ============================================================================
+# LUNAR CALENDAR (음력)
+# ============================================================================
+# Korean lunar calendar for 1900-2100, one packed int per lunar year
+# (generated by tools/build_lunar_table.py):
+#     bits 0-3    leap month number (0 = no leap month)
+#     bit  4      leap month has 30 days
+#     bits 5-16   month 1..12 has 30 days (bit 5 = month 1)
+#     bits 17-22  day of the solar year (0 = Jan 1) of lunar new year's day
+
+LUNAR_FIRST_YEAR = 1900
+LUNAR_YEAR_INFO = (
+    0x3d7a48, 0x626a40, 0x4d54a0, 0x385545, 0x5c2960, 0x4552e0, 0x3154d4, 0x562b40,  # 1900-1907
+    0x416aa0, 0x2b6d42, 0x506a40, 0x3b74a6, 0x6164a0, 0x494960, 0x332b65, 0x5955a0,  # 1908-1915
+    0x442d40, 0x2c36a2, 0x537520, 0x3f3a47, 0x653240, 0x4d24a0, 0x3725a5, 0x5d2ac0,  # 1916-1923
+    0x4656a0, 0x2f5ba4, 0x565a80, 0x413520, 0x2d5942, 0x515240, 0x3a54c6, 0x5e24e0,  # 1924-1931
+    0x494ae0, 0x332ad5, 0x595b40, 0x445a80, 0x2e6a33, 0x526920, 0x3d6277, 0x635260,  # 1932-1939
+    0x4c2560, 0x342376, 0x5b2da0, 0x476d40, 0x333494, 0x577480, 0x416920, 0x2b2962,  # 1940-1947
+    0x5152a0, 0x395567, 0x5e25a0, 0x4955a0, 0x355555, 0x593640, 0x453480, 0x2f5433,  # 1948-1955
+    0x552940, 0x3d32a8, 0x6352c0, 0x4c2ac0, 0x362ea6, 0x5b5aa0, 0x465a40, 0x306aa4,  # 1956-1963
+    0x5754a0, 0x414940, 0x2a49c3, 0x4f5360, 0x3b5ac7, 0x5e2d40, 0x496b20, 0x357645,  # 1964-1971
+    0x5a6a40, 0x4264a0, 0x2d6564, 0x534960, 0x3d3568, 0x6055a0, 0x4a2d60, 0x363536,  # 1972-1979
+    0x5d3520, 0x473240, 0x3132a4, 0x5724a0, 0x4149aa, 0x654ac0, 0x4e56c0, 0x395da6,  # 1980-1987
+    0x605a80, 0x493520, 0x355a45, 0x5b5240, 0x4524c0, 0x2c25c3, 0x514ae0, 0x3d36c8,  # 1988-1995
+    0x636b40, 0x4c5a80, 0x366d25, 0x5c6920, 0x465260, 0x2f52e4, 0x542560, 0x3f4b60,  # 1996-2003
+    0x2b55c2, 0x4e6d40, 0x393aa7, 0x617480, 0x4b6920, 0x332a65, 0x5952a0, 0x4225a0,  # 2004-2011
+    0x2c25b3, 0x5155a0, 0x3d7549, 0x623a40, 0x4d34a0, 0x375545, 0x5d2940, 0x4752a0,  # 2012-2019
+    0x3153a4, 0x542ac0, 0x3f56a0, 0x2b5ac2, 0x505a40, 0x386ca6, 0x5f54a0, 0x4b4940,  # 2020-2027
+    0x344ac5, 0x571360, 0x422b40, 0x2c2da3, 0x536d20, 0x3d6a4b, 0x626a40, 0x4d64a0,  # 2028-2035
+    0x376176, 0x5b4960, 0x441560, 0x2e5765, 0x542da0, 0x3f6d20, 0x2b3542, 0x513240,  # 2036-2043
+    0x3b54a7, 0x5f24a0, 0x4949a0, 0x3349b5, 0x5856c0, 0x4036a0, 0x2c5a33, 0x535520,  # 2044-2051
+    0x3f5258, 0x635240, 0x4d24c0, 0x3622d6, 0x5b4ae0, 0x441ac0, 0x2e6ab4, 0x545aa0,  # 2052-2059
+    0x415920, 0x2a6943, 0x4e5260, 0x395567, 0x5e2560, 0x474b60, 0x335745, 0x582d40,  # 2060-2067
+    0x436aa0, 0x2d7524, 0x536920, 0x3d3268, 0x6352a0, 0x4a25a0, 0x342da6, 0x5b56a0,  # 2068-2075
+    0x463540, 0x2e3aa4, 0x5534a0, 0x412940, 0x2b29a3, 0x4f12a0, 0x3955c7, 0x5e2ac0,  # 2076-2083
+    0x4956a0, 0x335a55, 0x585a40, 0x4354a0, 0x2f6544, 0x524940, 0x3a52e8, 0x611560,  # 2084-2091
+    0x4c2b40, 0x342ab6, 0x5b6d20, 0x466a40, 0x316aa4, 0x5564a0, 0x3e4960, 0x2949e3,  # 2092-2099
+    0x4e1560,  # 2100-2100
+)
+LUNAR_LAST_YEAR = LUNAR_FIRST_YEAR + len(LUNAR_YEAR_INFO) - 1
+
+
+class LunarCalendar:
+    """Unpacked LUNAR_YEAR_INFO: every lunar month as (start ordinal, year, month, leap)."""
+
+    __slots__ = ('month_starts', 'month_labels', 'month_index', 'end')
+
+    def __init__(self):
+        self.month_starts: List[int] = []
+        self.month_labels: List[Tuple[int, int, bool]] = []
+        self.month_index: Dict[Tuple[int, int, bool], int] = {}
+        start = 0
+        for offset, info in enumerate(LUNAR_YEAR_INFO):
+            year = LUNAR_FIRST_YEAR + offset
+            start = date(year, 1, 1).toordinal() + (info >> 17)
+            leap = info & 0xF
+            for month in range(1, 13):
+                for is_leap in ((False, True) if month == leap else (False,)):
+                    long_month = (info >> 4) & 1 if is_leap else (info >> (4 + month)) & 1
+                    self.month_index[(year, month, is_leap)] = len(self.month_starts)
+                    self.month_starts.append(start)
+                    self.month_labels.append((year, month, is_leap))
+                    start += 30 if long_month else 29
+        self.end = start  # first day after the last lunar month
+
+    def month_length(self, i: int) -> int:
+        """Length in days of month i."""
+        following = self.month_starts[i + 1] if i + 1 < len(self.month_starts) else self.end
+        return following - self.month_starts[i]
+
+
+@lru_cache(maxsize=None)
+def _lunar_calendar() -> LunarCalendar:
+    return LunarCalendar()
+
+
+def solar_to_lunar(year: int, month: int, day: int) -> Tuple[int, int, int, bool]:
+    """
+    Convert a solar (양력) date to the Korean lunar calendar.
+
+    Returns:
+        Tuple of (lunar year, lunar month, lunar day, is_leap_month)
+
+    Raises:
+        ValueError: If the date is outside the table range
+    """
+    cal = _lunar_calendar()
+    ordinal = date(year, month, day).toordinal()
+    i = bisect_right(cal.month_starts, ordinal) - 1
+    if i < 0 or ordinal >= cal.end:
+        raise ValueError(f"Date out of lunar table range: {year}-{month:02d}-{day:02d}")
+    lunar_year, lunar_month, is_leap = cal.month_labels[i]
+    return lunar_year, lunar_month, ordinal - cal.month_starts[i] + 1, is_leap
+
+
+def lunar_to_solar(year: int, month: int, day: int, is_leap: bool = False) -> Tuple[int, int, int]:
+    """
+    Convert a Korean lunar (음력) date to the solar calendar.
+
+    Returns:
+        Tuple of (year, month, day)
+
+    Raises:
+        ValueError: If the lunar date does not exist (bad day, no such leap month)
+    """
+    cal = _lunar_calendar()
+    i = cal.month_index.get((year, month, bool(is_leap)))
+    if i is None:
+        leap = '윤' if is_leap else ''
+        raise ValueError(f"No such lunar month: {year}년 {leap}{month}월")
+    if not 1 <= day <= cal.month_length(i):
+        raise ValueError(f"Invalid lunar day: {year}-{month:02d}-{day:02d}")
+    solar = date.fromordinal(cal.month_starts[i] + day - 1)
+    return solar.year, solar.month, solar.day
+
+
+def lunar_to_solar_date(date_str: str, is_leap: bool = False) -> str:
+    """Convert a lunar YYYY-MM-DD string to a solar YYYY-MM-DD string."""
+    year, month, day = parse_date(date_str)
+    return '%04d-%02d-%02d' % lunar_to_solar(year, month, day, is_leap)
+
+
+def solar_to_lunar_batch(dates):
+    """
+    Vectorized solar_to_lunar.
+
+    Args:
+        dates: datetime64[D] array (or YYYY-MM-DD strings)
+
+    Returns:
+        (years, months, days, is_leap) NumPy arrays; rows outside the table
+        range have year 0
+    """
+    np = _numpy()
+    cal = _lunar_calendar()
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    ordinals = dates.astype(np.int64) + date(1970, 1, 1).toordinal()
+    starts = np.array(cal.month_starts, dtype=np.int64)
+    labels = np.array(cal.month_labels, dtype=np.int64)
+
+    i = np.searchsorted(starts, ordinals, side='right') - 1
+    inside = (i >= 0) & (ordinals < cal.end)
+    i = np.where(inside, i, 0)
+    return (
+        np.where(inside, labels[i, 0], 0),
+        np.where(inside, labels[i, 1], 0),
+        np.where(inside, ordinals - starts[i] + 1, 0),
+        np.where(inside, labels[i, 2], 0).astype(bool),
+    )
+
+
+def lunar_to_solar_batch(years, months, days, is_leap=None):
+    """
+    Vectorized lunar_to_solar.
+
+    Returns:
+        datetime64[D] array; NaT where the lunar date does not exist
+    """
+    np = _numpy()
+    cal = _lunar_calendar()
+    years = np.asarray(years, dtype=np.int64)
+    months = np.asarray(months, dtype=np.int64)
+    days = np.asarray(days, dtype=np.int64)
+    leaps = np.zeros(years.shape, dtype=np.int64) if is_leap is None else np.asarray(is_leap, dtype=np.int64)
+
+    # Dense [year, month, leap] -> month number lookup (-1 where absent)
+    dense = np.full((len(LUNAR_YEAR_INFO), 13, 2), -1, dtype=np.int64)
+    for (year, month, leap), i in cal.month_index.items():
+        dense[year - LUNAR_FIRST_YEAR, month, int(leap)] = i
+    starts = np.array(cal.month_starts + [cal.end], dtype=np.int64)
+
+    in_range = ((years >= LUNAR_FIRST_YEAR) & (years <= LUNAR_LAST_YEAR)
+                & (months >= 1) & (months <= 12) & ((leaps == 0) | (leaps == 1)))
+    i = dense[np.where(in_range, years - LUNAR_FIRST_YEAR, 0), np.where(in_range, months, 1), np.where(in_range, leaps, 0)]
+    i = np.where(in_range, i, -1)
+    safe = np.maximum(i, 0)
+    valid = (i >= 0) & (days >= 1) & (days <= starts[safe + 1] - starts[safe])
+
+    epoch = date(1970, 1, 1).toordinal()
+    result = (starts[safe] + days - 1 - epoch).astype('datetime64[D]')
+    return np.where(valid, result, np.datetime64('NaT'))
+
+
+# ============================================================================
+# TRUE SOLAR TIME (진태양시)
+# ============================================================================
+# An exact birth time is Korean clock time, but the hour pillar follows the
+# Sun at the birthplace. The conversion uses embedded tables only (generated
+# by tools/build_time_tables.py):
+#   clock time -> UTC         KOREA_CLOCK_OFFSETS (standard meridian and DST)
+#   UTC -> local mean time    birthplace longitude, 4 minutes per degree
+#   mean -> apparent time     EQUATION_OF_TIME for the calendar day
+# Before 1908-04-01 clocks kept local mean time, so only the last step
+# applies. A clock time that occurred twice (DST ending) is read as the
+# earlier one. 절입 lookups use the same instant on the table's UTC+9 scale.
+# exact_birth then reads the hour code off a 1440-entry minute table for the
+# configured boundary convention (set_hour_convention).
+
+KOREA_CLOCK_OFFSETS = (
+    (4337280, 510),  # 1908-04-01 00:00 UTC+8:30
+    (6310080, 540),  # 1912-01-01 00:00 UTC+9:00
+    (25463520, 600),  # 1948-06-01 00:00 UTC+10:00
+    (25613280, 540),  # 1948-09-13 00:00 UTC+9:00
+    (25904160, 600),  # 1949-04-03 00:00 UTC+10:00
+    (26136000, 540),  # 1949-09-11 00:00 UTC+9:00
+    (26426880, 600),  # 1950-04-01 00:00 UTC+10:00
+    (26660160, 540),  # 1950-09-10 00:00 UTC+9:00
+    (27002880, 600),  # 1951-05-06 00:00 UTC+10:00
+    (27184320, 540),  # 1951-09-09 00:00 UTC+9:00
+    (28514880, 510),  # 1954-03-21 00:00 UTC+8:30
+    (29105280, 570),  # 1955-05-05 00:00 UTC+9:30
+    (29288160, 510),  # 1955-09-09 00:00 UTC+8:30
+    (29653920, 570),  # 1956-05-20 00:00 UTC+9:30
+    (29845440, 510),  # 1956-09-30 00:00 UTC+8:30
+    (30157920, 570),  # 1957-05-05 00:00 UTC+9:30
+    (30359520, 510),  # 1957-09-22 00:00 UTC+8:30
+    (30682080, 570),  # 1958-05-04 00:00 UTC+9:30
+    (30883680, 510),  # 1958-09-21 00:00 UTC+8:30
+    (31206240, 570),  # 1959-05-03 00:00 UTC+9:30
+    (31407840, 510),  # 1959-09-20 00:00 UTC+8:30
+    (31730400, 570),  # 1960-05-01 00:00 UTC+9:30
+    (31932000, 510),  # 1960-09-18 00:00 UTC+8:30
+    (32401440, 540),  # 1961-08-10 00:00 UTC+9:00
+    (45943320, 600),  # 1987-05-10 02:00 UTC+10:00
+    (46165140, 540),  # 1987-10-11 03:00 UTC+9:00
+    (46467480, 600),  # 1988-05-08 02:00 UTC+10:00
+    (46689300, 540),  # 1988-10-09 03:00 UTC+9:00
+)
+
+EQUATION_OF_TIME = (
+    -198, -226, -254, -282, -309, -336, -362, -388, -413, -438, -462, -486, -509, -531, -553, -574,  # Jan
+    -595, -615, -634, -652, -670, -687, -703, -718, -733, -747, -760, -772, -783, -794, -803,
+    -812, -820, -828, -834, -840, -845, -849, -852, -854, -856, -856, -856, -856, -854, -852, -849,  # Feb
+    -845, -841, -835, -830, -823, -816, -808, -800, -791, -781, -771, -760, -753,
+    -746, -734, -722, -709, -696, -682, -668, -653, -638, -623, -607, -591, -575, -559, -542, -525,  # Mar
+    -508, -490, -473, -455, -437, -419, -401, -383, -365, -347, -329, -311, -293, -275, -257,
+    -239, -221, -203, -186, -168, -151, -134, -117, -101,  -85,  -69,  -53,  -37,  -22,   -8,    7,  # Apr
+      21,   34,   48,   61,   73,   85,   97,  108,  118,  129,  138,  147,  156,  164,
+     172,  179,  185,  191,  197,  202,  206,  210,  213,  216,  218,  219,  220,  221,  220,  220,  # May
+     218,  216,  214,  211,  207,  203,  198,  193,  188,  182,  175,  168,  160,  152,  144,
+     135,  126,  116,  106,   96,   85,   74,   63,   52,   40,   28,   16,    3,   -9,  -22,  -35,  # Jun
+     -48,  -61,  -74,  -87, -100, -113, -126, -139, -152, -164, -177, -189, -201, -213,
+    -225, -237, -248, -259, -270, -280, -290, -299, -308, -317, -326, -334, -341, -348, -354, -360,  # Jul
+    -366, -371, -375, -379, -382, -385, -387, -389, -390, -390, -390, -389, -388, -386, -383,
+    -380, -376, -372, -367, -361, -355, -348, -341, -333, -324, -315, -305, -295, -284, -273, -261,  # Aug
+    -248, -235, -222, -208, -194, -179, -163, -148, -132, -115,  -98,  -81,  -63,  -45,  -26,
+      -8,   11,   31,   50,   70,   90,  110,  131,  151,  172,  193,  214,  235,  256,  278,  299,  # Sep
+     320,  342,  363,  384,  406,  427,  448,  469,  490,  511,  531,  552,  572,  592,
+     611,  631,  650,  669,  687,  705,  723,  740,  757,  773,  789,  805,  820,  834,  848,  862,  # Oct
+     874,  887,  898,  909,  920,  929,  938,  946,  954,  961,  967,  972,  977,  981,  984,
+     986,  987,  988,  988,  987,  985,  982,  978,  974,  969,  963,  955,  948,  939,  929,  919,  # Nov
+     907,  895,  882,  868,  854,  838,  822,  805,  787,  769,  750,  730,  709,  688,
+     666,  643,  620,  596,  571,  546,  521,  495,  468,  441,  414,  386,  358,  330,  301,  272,  # Dec
+     243,  214,  184,  155,  125,   95,   66,   36,    6,  -24,  -53,  -82, -112, -141, -170,
+)
+
+_CLOCK_OFFSET_STARTS = [start for start, _ in KOREA_CLOCK_OFFSETS]
+_LEAP_YEAR_DAY = [0, 0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335]  # days before each month
+_ORDINAL_1900 = date(1900, 1, 1).toordinal()
+KST_OFFSET = 540  # UTC offset of the 절입 table in minutes
+
+# Longitudes (degrees east) of common birthplaces; anything else can be
+# given as a number
+BIRTHPLACE_LONGITUDES = {
+    '서울': 126.98, '인천': 126.71, '수원': 127.03, '춘천': 127.73, '강릉': 128.88,
+    '청주': 127.49, '대전': 127.38, '세종': 127.29, '전주': 127.15, '광주': 126.85,
+    '대구': 128.60, '포항': 129.37, '울산': 129.31, '부산': 129.08, '창원': 128.68,
+    '제주': 126.53, '평양': 125.75,
+}
+DEFAULT_BIRTHPLACE = '서울'
+
+
+def parse_birth_time(time_str: str) -> Tuple[int, int]:
+    """
+    Strict HH:MM parser (24-hour clock, zero-padded).
+
+    Returns:
+        Tuple of (hour, minute)
+
+    Raises:
+        ValueError: If time_str is not a valid HH:MM time
+    """
+    try:
+        if len(time_str) != 5 or time_str[2] != ':':
+            raise ValueError
+        digits = _DIGITS
+        hour = digits[time_str[0]] * 10 + digits[time_str[1]]
+        minute = digits[time_str[3]] * 10 + digits[time_str[4]]
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Invalid time (expected HH:MM): {time_str!r}")
+    if hour > 23 or minute > 59:
+        raise ValueError(f"Invalid time (expected HH:MM): {time_str!r}")
+    return hour, minute
+
+
+def birthplace_longitude(birthplace=None) -> float:
+    """
+    Longitude of a birthplace: a BIRTHPLACE_LONGITUDES name or degrees east.
+
+    Raises:
+        ValueError: On an unknown name or a longitude outside -180..180
+    """
+    if birthplace is None:
+        birthplace = DEFAULT_BIRTHPLACE
+    if isinstance(birthplace, str):
+        longitude = BIRTHPLACE_LONGITUDES.get(birthplace.strip())
+        if longitude is not None:
+            return longitude
+        try:
+            birthplace = float(birthplace)
+        except ValueError:
+            raise ValueError(f"Unknown birthplace: {birthplace!r}")
+    if not -180.0 <= birthplace <= 180.0:
+        raise ValueError(f"Longitude out of range: {birthplace!r}")
+    return float(birthplace)
+
+
+def clock_utc_offset(year: int, month: int, day: int, minute_of_day: int) -> Optional[int]:
+    """UTC offset in minutes of Korean clocks at a clock time, None for local mean time (before 1908-04-01)."""
+    clock = (days_from_civil(year, month, day) - _CIVIL_1900) * 1440 + minute_of_day
+    k = bisect_right(_CLOCK_OFFSET_STARTS, clock) - 1
+    return KOREA_CLOCK_OFFSETS[k][1] if k >= 0 else None
+
+
+def equation_of_time(month: int, day: int) -> int:
+    """Apparent minus mean solar time in seconds on a calendar day."""
+    return EQUATION_OF_TIME[_LEAP_YEAR_DAY[month] + day - 1]
+
+
+def true_solar_time(
+    year: int, month: int, day: int, hour: int, minute: int, longitude: float
+) -> Tuple[Tuple[int, int, int], int, int]:
+    """
+    Convert a Korean clock time of birth to apparent solar time at a longitude.
+
+    Returns:
+        (solar date, solar minute of the day, minutes since 1900-01-01
+        00:00 KST of the same instant); the solar date differs from the
+        clock date when the correction crosses midnight
+    """
+    minute_of_day = hour * 60 + minute
+    offset = clock_utc_offset(year, month, day, minute_of_day)
+    mean_seconds = round(longitude * 240)
+    clock_seconds = ((days_from_civil(year, month, day) - _CIVIL_1900) * 1440 + minute_of_day) * 60
+    utc_seconds = clock_seconds - (mean_seconds if offset is None else offset * 60)
+    solar_day, solar_seconds = divmod(utc_seconds + mean_seconds + equation_of_time(month, day), 86400)
+    solar = date.fromordinal(_ORDINAL_1900 + solar_day)
+    return (solar.year, solar.month, solar.day), solar_seconds // 60, utc_seconds // 60 + KST_OFFSET
+
+
+# Hour boundary conventions for exact birth times, as the minute of the day
+# the double-hours are read from and the shift of their boundaries:
+#   'solar'  true solar time at the birthplace; 자시 is 23:00-00:59
+#   'clock'  Korean standard time (DST removed); 자시 is 23:30-01:29, the
+#            almanac rule for the ~30 minutes between 135°E and Korea
+HOUR_CONVENTIONS = {'solar': 0, 'clock': 30}
+
+# Late 자시 (from the 자시 boundary to midnight) is read one of two ways:
+#   '조자시'  the day starts with 자시: the day pillar rolls over to the next day
+#   '야자시'  the day pillar stays; the hour pillar is still the next day's 자시
+ZI_MODES = ('조자시', '야자시')
+MINUTE_LATE_ZI = 0x10  # MINUTE_HOUR_CODES flag on late 자시 minutes
+
+
+def _build_minute_hour_codes(shift: int) -> bytes:
+    """Hour code of every minute of the day (plus MINUTE_LATE_ZI) for a boundary shift."""
+    return bytes(
+        (minute - shift + 60) // 120 % 12 | (MINUTE_LATE_ZI if minute >= 23 * 60 + shift else 0)
+        for minute in range(1440)
+    )
+
+
+MINUTE_HOUR_CODES = {name: _build_minute_hour_codes(shift) for name, shift in HOUR_CONVENTIONS.items()}
+
+# An hour code without an exact birth time is a Korean clock double-hour
+# (the time options are labelled with hour_code_label(code,
+# HOUR_CODE_CONVENTION)). Its 절입 moment (see birth_minute) is the middle
+# of that double-hour, and noon when the birth time is unknown.
+HOUR_CODE_CONVENTION = 'clock'
+HOUR_CODE_MINUTE = [h * 120 + HOUR_CONVENTIONS[HOUR_CODE_CONVENTION] for h in range(12)] + [12 * 60]
+
+# Active convention (see set_hour_convention)
+_HOUR_RULES = {'convention': 'solar', 'zi_mode': '조자시'}
+
+
+def set_hour_convention(convention: Optional[str] = None, zi_mode: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Choose how exact birth times map to the hour and day pillars.
+
+    Args:
+        convention: HOUR_CONVENTIONS key (unchanged if None)
+        zi_mode: ZI_MODES entry for late 자시 births (unchanged if None)
+
+    Returns:
+        The active (convention, zi_mode)
+
+    Raises:
+        ValueError: On an unknown convention or mode
+    """
+    if convention is not None and convention not in HOUR_CONVENTIONS:
+        raise ValueError(f"Unknown hour convention: {convention!r} (expected one of {', '.join(HOUR_CONVENTIONS)})")
+    if zi_mode is not None and zi_mode not in ZI_MODES:
+        raise ValueError(f"Unknown 자시 mode: {zi_mode!r} (expected one of {', '.join(ZI_MODES)})")
+    if convention is not None:
+        _HOUR_RULES['convention'] = convention
+    if zi_mode is not None:
+        _HOUR_RULES['zi_mode'] = zi_mode
+    # Cached charts hold pillars computed with the old convention
+    get_natal_chart.cache_clear()
+    return _HOUR_RULES['convention'], _HOUR_RULES['zi_mode']
+
+
+def hour_code_label(hour_code: int, convention: Optional[str] = None) -> str:
+    """Display label of an hour code, e.g. '子(자) 23:30 ~ 01:29' ('모름' for 12)."""
+    if hour_code == 12:
+        return '모름'
+    start = (hour_code * 120 - 60 + HOUR_CONVENTIONS[convention or _HOUR_RULES['convention']]) % 1440
+    end = (start + 119) % 1440
+    return (f"{EARTHLY_BRANCHES_CH[hour_code]}({EARTHLY_BRANCHES[hour_code]}) "
+            f"{start // 60:02d}:{start % 60:02d} ~ {end // 60:02d}:{end % 60:02d}")
+
+
+def exact_birth(
+    year: int, month: int, day: int, birth_time: str, longitude: float
+) -> Tuple[Tuple[int, int, int], int, int, bool, Dict]:
+    """
+    Pillar inputs for an exact birth time under the active hour convention.
+
+    Args:
+        birth_time: Korean clock time of birth (HH:MM)
+        longitude: Birthplace longitude (see birthplace_longitude)
+
+    Returns:
+        (date of the day pillar, hour code, 절입 minute, 야자시 flag,
+        input['exact_birth_time'] entry); with the 야자시 flag set the hour
+        pillar is the next day's 자시
+    """
+    hour, minute = parse_birth_time(birth_time)
+    convention, zi_mode = _HOUR_RULES['convention'], _HOUR_RULES['zi_mode']
+    solar_ymd, solar_minute, kst_minute = true_solar_time(year, month, day, hour, minute, longitude)
+    if convention == 'solar':
+        day_number, minute_of_day = days_from_civil(*solar_ymd) - _CIVIL_1900, solar_minute
+    else:
+        day_number, minute_of_day = divmod(kst_minute, 1440)
+    code = MINUTE_HOUR_CODES[convention][minute_of_day]
+    late_zi = bool(code & MINUTE_LATE_ZI)
+    if late_zi and zi_mode == '조자시':
+        day_number += 1
+    pillar_date = date.fromordinal(_ORDINAL_1900 + day_number)
+
+    offset = clock_utc_offset(year, month, day, hour * 60 + minute)
+    correction = (days_from_civil(*solar_ymd) - days_from_civil(year, month, day)) * 1440 + solar_minute - (hour * 60 + minute)
+    info = {
+        'birth_time': birth_time,
+        'longitude': longitude,
+        'utc_offset': 'LMT' if offset is None else '%+03d:%02d' % divmod(offset, 60),
+        'correction_minutes': correction,
+        'solar_date': '%04d-%02d-%02d' % solar_ymd,
+        'solar_time': '%02d:%02d' % divmod(solar_minute, 60),
+        'convention': convention,
+        'late_zi': late_zi,
+        'zi_mode': zi_mode,
+        'pillar_date': pillar_date.isoformat(),
+    }
+    ymd = (pillar_date.year, pillar_date.month, pillar_date.day)
+    return ymd, code & 0x0F, kst_minute, late_zi and zi_mode == '야자시', info
+
 
 # ============================================================================
 # HELPER FUNCTIONS
@@ -150,11 +1401,11 @@ THREE_HARMONIES = {
 
 def stem_to_index(stem: str) -> int:
     """Convert stem character to index (0-9)."""
-    return HEAVENLY_STEMS.index(stem) if stem in HEAVENLY_STEMS else -1
+    return STEM_INDEX.get(stem, -1)
 
 def branch_to_index(branch: str) -> int:
     """Convert branch character to index (0-11)."""
-    return EARTHLY_BRANCHES.index(branch) if branch in EARTHLY_BRANCHES else -1
+    return BRANCH_INDEX.get(branch, -1)
 
 def index_to_stem(index: int) -> str:
     """Convert index to stem character."""
@@ -164,6 +1415,12 @@ def index_to_branch(index: int) -> str:
     """Convert index to branch character."""
     return EARTHLY_BRANCHES[index % 12]
 
+def index_to_pillar(index: int) -> Tuple[str, str]:
+    """Convert a 60-cycle pillar index to (stem, branch)."""
+    if index == UNKNOWN:
+        return '모름', '모름'
+    return HEAVENLY_STEMS[index % 10], EARTHLY_BRANCHES[index % 12]
+
 def get_stem_element(stem: str) -> str:
     """Get the Five Element for a heavenly stem."""
     return STEM_ELEMENT.get(stem, '')
@@ -200,481 +1457,2501 @@ def get_month_branch_for_date(month: int, day: int) -> str:
     Get the Earthly Branch for the month based on solar terms.
     Solar terms determine month boundaries in lunar calendar calculation.
     """
-    for term_month, term_day, branch in SOLAR_TERMS:
-        if month == term_month:
-            if day >= term_day:
-                return branch
-            else:
-                # Return the branch from the previous solar term
-                for i, (tm, td, br) in enumerate(SOLAR_TERMS):
-                    if tm == month - 1 or (month == 1 and tm == 12):
-                        return br
-    return EARTHLY_BRANCHES[month - 1]  # Fallback
+    return EARTHLY_BRANCHES[month_branch_index(month, day)]
+
+
+# ============================================================================
+# CORE PILLAR CALCULATIONS
+# ============================================================================
+
+def calculate_day_pillar(date_str: str) -> Tuple[str, str]:
+    """
+    Calculate Day Pillar (일주) from the day count since a reference date.
+    Reference: January 1, 1900 is 甲戌(갑술) - index 10 in 60-cycle.
+
+    Args:
+        date_str: Date in format YYYY-MM-DD
+
+    Returns:
+        Tuple of (stem, branch)
+    """
+    year, month, day = parse_date(date_str)
+    return index_to_pillar(day_pillar_index(year, month, day))
+
+
+def calculate_year_pillar(date_str: str) -> Tuple[str, str]:
+    """
+    Calculate Year Pillar (년주).
+    The year changes at 입춘 (Start of Spring, ~Feb 4).
+    If the birth date is before 입춘, use the previous year.
+
+    Args:
+        date_str: Date in format YYYY-MM-DD
+
+    Returns:
+        Tuple of (stem, branch)
+    """
+    year, month, day = parse_date(date_str)
+    return index_to_pillar(year_pillar_index(year, month, day))
+
+
+def calculate_month_pillar(year: int, month: int, day: int, year_stem: str) -> Tuple[str, str]:
+    """
+    Calculate Month Pillar (월주).
+    The month branch is determined by solar terms (절기).
+    The month stem follows a pattern based on the year stem.
+
+    Args:
+        year: Year
+        month: Month (1-12)
+        day: Day of month
+        year_stem: The year stem (needed for month stem calculation)
+
+    Returns:
+        Tuple of (stem, branch)
+    """
+    return index_to_pillar(month_pillar_index(month, day, STEM_INDEX[year_stem]))
+
+
+def calculate_hour_pillar(day_stem: str, hour_code: int) -> Tuple[str, str]:
+    """
+    Calculate Hour Pillar (시주).
+    The hour branch is determined by the hour code (0-11 for 12 double-hours).
+    The hour stem follows a pattern based on the day stem.
+
+    Args:
+        day_stem: The day stem
+        hour_code: Hour code (0-11), where 0=자시, 11=해시, 12=unknown
+
+    Returns:
+        Tuple of (stem, branch) or ('모름', '모름') if hour_code == 12
+    """
+    return index_to_pillar(hour_pillar_index(STEM_INDEX[day_stem], hour_code))
+
+
+def calculate_four_pillars(birth_date: str, hour_code: int) -> Dict[str, Tuple[str, str]]:
+    """
+    Calculate all four pillars of destiny.
+
+    Args:
+        birth_date: Date in format YYYY-MM-DD
+        hour_code: Hour code (0-11, 12 for unknown)
+
+    Returns:
+        Dictionary with keys: year, month, day, hour
+        Each value is a tuple of (stem, branch)
+    """
+    year, month, day = parse_date(birth_date)
+    indices = four_pillar_indices(year, month, day, hour_code)
+    return {pos: index_to_pillar(p) for pos, p in zip(POSITIONS, indices)}
+
+
+# ============================================================================
+# TEN GODS (십성) CALCULATION
+# ============================================================================
+
+def calculate_ten_god(day_stem: str, target_stem: str) -> str:
+    """
+    Calculate the Ten God relationship between day stem and target stem.
+    Both arguments must be heavenly stems (천간).
+
+    The Ten Gods (십성):
+    - 비견: Same element, same Yin-Yang
+    - 겁재: Same element, different Yin-Yang
+    - 식신: Day stem produces target, same Yin-Yang
+    - 상관: Day stem produces target, different Yin-Yang
+    - 편인: Target produces day stem, same Yin-Yang
+    - 정인: Target produces day stem, different Yin-Yang
+    - 편재: Day stem overcomes target, same Yin-Yang
+    - 정재: Day stem overcomes target, different Yin-Yang
+    - 편관: Target overcomes day stem, same Yin-Yang
+    - 정관: Target overcomes day stem, different Yin-Yang
+    """
+    day_idx = STEM_INDEX.get(day_stem)
+    target_idx = STEM_INDEX.get(target_stem)
+    if day_idx is None or target_idx is None:
+        return '기타'
+    return TEN_GODS[TEN_GOD_TABLE[day_idx][target_idx]]
+
+
+def calculate_branch_ten_god(day_stem: str, branch: str) -> str:
+    """
+    Ten God of an earthly branch (지지) seen from the day stem.
+
+    A branch takes the ten god of its main hidden stem (정기), e.g. 인 -> 갑.
+    """
+    day_idx = STEM_INDEX.get(day_stem)
+    branch_idx = BRANCH_INDEX.get(branch)
+    if day_idx is None or branch_idx is None:
+        return '기타'
+    return TEN_GODS[BRANCH_TEN_GOD_TABLE[day_idx][branch_idx]]
+
+
+# hidden_stems entries for every (day stem, branch), built once. Charts and
+# results share these dicts, so treat them as read-only.
+_HIDDEN_STEM_ENTRIES = [
+    [
+        tuple(
+            {
+                'stem': HEAVENLY_STEMS[stem],
+                'ten_god': TEN_GODS[TEN_GOD_TABLE[day_stem][stem]],
+                'weight': round(days / HIDDEN_STEM_DAYS, 3),
+            }
+            for stem, days in HIDDEN_STEM_TABLE[branch]
+        )
+        for branch in range(12)
+    ]
+    for day_stem in range(10)
+]
+
+
+def calculate_hidden_stems(day_stem: str, branch: str) -> List[Dict]:
+    """
+    Hidden stems (지장간) of a branch with their ten gods.
+
+    Args:
+        day_stem: Day stem (일간) the ten gods are taken from
+        branch: Earthly branch
+
+    Returns:
+        List of {'stem', 'ten_god', 'weight'} from 여기 to 정기; weight is
+        the stem's share of the 30-day month (see HIDDEN_STEMS)
+    """
+    day_idx = STEM_INDEX.get(day_stem)
+    branch_idx = BRANCH_INDEX.get(branch)
+    if day_idx is None or branch_idx is None:
+        return []
+    return [dict(entry) for entry in _HIDDEN_STEM_ENTRIES[day_idx][branch_idx]]
+
+
+def _ten_gods_from_indices(pillar_indices: List[int]) -> Dict[str, Dict]:
+    """Ten gods per position for (year, month, day, hour) pillar indices."""
+    day_stem = pillar_indices[2] % 10
+    ten_gods = {}
+    for position, p in zip(POSITIONS, pillar_indices):
+        if p == UNKNOWN:
+            ten_gods[position] = {
+                'stem': '모름',
+                'branch': '모름',
+                'ten_god': '모름',
+                'element': '모름',
+                'yinyang': '모름',
+                'branch_ten_god': '모름',
+                'hidden_stems': [],
+            }
+            continue
+        stem, branch = p % 10, p % 12
+        ten_gods[position] = {
+            'stem': HEAVENLY_STEMS[stem],
+            'branch': EARTHLY_BRANCHES[branch],
+            'ten_god': TEN_GODS[TEN_GOD_TABLE[day_stem][stem]],
+            'element': ELEMENTS[STEM_ELEMENT_IDX[stem]],
+            'yinyang': YINYANG[STEM_YIN[stem]],
+            'branch_ten_god': TEN_GODS[BRANCH_TEN_GOD_TABLE[day_stem][branch]],
+            'hidden_stems': list(_HIDDEN_STEM_ENTRIES[day_stem][branch]),
+        }
+    return ten_gods
+
+
+def calculate_ten_gods(pillars: Dict[str, Tuple[str, str]]) -> Dict[str, Dict]:
+    """
+    Calculate Ten God relationships for all stems and branches in the chart.
+
+    Args:
+        pillars: Dictionary with year, month, day, hour pillars
+
+    Returns:
+        Dictionary with ten gods for each pillar position
+    """
+    return _ten_gods_from_indices([_pillar_to_index(pillars[pos]) for pos in POSITIONS])
+
+
+# ============================================================================
+# HARMONIES AND CLASHES CALCULATION
+# ============================================================================
+
+def _pillar_to_index(pillar: Tuple[str, str]) -> int:
+    """Convert a (stem, branch) tuple to its 60-cycle index (UNKNOWN for 모름)."""
+    stem, branch = pillar
+    if stem == '모름':
+        return UNKNOWN
+    return pillar_index(STEM_INDEX[stem], BRANCH_INDEX[branch])
+
+
+def find_harmonies_and_clashes(pillars: Dict[str, Tuple[str, str]]) -> Dict[str, List[str]]:
+    """
+    Find all harmonies and clashes in the four pillars.
+    Any extra positions (e.g. 'today') are checked after the natal ones.
+
+    Returns a dictionary with one list per active RELATION_REGISTRY rule:
+    - heavenly_stem_harmony / heavenly_stem_clash: stem pairs (천간합/충)
+    - earthly_branch_six_harmony / earthly_branch_clash: branch pairs (육합/충)
+    - earthly_branch_three_harmony: three harmony groups (삼합)
+    - earthly_branch_half_harmony / _directional_harmony / _hidden_harmony:
+      반합 pairs, 방합 groups, 암합 pairs
+    - earthly_branch_punishment / _self_punishment: 삼형 groups, 자형 pairs
+    - earthly_branch_destruction / _harm / _resentment: 육파, 육해, 원진 pairs
+    """
+    positions = list(pillars)
+    return find_relations(positions, [_pillar_to_index(pillars[pos]) for pos in positions])
+
+
+# ============================================================================
+# TODAY'S PILLAR CALCULATION
+# ============================================================================
+
+def calculate_today_pillar(today_date: str) -> Dict[str, Tuple[str, str]]:
+    """
+    Calculate today's pillar (오늘의 간지).
+
+    Args:
+        today_date: Date in format YYYY-MM-DD
+
+    Returns:
+        Dictionary with day pillar (stem, branch), plus the month (월운) and
+        year (세운) pillars in effect at noon KST
+    """
+    year_p, month_p, day_p = calendar_pillars(*parse_date(today_date))
+    return {
+        'day': index_to_pillar(day_p),
+        'month': index_to_pillar(month_p),
+        'year': index_to_pillar(year_p),
+    }
+
+
+# ============================================================================
+# 대운 (10-YEAR LUCK CYCLES)
+# ============================================================================
+# 대운 step from the month pillar, forward (순행) for a yang-year man or a
+# yin-year woman and backward (역행) otherwise. The first cycle starts at the
+# 대운수: the distance from birth to the next 절 (순행) or the previous 절
+# (역행), counting 3 days as 1 year. Everything here depends only on birth
+# data and gender, so NatalChart keeps it; only the current cycle is per day.
+
+DAEUN_CYCLES = 10
+DAEUN_YEARS = 10
+DAEUN_DIRECTION_LABELS = {1: '순행', -1: '역행'}
+
+# Genders accepted by the API: '남'/'여' (saju) and 'm'/'f' (Slack list records)
+_GENDER_MALE = {'남': True, 'm': True, '여': False, 'f': False}
+
+
+def adjacent_term_minutes(
+    year: int, month: int, day: int, hour_code: int = 12, minute: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    The 절 before and after a birth moment (minute as in solar_term_at).
+
+    Returns:
+        (previous 절, next 절) as minutes since 1900-01-01 00:00 KST; outside
+        the 절입 table the approximate SOLAR_TERMS days (at 00:00) are used
+    """
+    term = solar_term_at(year, month, day, hour_code, minute)
+    if term is not None:
+        stamps = _solar_term_table().stamps
+        if term[0] + 1 < len(stamps):
+            return term[1], stamps[term[0] + 1]
+
+    if day >= _TERM_DAY[month]:
+        prev_year, prev_month = year, month
+    else:
+        prev_year, prev_month = (year, month - 1) if month > 1 else (year - 1, 12)
+    next_year, next_month = (prev_year, prev_month + 1) if prev_month < 12 else (prev_year + 1, 1)
+    prev_day = days_from_civil(prev_year, prev_month, _TERM_DAY[prev_month]) - _CIVIL_1900
+    next_day = days_from_civil(next_year, next_month, _TERM_DAY[next_month]) - _CIVIL_1900
+    return prev_day * 1440, next_day * 1440
+
+
+def daeun_direction(year_p: int, gender: str) -> int:
+    """+1 for 순행, -1 for 역행, 0 when the gender is unknown."""
+    male = _GENDER_MALE.get(gender)
+    if male is None:
+        return 0
+    yang = STEM_YIN[year_p % 10] == 0
+    return 1 if yang == male else -1
+
+
+def daeun_start_age(since_prev: int, until_next: int, direction: int) -> int:
+    """대운수 (1-10) from the minutes to the adjacent 절: 3 days = 1 year, rounded."""
+    distance = until_next if direction > 0 else since_prev
+    return min(DAEUN_YEARS, max(1, (distance + 2160) // 4320))
+
+
+def age_on(birthday: Tuple[int, int, int], today: Tuple[int, int, int]) -> int:
+    """Completed years (만 나이) between two (year, month, day) dates."""
+    return today[0] - birthday[0] - ((today[1], today[2]) < (birthday[1], birthday[2]))
+
+
+def daeun_index(start_age: int, age: int) -> int:
+    """Index of the cycle in effect at the given age, or -1 outside the cycles."""
+    if age < start_age:
+        return -1
+    i = (age - start_age) // DAEUN_YEARS
+    return i if i < DAEUN_CYCLES else -1
+
+
+@lru_cache(maxsize=None)
+def daeun_cycles(month_p: int, day_stem: int, direction: int, start_age: int) -> Tuple[Dict, ...]:
+    """The DAEUN_CYCLES cycle entries (age, pillar, ten god); treat as read-only."""
+    cycles = []
+    for i in range(DAEUN_CYCLES):
+        p = (month_p + direction * (i + 1)) % 60
+        stem, branch = p % 10, p % 12
+        cycles.append({
+            'age': start_age + i * DAEUN_YEARS,
+            'stem': HEAVENLY_STEMS[stem],
+            'branch': EARTHLY_BRANCHES[branch],
+            'stem_element': ELEMENTS[STEM_ELEMENT_IDX[stem]],
+            'branch_element': ELEMENTS[BRANCH_ELEMENT_IDX[branch]],
+            'ten_god': TEN_GODS[TEN_GOD_TABLE[day_stem][stem]],
+        })
+    return tuple(cycles)
+
+
+def _daeun_info(month_p: int, day_stem: int, direction: int, start_age: int, current: int) -> Optional[Dict]:
+    """daeun entry of the fortune data (None when the gender is unknown)."""
+    if direction == 0:
+        return None
+    cycles = [dict(c) for c in daeun_cycles(month_p, day_stem, direction, start_age)]
+    return {
+        'direction': DAEUN_DIRECTION_LABELS[direction],
+        'start_age': start_age,
+        'cycles': cycles,
+        'current': dict(cycles[current], index=current) if current >= 0 else None,
+    }
+
+
+# ============================================================================
+# 오행 STRENGTH (오행 분포 / 신강·신약)
+# ============================================================================
+# Element scores are in 1/30 units: a stem adds HIDDEN_STEM_DAYS to its
+# element and a branch splits the same amount over its 지장간 by days (the
+# 정기 always carries the branch's own BRANCH_ELEMENT). The month branch
+# counts MONTH_BRANCH_FACTOR times (득령). The day master is strong (신강)
+# when 비겁 + 인성 outweigh the rest of the chart (the day stem itself
+# excluded) and weak (신약) in the opposite case; in between it is 중화.
+# Favorable elements follow 억부: a strong chart wants 식상/재성/관성, a
+# weak one 비겁/인성, and a balanced one whatever is below its average.
+# today_affinity scores today's pillar against those, from -100 to 100.
+
+STRENGTH_LABELS = ['신약', '중화', '신강']
+ELEMENT_GROUPS = ['비겁', '식상', '재성', '관성', '인성']
+MONTH_BRANCH_FACTOR = 2
+AFFINITY_SCALE = 100
+
+# 억부 favor per ELEMENT_GROUPS entry for 신약 and 신강 (중화 uses the scores)
+STRENGTH_FAVOR = [
+    [1, -1, -1, -1, 1],
+    [0, 0, 0, 0, 0],
+    [-1, 1, 1, 1, -1],
+]
+
+
+def _build_element_group_table() -> List[List[int]]:
+    """ELEMENT_GROUP_TABLE[day_element][element] -> index into ELEMENT_GROUPS."""
+    table = []
+    for day_el in range(5):
+        row = []
+        for el in range(5):
+            if el == day_el:
+                row.append(0)
+            elif PRODUCES_IDX[day_el] == el:
+                row.append(1)
+            elif OVERCOMES_IDX[day_el] == el:
+                row.append(2)
+            elif OVERCOMES_IDX[el] == day_el:
+                row.append(3)
+            else:
+                row.append(4)
+        table.append(row)
+    return table
+
+
+def _element_weights(pairs) -> List[int]:
+    """Five-element weight vector of (stem index, weight) pairs."""
+    weights = [0] * 5
+    for stem, weight in pairs:
+        weights[STEM_ELEMENT_IDX[stem]] += weight
+    return weights
+
+
+ELEMENT_GROUP_TABLE = _build_element_group_table()
+STEM_ELEMENT_WEIGHTS = [_element_weights([(s, HIDDEN_STEM_DAYS)]) for s in range(10)]
+BRANCH_ELEMENT_WEIGHTS = [_element_weights(HIDDEN_STEM_TABLE[b]) for b in range(12)]
+PILLAR_ELEMENT_WEIGHTS = [
+    [s + b for s, b in zip(STEM_ELEMENT_WEIGHTS[p % 10], BRANCH_ELEMENT_WEIGHTS[p % 12])]
+    for p in range(60)
+]
+
+
+def element_scores(pillar_indices: List[int]) -> List[int]:
+    """Five-element scores (1/30 units) of (year, month, day, hour) pillar indices."""
+    scores = [0] * 5
+    for position, p in enumerate(pillar_indices):
+        if p == UNKNOWN:
+            continue
+        stem_weights = STEM_ELEMENT_WEIGHTS[p % 10]
+        branch_weights = BRANCH_ELEMENT_WEIGHTS[p % 12]
+        factor = MONTH_BRANCH_FACTOR if position == 1 else 1
+        for e in range(5):
+            scores[e] += stem_weights[e] + factor * branch_weights[e]
+    return scores
+
+
+def element_strength(pillar_indices: List[int]) -> Tuple[Tuple[int, ...], int, int, Tuple[int, ...]]:
+    """
+    Strength estimate of a chart.
+
+    Returns:
+        (scores, support, strength, favor): element scores, the 비겁 + 인성
+        score without the day stem, the STRENGTH_LABELS index and a
+        +1/0/-1 favor per element
+    """
+    scores = element_scores(pillar_indices)
+    groups = ELEMENT_GROUP_TABLE[STEM_ELEMENT_IDX[pillar_indices[2] % 10]]
+    total = sum(scores)
+    support = sum(s for s, g in zip(scores, groups) if g in (0, 4)) - HIDDEN_STEM_DAYS
+    rest = total - HIDDEN_STEM_DAYS
+    if 20 * support < 9 * rest:
+        strength = 0
+    elif 20 * support > 11 * rest:
+        strength = 2
+    else:
+        strength = 1
+    if strength == 1:
+        favor = tuple((total > 5 * s) - (total < 5 * s) for s in scores)
+    else:
+        favor = tuple(STRENGTH_FAVOR[strength][g] for g in groups)
+    return tuple(scores), support, strength, favor
+
+
+def today_affinity(favor: Tuple[int, ...], today_p: int) -> int:
+    """Affinity of a chart with today's pillar, from -AFFINITY_SCALE to AFFINITY_SCALE."""
+    dot = sum(f * w for f, w in zip(favor, PILLAR_ELEMENT_WEIGHTS[today_p]))
+    return dot * AFFINITY_SCALE // (2 * HIDDEN_STEM_DAYS)
+
+
+def _element_strength_info(scores: Tuple[int, ...], support: int, strength: int, favor: Tuple[int, ...]) -> Dict:
+    """element_strength entry of the fortune data."""
+    total = sum(scores)
+    return {
+        'distribution': {el: round(100 * s / total, 1) for el, s in zip(ELEMENTS, scores)},
+        'support_ratio': round(support / (total - HIDDEN_STEM_DAYS), 3),
+        'strength': STRENGTH_LABELS[strength],
+        'favorable_elements': [el for el, f in zip(ELEMENTS, favor) if f > 0],
+        'unfavorable_elements': [el for el, f in zip(ELEMENTS, favor) if f < 0],
+    }
+
+
+# ============================================================================
+# 신살 AND 12운성
+# ============================================================================
+# Every branch of the chart (and today's) gets one int code:
+#     bits 0-3    TWELVE_STAGES index of the branch for the day stem
+#     bits 4-7    SHINSAL_STARS flags with the day pillar as base (일지 기준)
+#     bits 8-11   SHINSAL_STARS flags with the year pillar as base (년지 기준)
+# 역마/도화/화개 depend on the base branch's 삼합 group and 공망 on the
+# base pillar's 순 (the two branches its ten-day cycle skips). Both come from
+# SHINSAL_TABLE, so a code is three table reads whatever the number of stars.
+
+SHINSAL_STARS = ['역마', '도화', '화개', '공망']
+SHINSAL_STAGE_MASK = 0x0F
+SHINSAL_DAY_SHIFT = 4
+SHINSAL_YEAR_SHIFT = 8
+SHINSAL_UNKNOWN = -1  # Code of an unknown pillar (모름)
+
+
+def _build_twelve_stage_table() -> List[List[int]]:
+    """TWELVE_STAGE_TABLE[day_stem][branch] -> index into TWELVE_STAGES."""
+    table = []
+    for stem in range(10):
+        start = BRANCH_INDEX[LIFE_STAGE_START[HEAVENLY_STEMS[stem]]]
+        step = -1 if STEM_YIN[stem] else 1
+        table.append([(branch - start) * step % 12 for branch in range(12)])
+    return table
+
+
+def _build_shinsal_table() -> bytes:
+    """SHINSAL_TABLE[base_pillar * 12 + branch] -> SHINSAL_STARS flags."""
+    star_bits = {name: 1 << i for i, name in enumerate(SHINSAL_STARS)}
+    by_branch = [0] * 144
+    for group, stars in SAMHAP_STARS:
+        for base in group:
+            for name, target in stars.items():
+                by_branch[BRANCH_INDEX[base] * 12 + BRANCH_INDEX[target]] |= star_bits[name]
+    table = bytearray(60 * 12)
+    for p in range(60):
+        first = p - p % 10  # first pillar of the 순
+        empty = ((first + 10) % 12, (first + 11) % 12)
+        for branch in range(12):
+            flags = by_branch[p % 12 * 12 + branch]
+            if branch in empty:
+                flags |= star_bits['공망']
+            table[p * 12 + branch] = flags
+    return bytes(table)
+
+
+TWELVE_STAGE_TABLE = _build_twelve_stage_table()
+SHINSAL_TABLE = _build_shinsal_table()
+
+
+def shinsal_code(day_p: int, year_p: int, p: int) -> int:
+    """신살/12운성 code of pillar p's branch in a chart with the given day/year pillars."""
+    if p == UNKNOWN:
+        return SHINSAL_UNKNOWN
+    branch = p % 12
+    return (TWELVE_STAGE_TABLE[day_p % 10][branch]
+            | SHINSAL_TABLE[day_p * 12 + branch] << SHINSAL_DAY_SHIFT
+            | SHINSAL_TABLE[year_p * 12 + branch] << SHINSAL_YEAR_SHIFT)
+
+
+def shinsal_codes(pillar_indices: List[int], today_p: int) -> Dict[str, int]:
+    """Codes for the year/month/day/hour branches and today's branch."""
+    year_p, day_p = pillar_indices[0], pillar_indices[2]
+    codes = {pos: shinsal_code(day_p, year_p, p) for pos, p in zip(POSITIONS, pillar_indices)}
+    codes['today'] = shinsal_code(day_p, year_p, today_p)
+    return codes
+
+
+def decode_shinsal(code: int, stars: Optional[Iterable[str]] = None) -> Tuple[str, List[str]]:
+    """
+    Expand a 신살/12운성 code.
+
+    Args:
+        code: shinsal_code value
+        stars: SHINSAL_STARS to report (None = all)
+
+    Returns:
+        (stage, stars): the TWELVE_STAGES label and the star labels, each
+        tagged with its base ('역마(일지)', '공망(년지)'); ('모름', []) for
+        an unknown pillar
+    """
+    if code == SHINSAL_UNKNOWN:
+        return '모름', []
+    wanted = sum(1 << i for i, name in enumerate(SHINSAL_STARS) if stars is None or name in stars)
+    found = []
+    for shift, base in ((SHINSAL_DAY_SHIFT, '일지'), (SHINSAL_YEAR_SHIFT, '년지')):
+        flags = code >> shift & wanted
+        found.extend(f"{name}({base})" for i, name in enumerate(SHINSAL_STARS) if flags >> i & 1)
+    return TWELVE_STAGES[code & SHINSAL_STAGE_MASK], found
+
+
+# ============================================================================
+# NATAL CHART
+# ============================================================================
+
+_POSITION_RANK = {'year': 0, 'month': 1, 'day': 2, 'hour': 3, 'today': 4}
+
+
+def _relation_rank(entry: Dict) -> Tuple[int, ...]:
+    """Sort key that reproduces find_relations' pair/triple order."""
+    return tuple(_POSITION_RANK[pos] for pos in entry['positions'])
+
+
+class NatalChart:
+    """
+    Everything in a chart that depends only on birth data.
+
+    Pillars, ten gods and natal harmonies/clashes are computed once in
+    __init__; daily_overlay() then only checks the natal x today pairs and
+    the 삼합 triples that include today. Charts hold plain data, so they can
+    be kept in memory (see get_natal_chart) or pickled between runs.
+    Treat the precomputed dicts as read-only; fortune_data() hands out copies
+    (except the shared 지장간 entries in ten_gods, see _HIDDEN_STEM_ENTRIES).
+    """
+
+    __slots__ = (
+        'birthday',
+        'birth_ymd',
+        'hour_code',
+        'pillars',
+        'day_stem',
+        'four_pillars',
+        'ten_gods',
+        'harmonies_clashes',
+        'strength',
+        'element_strength',
+        'shinsal',
+        'term_distance',
+        'exact_time',
+        '_daeun',
+        '_overlays',
+        '_rules',
+    )
+
+    def __init__(self, birthday: str, hour_code: int, birth_time: Optional[str] = None, longitude: Optional[float] = None):
+        """
+        Args:
+            birthday: Birth date in format YYYY-MM-DD
+            hour_code: Hour code (0-11, 12 for unknown)
+            birth_time: Exact Korean clock time of birth (HH:MM); replaces
+                hour_code under the active hour convention (see exact_birth)
+            longitude: Birthplace longitude (default: DEFAULT_BIRTHPLACE)
+        """
+        year, month, day = parse_date(birthday)
+        self.birthday = birthday
+        self.birth_ymd = (year, month, day)
+        minute = None
+        yaja = False
+        self.exact_time = None
+        if birth_time is not None:
+            if longitude is None:
+                longitude = birthplace_longitude()
+            (year, month, day), hour_code, minute, yaja, self.exact_time = exact_birth(
+                year, month, day, birth_time, longitude)
+        self.hour_code = hour_code
+        self.pillars = list(four_pillar_indices(year, month, day, hour_code, minute))
+        if yaja:
+            self.pillars[3] = hour_pillar_index((self.pillars[2] + 1) % 10, 0)
+        self.day_stem = self.pillars[2] % 10
+        self.four_pillars = {pos: _pillar_info(p) for pos, p in zip(POSITIONS, self.pillars)}
+        self.ten_gods = _ten_gods_from_indices(self.pillars)
+        self.harmonies_clashes = find_relations(POSITIONS, self.pillars)
+        self.strength = element_strength(self.pillars)
+        self.element_strength = _element_strength_info(*self.strength)
+        self.shinsal = {pos: shinsal_code(self.pillars[2], self.pillars[0], p) for pos, p in zip(POSITIONS, self.pillars)}
+        prev_term, next_term = adjacent_term_minutes(year, month, day, hour_code, minute)
+        if minute is None:
+            minute = birth_minute(year, month, day, hour_code)
+        self.term_distance = (minute - prev_term, next_term - minute)
+        self._daeun = {}
+        self._overlays = {}
+        self._rules = (_ACTIVE_RULES['pair_mask'], _ACTIVE_RULES['group_mask'])
+
+    def _sync_rules(self) -> None:
+        """Recompute the relation memos if the set_relation_rules toggles changed since they were made."""
+        rules = (_ACTIVE_RULES['pair_mask'], _ACTIVE_RULES['group_mask'])
+        if self._rules != rules:
+            self.harmonies_clashes = find_relations(POSITIONS, self.pillars)
+            self._overlays = {}
+            self._rules = rules
+
+    def overlay_summary(self, p: int) -> Dict:
+        """
+        Compact view of a transit pillar (year, month or day) against the chart.
+
+        There are only 60 pillars, so summaries are cached per chart and
+        shared between days; treat them as read-only.
+        """
+        self._sync_rules()
+        summary = self._overlays.get(p)
+        if summary is None:
+            relations = self.today_relations(p)
+            summary = {
+                'pillar': HEAVENLY_STEMS[p % 10] + EARTHLY_BRANCHES[p % 12],
+                'ten_god': TEN_GODS[relation_ten_god(PILLAR_RELATIONS[self.pillars[2] * 60 + p])],
+                'relations': [
+                    f"{entry['type']}:{'+'.join(pos for pos in entry['positions'] if pos != 'today')}"
+                    for key in _ACTIVE_RULES['keys'] for entry in relations[key]
+                ],
+            }
+            self._overlays[p] = summary
+        return summary
+
+    def daeun(self, gender: str) -> Tuple[int, int]:
+        """(direction, start_age) of the 대운 for the given gender, cached per chart."""
+        cached = self._daeun.get(gender)
+        if cached is None:
+            direction = daeun_direction(self.pillars[0], gender)
+            cached = (direction, daeun_start_age(*self.term_distance, direction))
+            self._daeun[gender] = cached
+        return cached
+
+    def daeun_info(self, gender: str, today_date: str) -> Optional[Dict]:
+        """대운 sequence plus the cycle in effect on today_date."""
+        direction, start_age = self.daeun(gender)
+        age = age_on(self.birth_ymd, parse_date(today_date))
+        return _daeun_info(self.pillars[1], self.day_stem, direction, start_age, daeun_index(start_age, age))
+
+    def today_relations(self, today_p: int) -> Dict[str, List[Dict]]:
+        """Relations that involve today's pillar only (natal x today pairs and triples)."""
+        result = _empty_relations()
+        pair_mask, group_mask = _ACTIVE_RULES['pair_mask'], _ACTIVE_RULES['group_mask']
+        entries = [(pos, p) for pos, p in zip(POSITIONS, self.pillars) if p != UNKNOWN]
+
+        for pos, p in entries:
+            bits = PAIR_RULE_BITS[p * 60 + today_p] & pair_mask
+            if bits:
+                _emit_pair(result, bits, pos, p, 'today', today_p)
+
+        if group_mask:
+            today_branch = today_p % 12
+            for (pos1, p1), (pos2, p2) in combinations(entries, 2):
+                bits = GROUP_RULE_BITS[(p1 % 12 * 12 + p2 % 12) * 12 + today_branch] & group_mask
+                if bits:
+                    _emit_group(result, bits, [pos1, pos2, 'today'], [p1, p2, today_p])
+
+        return result
+
+    def today_interactions(self, today_p: int) -> Dict[str, List[Dict]]:
+        """find_harmonies_and_clashes over the natal pillars plus 'today'."""
+        self._sync_rules()
+        today_only = self.today_relations(today_p)
+        interactions = {}
+        for key in _ACTIVE_RULES['keys']:
+            natal, today = self.harmonies_clashes[key], today_only[key]
+            interactions[key] = sorted(natal + today, key=_relation_rank) if today else list(natal)
+        return interactions
+
+    def daily_overlay(self, today_p: int) -> Tuple[Dict[str, str], Dict[str, List[Dict]]]:
+        """
+        Overlay today's pillar on the chart.
+
+        Args:
+            today_p: Today's 60-cycle pillar index
+
+        Returns:
+            Tuple of (today_pillar info, today_interactions)
+        """
+        return _today_info(self.pillars[2], today_p), self.today_interactions(today_p)
+
+    def fortune_data(self, gender: str, today_date: str, today_p: int) -> Dict:
+        """calculate_fortune_data result for this chart on the given day."""
+        self._sync_rules()
+        data = _assemble_fortune_data(
+            self.birthday, gender, self.hour_code, today_date, self.pillars[2],
+            {pos: dict(info) for pos, info in self.four_pillars.items()},
+            {pos: _copy_ten_god_entry(info) for pos, info in self.ten_gods.items()},
+            {key: list(items) for key, items in self.harmonies_clashes.items()},
+            today_p,
+            self.today_interactions(today_p),
+            _copy_element_strength(self.element_strength),
+            today_affinity(self.strength[3], today_p),
+            dict(self.shinsal, today=shinsal_code(self.pillars[2], self.pillars[0], today_p)),
+            self.daeun_info(gender, today_date),
+        )
+        if self.exact_time is not None:
+            data['input']['exact_birth_time'] = dict(self.exact_time)
+        return data
+
+
+def _copy_element_strength(info: Dict) -> Dict:
+    """Copy of an element_strength entry."""
+    return {
+        **info,
+        'distribution': dict(info['distribution']),
+        'favorable_elements': list(info['favorable_elements']),
+        'unfavorable_elements': list(info['unfavorable_elements']),
+    }
+
+
+def _copy_ten_god_entry(info: Dict) -> Dict:
+    """Copy of a ten_gods entry; the hidden_stems entries themselves are shared."""
+    entry = dict(info)
+    entry['hidden_stems'] = list(info['hidden_stems'])
+    return entry
+
+
+@lru_cache(maxsize=4096)
+def get_natal_chart(
+    birthday: str, hour_code: int, birth_time: Optional[str] = None, longitude: Optional[float] = None
+) -> NatalChart:
+    """Cached NatalChart for (birthday, hour_code[, birth_time, longitude])."""
+    return NatalChart(birthday, hour_code, birth_time, longitude)
+
+
+# ============================================================================
+# TIMELINE (세운/월운/일진)
+# ============================================================================
+# Streams pillars over a date range for weekly/monthly posts. Dates advance
+# incrementally and the pillars come from the pillar calendar's day bytes,
+# so a year costs a few hundred byte reads; per-person summaries come from
+# NatalChart's 60-entry overlay cache. Nothing is accumulated: memory stays
+# bounded by the roster.
+
+def pillar_timeline(start_date: str, end_date: str) -> Iterator[Tuple[str, int, int, int]]:
+    """
+    Yield (date, year pillar, month pillar, day pillar) for every day.
+
+    Args:
+        start_date: First day in format YYYY-MM-DD
+        end_date: Last day (inclusive) in format YYYY-MM-DD
+
+    Year and month pillars are those in effect at noon KST (세운/월운).
+    Inside the pillar calendar each day is one byte read; days outside it
+    use calendar_pillars' arithmetic.
+    """
+    year, month, day = parse_date(start_date)
+    ordinal = days_from_civil(year, month, day)
+    end = days_from_civil(*parse_date(end_date))
+    month_days = _MONTH_DAYS[month] + (month == 2 and _is_leap_year(year))
+
+    calendar = _pillar_calendar()
+    days = calendar.days
+    i = ordinal - calendar.first_day
+    in_calendar = False
+
+    while ordinal <= end:
+        if 0 <= i < len(days):
+            code = days[i]
+            if in_calendar:
+                day_p = code & CAL_PILLAR_MASK
+                if code & CAL_TERM:
+                    month_p = month_p + 1 if month_p < 59 else 0
+                    if code & CAL_NEW_YEAR:
+                        year_p = year_p + 1 if year_p < 59 else 0
+            else:
+                year_p, month_p, day_p = calendar.pillars(year, month, day)
+                in_calendar = True
+        else:
+            year_p, month_p, day_p = calendar_pillars(year, month, day)
+            in_calendar = False
+
+        yield '%04d-%02d-%02d' % (year, month, day), year_p, month_p, day_p
+
+        ordinal += 1
+        i += 1
+        day += 1
+        if day > month_days:
+            day = 1
+            month += 1
+            if month > 12:
+                month = 1
+                year += 1
+            month_days = _MONTH_DAYS[month] + (month == 2 and _is_leap_year(year))
+
+
+def fortune_timeline(
+    charts: Iterable[NatalChart],
+    start_date: str,
+    end_date: str,
+) -> Iterator[Dict]:
+    """
+    Yield one entry per day with the 세운/월운/일진 and per-person summaries.
+
+    Args:
+        charts: Natal charts (see get_natal_chart), in output order
+        start_date: First day in format YYYY-MM-DD
+        end_date: Last day (inclusive) in format YYYY-MM-DD
+
+    Yields:
+        {'date', 'year_pillar', 'month_pillar', 'day_pillar',
+         'people': [{'year': summary, 'month': summary, 'day': summary}, ...]}
+        where each summary is NatalChart.overlay_summary() (shared, read-only)
+    """
+    charts = list(charts)
+    for day_str, year_p, month_p, day_p in pillar_timeline(start_date, end_date):
+        yield {
+            'date': day_str,
+            'year_pillar': HEAVENLY_STEMS[year_p % 10] + EARTHLY_BRANCHES[year_p % 12],
+            'month_pillar': HEAVENLY_STEMS[month_p % 10] + EARTHLY_BRANCHES[month_p % 12],
+            'day_pillar': HEAVENLY_STEMS[day_p % 10] + EARTHLY_BRANCHES[day_p % 12],
+            'people': [
+                {
+                    'year': chart.overlay_summary(year_p),
+                    'month': chart.overlay_summary(month_p),
+                    'day': chart.overlay_summary(day_p),
+                }
+                for chart in charts
+            ],
+        }
+
+
+# ============================================================================
+# MAIN CALCULATION FUNCTION
+# ============================================================================
+
+def _pillar_info(p: int) -> Dict[str, str]:
+    """Expanded four_pillars entry for a pillar index."""
+    if p == UNKNOWN:
+        return {
+            'stem': '모름',
+            'branch': '모름',
+            'stem_element': '모름',
+            'branch_element': '모름',
+            'stem_yinyang': '모름',
+        }
+    stem, branch = p % 10, p % 12
+    return {
+        'stem': HEAVENLY_STEMS[stem],
+        'branch': EARTHLY_BRANCHES[branch],
+        'stem_element': ELEMENTS[STEM_ELEMENT_IDX[stem]],
+        'branch_element': ELEMENTS[BRANCH_ELEMENT_IDX[branch]],
+        'stem_yinyang': YINYANG[STEM_YIN[stem]],
+    }
+
+
+def _validate_birth_time(birth_time: str, birthplace) -> Tuple[Optional[float], Optional[str]]:
+    """(birthplace longitude, error message) for an exact birth time and place."""
+    try:
+        parse_birth_time(birth_time)
+    except ValueError:
+        return None, 'Invalid birth time. Use HH:MM'
+    try:
+        return birthplace_longitude(birthplace), None
+    except ValueError as e:
+        return None, str(e)
+
+
+def calculate_fortune_data(
+    birthday: str,
+    gender: str,
+    time_code: str,
+    today_date: str,
+    birth_time: Optional[str] = None,
+    birthplace=None,
+) -> Dict:
+    """
+    Calculate comprehensive fortune data based on birth date and time.
+
+    Args:
+        birthday: Birth date in format YYYY-MM-DD
+        gender: Gender ('남' or '여')
+        time_code: Time code as string ('0'-'12')
+        today_date: Today's date in format YYYY-MM-DD
+        birth_time: Optional exact birth time (HH:MM, Korean clock time);
+            the hour code and day pillar then follow the hour convention
+            (see set_hour_convention) and time_code is ignored
+        birthplace: BIRTHPLACE_LONGITUDES name or longitude for birth_time
+            (default: DEFAULT_BIRTHPLACE)
+
+    Returns:
+        Dictionary containing all calculated fortune data
+    """
+    # Validate inputs
+    try:
+        parse_date(birthday)
+        today_ymd = parse_date(today_date)
+    except ValueError:
+        return {'error': 'Invalid date format. Use YYYY-MM-DD'}
+
+    longitude = None
+    if birth_time is not None:
+        longitude, error = _validate_birth_time(birth_time, birthplace)
+        if error:
+            return {'error': error}
+        hour_code = 12
+    else:
+        hour_code = int(time_code)
+        if hour_code < 0 or hour_code > 12:
+            return {'error': 'Invalid hour code. Use 0-12'}
+
+    # Birth data once, then today's pillar on top of it
+    chart = get_natal_chart(birthday, hour_code, birth_time, longitude)
+    today_p = day_pillar_index(*today_ymd)
+    return chart.fortune_data(gender, today_date, today_p)
+
+
+def _today_info(day_p: int, today_p: int) -> Dict[str, str]:
+    """today_pillar entry: today's pillar plus its stem/branch ten gods against the day stem."""
+    today_info = _pillar_info(today_p)
+    today_info['ten_god_with_day_stem'] = TEN_GODS[relation_ten_god(PILLAR_RELATIONS[day_p * 60 + today_p])]
+    today_info['branch_ten_god_with_day_stem'] = TEN_GODS[BRANCH_TEN_GOD_TABLE[day_p % 10][today_p % 12]]
+    return today_info
+
+
+def _assemble_fortune_data(
+    birthday: str,
+    gender: str,
+    hour_code: int,
+    today_date: str,
+    day_p: int,
+    four_pillars: Dict[str, Dict],
+    ten_gods: Dict[str, Dict],
+    harmonies_clashes: Dict[str, List[Dict]],
+    today_p: int,
+    today_interactions: Dict[str, List[Dict]],
+    element_strength_info: Dict,
+    affinity: int,
+    shinsal: Dict[str, int],
+    daeun: Optional[Dict] = None,
+) -> Dict:
+    """Build the calculate_fortune_data result dict from its sections."""
+    day_stem = day_p % 10
+    return {
+        'input': {
+            'birthday': birthday,
+            'gender': gender,
+            'time_code': hour_code,
+            'time_name': HOUR_CODES[hour_code][0],
+            'today_date': today_date,
+        },
+        'four_pillars': four_pillars,
+        'ten_gods': ten_gods,
+        'harmonies_and_clashes': harmonies_clashes,
+        'today_pillar': _today_info(day_p, today_p),
+        'today_interactions': today_interactions,
+        'day_stem_info': {
+            'stem': HEAVENLY_STEMS[day_stem],
+            'element': ELEMENTS[STEM_ELEMENT_IDX[day_stem]],
+            'yinyang': YINYANG[STEM_YIN[day_stem]],
+        },
+        'daeun': daeun,
+        'element_strength': element_strength_info,
+        'today_affinity': affinity,
+        'shinsal': shinsal,
+    }
+
+
+# ============================================================================
+# BATCH (VECTORIZED) CALCULATION
+# ============================================================================
+# calculate_fortune_data_batch computes the same data as calculate_fortune_data
+# for a whole roster with NumPy array operations. calculate_fortune_data stays
+# the reference implementation; the batch path must agree with it row by row.
+
+# Positions of the batch columns: the four natal pillars plus today
+BATCH_POSITIONS = POSITIONS + ['today']
+BATCH_PAIRS = list(combinations(range(5), 2))
+BATCH_TRIPLES = list(combinations(range(5), 3))
+
+
+def _numpy():
+    """Import numpy lazily so the scalar API works without it."""
+    try:
+        import numpy as np
+    except ImportError:
+        raise RuntimeError("numpy package not installed. Run: pip install numpy")
+    return np
+
+
+@lru_cache(maxsize=None)
+def _np_tables() -> Dict:
+    """NumPy copies of the integer engine tables (built on first use)."""
+    np = _numpy()
+    return {
+        'ten_god': np.array(TEN_GOD_TABLE, dtype=np.int8),
+        'branch_ten_god': np.array(BRANCH_TEN_GOD_TABLE, dtype=np.int8),
+        'hidden_stems': np.array([[s for s, _ in row] + [-1] * (3 - len(row)) for row in HIDDEN_STEM_TABLE],
+                                 dtype=np.int8),
+        'hidden_days': np.array([[d for _, d in row] + [0] * (3 - len(row)) for row in HIDDEN_STEM_TABLE],
+                                dtype=np.int8),
+        'relations': pillar_relation_matrix(),
+        'pair_rules': np.array(PAIR_RULE_BITS, dtype=np.uint16).reshape(60, 60),
+        'group_rules': np.frombuffer(GROUP_RULE_BITS, dtype=np.uint8).reshape(12, 12, 12),
+        'term_day': np.array(_TERM_DAY, dtype=np.int64),
+        'hour_minute': np.array(HOUR_CODE_MINUTE, dtype=np.int64),
+        'solar_terms': np.asarray(_solar_term_table().stamps, dtype=np.int64),
+        'cal_days': np.frombuffer(_pillar_calendar().days, dtype=np.uint8),
+        'cal_year_pillars': np.frombuffer(_pillar_calendar().year_pillars, dtype=np.uint8).astype(np.int64),
+        'cal_month_pillars': np.frombuffer(_pillar_calendar().month_pillars, dtype=np.uint8).astype(np.int64),
+        'cal_term_days': np.frombuffer(_pillar_calendar().term_days, dtype=np.uint8),
+        'stem_element': np.array(STEM_ELEMENT_IDX, dtype=np.int8),
+        'stem_elements': np.array(STEM_ELEMENT_WEIGHTS, dtype=np.int16),
+        'branch_elements': np.array(BRANCH_ELEMENT_WEIGHTS, dtype=np.int16),
+        'pillar_elements': np.array(PILLAR_ELEMENT_WEIGHTS, dtype=np.int16),
+        'element_group': np.array(ELEMENT_GROUP_TABLE, dtype=np.int8),
+        'strength_favor': np.array(STRENGTH_FAVOR, dtype=np.int8),
+        'twelve_stage': np.array(TWELVE_STAGE_TABLE, dtype=np.int16),
+        'shinsal': np.frombuffer(SHINSAL_TABLE, dtype=np.uint8).reshape(60, 12).astype(np.int16),
+    }
+
+
+def days_from_civil_batch(years, months, days):
+    """Vectorized days_from_civil (int64 days since 1970-01-01)."""
+    np = _numpy()
+    years = np.asarray(years, dtype=np.int64)
+    months = np.asarray(months, dtype=np.int64)
+    early = months <= 2
+    years = years - early
+    months = months + 12 * early
+    return (365 * years + years // 4 - years // 100 + years // 400
+            + (153 * months - 457) // 5 + np.asarray(days, dtype=np.int64) - 719469)
+
+
+# Character columns of YYYY-MM-DD that must be digits
+_DATE_DIGIT_COLUMNS = [0, 1, 2, 3, 5, 6, 8, 9]
+
+
+def _parse_dates_np(dates: List[str]):
+    """
+    Parse YYYY-MM-DD strings to datetime64[D] with the rules of parse_date;
+    anything else (including forms NumPy itself accepts, like '1990-05')
+    becomes NaT.
+    """
+    np = _numpy()
+    text = np.array(list(dates), dtype=str)
+    n = len(text)
+    width = text.dtype.itemsize // 4
+    if n == 0 or width < 10:
+        return np.full(n, np.datetime64('NaT'), dtype='datetime64[D]')
+
+    # UTF-32 code points, one row per string (zero-padded to the widest)
+    codes = text.view(np.uint32).reshape(n, width).astype(np.int64)
+    digits = codes[:, _DATE_DIGIT_COLUMNS] - 48
+    ok = ((digits >= 0) & (digits <= 9)).all(axis=1) & (codes[:, 4] == 45) & (codes[:, 7] == 45)
+    if width > 10:
+        ok &= codes[:, 10] == 0
+
+    years = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    months = digits[:, 4] * 10 + digits[:, 5]
+    days = digits[:, 6] * 10 + digits[:, 7]
+    leap = (years % 4 == 0) & ((years % 100 != 0) | (years % 400 == 0))
+    month_days = np.array(_MONTH_DAYS, dtype=np.int64)[np.clip(months, 0, 12)] + ((months == 2) & leap)
+    ok &= (years >= 1) & (months >= 1) & (months <= 12) & (days >= 1) & (days <= month_days)
+
+    day_numbers = days_from_civil_batch(years, np.where(ok, months, 1), days)
+    return np.where(ok, day_numbers.astype('datetime64[D]'), np.datetime64('NaT'))
+
+
+def day_pillar_indices_batch(dates):
+    """
+    Vectorized day_pillar_index.
 
+    Args:
+        dates: datetime64 array, or YYYY-MM-DD strings
 
-# ============================================================================
-# CORE PILLAR CALCULATIONS
-# ============================================================================
+    Returns:
+        int16 array of day pillar indices (UNKNOWN for invalid dates)
+    """
+    np = _numpy()
+    dates = np.asarray(dates)
+    if dates.dtype.kind != 'M':
+        dates = _parse_dates_np(dates.tolist())
+    dates = dates.astype('datetime64[D]')
+    pillars = (dates.astype(np.int64) - _CIVIL_1900 + 10) % 60
+    return np.where(np.isnat(dates), UNKNOWN, pillars).astype(np.int16)
 
-def calculate_day_pillar(date_str: str) -> Tuple[str, str]:
+
+def four_pillar_indices_batch(birthdays, hour_codes):
     """
-    Calculate Day Pillar (일주) using the Julian Day Number algorithm.
-    Reference: January 1, 1900 is 甲子(갑자) - index 0 in 60-cycle.
+    Vectorized four_pillar_indices.
 
     Args:
-        date_str: Date in format YYYY-MM-DD
+        birthdays: datetime64[D] array
+        hour_codes: int array (0-12)
 
     Returns:
-        Tuple of (stem, branch)
+        int16 array of shape (N, 4): year, month, day, hour pillar indices
+        (hour is UNKNOWN where hour_code == 12)
     """
-    # Parse the date
-    year, month, day = map(int, date_str.split('-'))
+    np = _numpy()
+    tables = _np_tables()
+    hour_codes = np.asarray(hour_codes, dtype=np.int64)
+
+    years = birthdays.astype('datetime64[Y]').astype(np.int64) + 1970
+    month_start = birthdays.astype('datetime64[M]')
+    months = month_start.astype(np.int64) % 12 + 1
+    days = (birthdays - month_start).astype(np.int64) + 1
+
+    # Approximate boundaries, used outside the exact 절입 table
+    before_ipchun = (months < 2) | ((months == 2) & (days < _TERM_DAY[2]))
+    year_p = (years - before_ipchun - 1984) % 60
+    month_branch = (months - (days < tables['term_day'][months])) % 12
+    month_stem = month_stem_index(year_p % 10, month_branch)
+    month_p = (6 * month_stem - 5 * month_branch) % 60
+
+    # datetime64[D] counts days from 1970-01-01
+    days_1900 = birthdays.astype(np.int64) - _CIVIL_1900
+    day_p = (days_1900 + 10) % 60
+
+    # Exact 절입 table (see year_month_pillar_indices)
+    table = _solar_term_table()
+    minutes = days_1900 * 1440 + tables['hour_minute'][hour_codes]
+    k = np.searchsorted(tables['solar_terms'], minutes, side='right') - 1
+    covered = (k >= 0) & (years >= table.first_year) & (years <= table.last_year)
+    k = np.maximum(k, 0)
+    year_p = np.where(covered, (table.first_year + k // 12 - (k % 12 == 0) - 1984) % 60, year_p)
+    month_p = np.where(covered, (table.month_base + k) % 60, month_p)
+
+    hour_stem = ((day_p % 10) * 2 + hour_codes) % 10
+    hour_p = np.where(hour_codes == 12, UNKNOWN, (6 * hour_stem - 5 * hour_codes) % 60)
+
+    return np.stack([year_p, month_p, day_p, hour_p], axis=1).astype(np.int16)
+
+
+def calendar_pillars_batch(dates):
+    """
+    Vectorized calendar_pillars.
+
+    Args:
+        dates: datetime64[D] array (valid dates only)
 
-    # Reference: Jan 1, 1900 is 갑자 (index 0)
-    reference_date = datetime(1900, 1, 1)
-    target_date = datetime(year, month, day)
+    Returns:
+        int16 array of shape (N, 3): year, month, day pillar indices at noon KST
+    """
+    np = _numpy()
+    tables = _np_tables()
+    calendar = _pillar_calendar()
+    dates = np.asarray(dates, dtype='datetime64[D]')
+
+    years = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+    month_start = dates.astype('datetime64[M]')
+    months = month_start.astype(np.int64) % 12 + 1
+    days = (dates - month_start).astype(np.int64) + 1
+    inside = (years >= calendar.first_year) & (years <= calendar.last_year)
+
+    m = np.where(inside, (years - calendar.first_year) * 12 + months - 1, 0)
+    after_term = days >= tables['cal_term_days'][m]
+    year_p = (tables['cal_year_pillars'][m] + (after_term & (months == 2))) % 60
+    month_p = (tables['cal_month_pillars'][m] + after_term) % 60
+    i = np.where(inside, dates.astype(np.int64) - calendar.first_day, 0)
+    day_p = tables['cal_days'][i] & CAL_PILLAR_MASK
+    pillars = np.stack([year_p, month_p, day_p], axis=1).astype(np.int16)
+
+    if not inside.all():
+        outside = four_pillar_indices_batch(dates[~inside], np.full((~inside).sum(), 12))
+        pillars[~inside] = outside[:, :3]
+    return pillars
+
+
+def term_distances_batch(birthdays, hour_codes):
+    """
+    Vectorized adjacent_term_minutes, as distances.
 
-    # Calculate days difference
-    days_diff = (target_date - reference_date).days
+    Returns:
+        (since_prev, until_next): int64 arrays of minutes from the previous 절
+        to birth and from birth to the next 절
+    """
+    np = _numpy()
+    tables = _np_tables()
+    stamps = tables['solar_terms']
+    hour_codes = np.asarray(hour_codes, dtype=np.int64)
+
+    month_start = birthdays.astype('datetime64[M]')
+    months = month_start.astype(np.int64) % 12 + 1
+    days = (birthdays - month_start).astype(np.int64) + 1
+    days_1900 = birthdays.astype(np.int64) - _CIVIL_1900
+    minutes = days_1900 * 1440 + tables['hour_minute'][hour_codes]
+
+    # Approximate 절 days (00:00), used outside the exact 절입 table
+    prev_month = np.where(days >= tables['term_day'][months], month_start, month_start - 1)
+    next_month = prev_month + 1
+    epoch = np.datetime64(_CIVIL_1900, 'D')
+
+    def term_minutes(month):
+        number = month.astype(np.int64) % 12 + 1
+        day = month.astype('datetime64[D]') + (tables['term_day'][number] - 1)
+        return (day - epoch).astype(np.int64) * 1440
+
+    prev_term, next_term = term_minutes(prev_month), term_minutes(next_month)
+
+    table = _solar_term_table()
+    years = birthdays.astype('datetime64[Y]').astype(np.int64) + 1970
+    k = np.searchsorted(stamps, minutes, side='right') - 1
+    covered = (k >= 0) & (k + 1 < len(stamps)) & (years >= table.first_year) & (years <= table.last_year)
+    k = np.clip(k, 0, len(stamps) - 2)
+    prev_term = np.where(covered, stamps[k], prev_term)
+    next_term = np.where(covered, stamps[k + 1], next_term)
+    return minutes - prev_term, next_term - minutes
+
+
+def daeun_batch(pillars, since_prev, until_next, genders, birthdays, today):
+    """
+    Vectorized 대운 per row.
 
-    # January 1, 1900 is 甲戌(갑술) - index 10 in 60-cycle
-    cycle_index = (days_diff + 10) % 60
+    Returns:
+        (direction, start_age, current): int8 arrays; direction is 0 where the
+        gender is unknown and current is -1 outside the cycles
+    """
+    np = _numpy()
+    male = np.array([_GENDER_MALE.get(g, -1) for g in genders], dtype=np.int8)
+    yang = np.array(STEM_YIN, dtype=np.int8)[pillars[:, 0] % 10] == 0
+    direction = np.where(male < 0, 0, np.where(yang == (male == 1), 1, -1))
 
-    stem_index = cycle_index % 10
-    branch_index = cycle_index % 12
+    distance = np.where(direction > 0, until_next, since_prev)
+    start_age = np.clip((distance + 2160) // 4320, 1, DAEUN_YEARS)
 
-    stem = index_to_stem(stem_index)
-    branch = index_to_branch(branch_index)
+    def ymd(d):
+        month_start = d.astype('datetime64[M]')
+        return (d.astype('datetime64[Y]').astype(np.int64) + 1970,
+                month_start.astype(np.int64) % 12 + 1,
+                (d - month_start).astype(np.int64) + 1)
 
-    return stem, branch
+    by, bm, bd = ymd(birthdays)
+    ty, tm, td = ymd(np.datetime64(today, 'D'))
+    age = ty - by - ((tm < bm) | ((tm == bm) & (td < bd)))
+    current = (age - start_age) // DAEUN_YEARS
+    current = np.where((age >= start_age) & (current < DAEUN_CYCLES), current, -1)
+    return direction.astype(np.int8), start_age.astype(np.int8), current.astype(np.int8)
 
 
-def calculate_year_pillar(date_str: str) -> Tuple[str, str]:
+def pair_relations_batch(pillars):
     """
-    Calculate Year Pillar (년주).
-    The year changes at 입춘 (Start of Spring, ~Feb 4).
-    If the birth date is before 입춘, use the previous year.
+    Registry rule bits for every pair and triple of columns.
 
     Args:
-        date_str: Date in format YYYY-MM-DD
+        pillars: int array of shape (N, K) with pillar indices (UNKNOWN allowed)
 
     Returns:
-        Tuple of (stem, branch)
+        (pair_codes, group_codes): uint16 array (N, K*(K-1)/2) of PAIR_RULES
+        bits per column pair, and uint8 array (N, K*(K-1)*(K-2)/6) of
+        GROUP_RULES bits per column triple, both in combinations() order.
+        All rules are reported; toggles apply when the codes are expanded.
     """
-    year, month, day = map(int, date_str.split('-'))
-
-    # If date is before Feb 4 (입춘), use previous year
-    if month < 2 or (month == 2 and day < 4):
-        year -= 1
+    np = _numpy()
+    tables = _np_tables()
+    pillars = np.asarray(pillars)
+    k = pillars.shape[1]
+    known = pillars != UNKNOWN
+    safe = np.where(known, pillars, 0)
+    branches = safe % 12
+
+    pairs = list(combinations(range(k), 2))
+    a = [i for i, _ in pairs]
+    b = [j for _, j in pairs]
+    pair_codes = tables['pair_rules'][safe[:, a], safe[:, b]]
+    pair_codes = np.where(known[:, a] & known[:, b], pair_codes, 0).astype(np.uint16)
+
+    triples = list(combinations(range(k), 3))
+    a = [i for i, _, _ in triples]
+    b = [j for _, j, _ in triples]
+    c = [l for _, _, l in triples]
+    group_codes = tables['group_rules'][branches[:, a], branches[:, b], branches[:, c]]
+    group_codes = np.where(known[:, a] & known[:, b] & known[:, c], group_codes, 0).astype(np.uint8)
+    return pair_codes, group_codes
+
+
+def hidden_stems_batch(pillars):
+    """
+    Vectorized 지장간 for every pillar column.
 
-    # Calculate the day pillar for Jan 1 of that year
-    jan_1_str = f"{year}-01-01"
-    ref_stem, _ = calculate_day_pillar("1900-01-01")  # Get reference
+    Args:
+        pillars: int array of shape (N, K) with pillar indices (UNKNOWN allowed);
+            column 2 is the day pillar when K >= 3
 
-    # The year stem cycles every 10 years
-    # We need to find what stem corresponds to this year
-    # Use a known reference: 1900 is 庚子 (경자)
-    # Actually, let's use the lunar new year day to get the year pillar
+    Returns:
+        (stems, days, ten_gods): int8 arrays of shape (N, K, 3) in
+        HIDDEN_STEMS order, padded with -1 (days 0) for two-stem branches
+        and unknown pillars; ten gods are seen from the day stem
+    """
+    np = _numpy()
+    tables = _np_tables()
+    pillars = np.asarray(pillars)
+    known = (pillars != UNKNOWN)[:, :, None]
+    branches = np.where(pillars != UNKNOWN, pillars, 0) % 12
+    stems = np.where(known, tables['hidden_stems'][branches], -1)
+    days = np.where(known, tables['hidden_days'][branches], 0)
+    day_stems = (pillars[:, 2] % 10)[:, None, None]
+    ten_gods = np.where(stems >= 0, tables['ten_god'][day_stems, np.maximum(stems, 0)], -1)
+    return stems.astype(np.int8), days.astype(np.int8), ten_gods.astype(np.int8)
+
+
+def element_strength_batch(pillars):
+    """
+    Vectorized element_strength.
 
-    # Alternative: Calculate from a known reference year
-    # 1984-02-04 was 甲子 year (입춘)
-    reference_year = 1984
-    reference_stem_idx = 0  # 갑
-    reference_branch_idx = 0  # 자
+    Args:
+        pillars: int array of shape (N, 4) with year/month/day/hour pillar
+            indices (UNKNOWN allowed except for the day pillar)
 
-    years_from_ref = year - reference_year
+    Returns:
+        (scores, support, strength, favor): int16 (N, 5), int16 (N,),
+        int8 (N,) STRENGTH_LABELS index and int8 (N, 5)
+    """
+    np = _numpy()
+    tables = _np_tables()
+    pillars = np.asarray(pillars)
+    known = pillars != UNKNOWN
+    safe = np.where(known, pillars, 0)
+    factor = np.ones(pillars.shape[1], dtype=np.int16)
+    factor[1] = MONTH_BRANCH_FACTOR
+    weights = tables['stem_elements'][safe % 10] + tables['branch_elements'][safe % 12] * factor[None, :, None]
+    scores = np.where(known[:, :, None], weights, 0).sum(axis=1)
+
+    groups = tables['element_group'][tables['stem_element'][safe[:, 2] % 10]]
+    total = scores.sum(axis=1)
+    support = np.where((groups == 0) | (groups == 4), scores, 0).sum(axis=1) - HIDDEN_STEM_DAYS
+    rest = total - HIDDEN_STEM_DAYS
+    strength = np.where(20 * support < 9 * rest, 0, np.where(20 * support > 11 * rest, 2, 1))
+
+    balanced = np.sign(total[:, None] - 5 * scores)
+    favor = np.where((strength == 1)[:, None], balanced, tables['strength_favor'][strength[:, None], groups])
+    return scores.astype(np.int16), support.astype(np.int16), strength.astype(np.int8), favor.astype(np.int8)
+
+
+def today_affinity_batch(favor, today_p: int):
+    """Vectorized today_affinity for (N, 5) favor rows against one pillar (int16 (N,))."""
+    np = _numpy()
+    dot = (np.asarray(favor, dtype=np.int64) * _np_tables()['pillar_elements'][today_p]).sum(axis=1)
+    return (dot * AFFINITY_SCALE // (2 * HIDDEN_STEM_DAYS)).astype(np.int16)
+
+
+def affinity_ranking(affinity, valid=None):
+    """
+    Row indices ordered by today_affinity, best first (ties keep row order).
 
-    stem_idx = (reference_stem_idx + years_from_ref) % 10
-    branch_idx = (reference_branch_idx + years_from_ref) % 12
+    Rows where valid is False are left out.
+    """
+    np = _numpy()
+    affinity = np.asarray(affinity)
+    order = np.argsort(-affinity.astype(np.int32), kind='stable')
+    if valid is not None:
+        order = order[np.asarray(valid)[order]]
+    return order
 
-    stem = index_to_stem(stem_idx)
-    branch = index_to_branch(branch_idx)
 
-    return stem, branch
+def shinsal_codes_batch(pillars):
+    """
+    Vectorized shinsal_code for every column.
 
+    Args:
+        pillars: int array of shape (N, K) with pillar indices, year in
+            column 0 and day in column 2 (UNKNOWN allowed elsewhere)
 
-def calculate_month_pillar(year: int, month: int, day: int, year_stem: str) -> Tuple[str, str]:
+    Returns:
+        int16 array (N, K) of codes (SHINSAL_UNKNOWN for unknown pillars)
     """
-    Calculate Month Pillar (월주).
-    The month branch is determined by solar terms (절기).
-    The month stem follows a pattern based on the year stem.
+    np = _numpy()
+    tables = _np_tables()
+    pillars = np.asarray(pillars)
+    known = pillars != UNKNOWN
+    branches = np.where(known, pillars, 0) % 12
+    day_p, year_p = pillars[:, 2:3], pillars[:, 0:1]
+    codes = (tables['twelve_stage'][day_p % 10, branches]
+             | tables['shinsal'][day_p, branches] << SHINSAL_DAY_SHIFT
+             | tables['shinsal'][year_p, branches] << SHINSAL_YEAR_SHIFT)
+    return np.where(known, codes, SHINSAL_UNKNOWN).astype(np.int16)
+
+
+def calculate_fortune_data_batch(
+    birthdays: List[str],
+    time_codes: List,
+    today_date: str,
+    genders: Optional[List[str]] = None,
+    as_dicts: bool = False,
+    as_results: bool = False,
+    birth_times: Optional[List[Optional[str]]] = None,
+    birthplaces: Optional[List] = None,
+):
+    """
+    Calculate fortune data for many people at once.
 
     Args:
-        year: Year
-        month: Month (1-12)
-        day: Day of month
-        year_stem: The year stem (needed for month stem calculation)
+        birthdays: Birth dates in format YYYY-MM-DD
+        time_codes: Time codes ('0'-'12' or ints), one per birthday
+        today_date: Today's date in format YYYY-MM-DD (shared by all rows)
+        genders: Optional genders ('남' or '여'), for the 대운 and the input echo
+        as_dicts: If True, return a list of calculate_fortune_data dicts
+        as_results: If True, return a list of FortuneResult objects
+        birth_times: Optional exact birth times (HH:MM or None per row), as
+            in calculate_fortune_data; these rows take their pillars from
+            get_natal_chart, everything after that stays vectorized
+        birthplaces: Optional birthplaces for birth_times
 
     Returns:
-        Tuple of (stem, branch)
+        Dictionary of columnar NumPy arrays:
+        - valid: bool (N,), False where the input would yield an error
+        - pillars: int16 (N, 4) year/month/day/hour pillar indices
+        - ten_gods: int8 (N, 4) TEN_GODS index per stem (-1 if unknown)
+        - branch_ten_gods: int8 (N, 4) TEN_GODS index per branch (-1 if unknown)
+        - today_pillar: int, today's pillar index
+        - today_ten_god: int8 (N,) TEN_GODS index of today's stem
+        - today_branch_ten_god: int8 (N,) TEN_GODS index of today's branch
+        - relations: uint16 (N, 10) PAIR_RULES bits per BATCH_PAIRS column pair
+        - group_relations: uint8 (N, 10) GROUP_RULES bits per BATCH_TRIPLES
+          column triple
+        - element_scores: int16 (N, 5) five-element scores (see element_strength)
+        - strength: int8 (N,) STRENGTH_LABELS index
+        - today_affinity: int16 (N,) today_affinity score (see affinity_ranking)
+        - shinsal: int16 (N, 5) 신살/12운성 code per BATCH_POSITIONS column
+          (see shinsal_code)
+        - daeun_direction / daeun_start_age / daeun_current: int8 (N,), see
+          daeun_batch (direction 0 when genders is not given)
+        - exact_birth_time: list (N,) of input['exact_birth_time'] dicts
+          (see exact_birth), None for rows without a valid birth_time
+        or, with as_dicts=True / as_results=True, a list of per-person
+        result dicts / FortuneResult objects.
     """
-    # Get month branch from solar terms
-    month_branch = get_month_branch_for_date(month, day)
-
-    # Month stem is calculated based on the year stem
-    # The pattern follows a fixed cycle:
-    # If year is 甲(0) or 己(5): 寅月(1)=丙寅, 卯月(2)=丁卯, etc.
-    # The month stem advances by 2 from a base point
+    np = _numpy()
+    tables = _np_tables()
+    n = len(birthdays)
+
+    today = _parse_dates_np([today_date])[0]
+    if np.isnat(today):
+        return _batch_errors(n, 'Invalid date format. Use YYYY-MM-DD', as_dicts, as_results)
+
+    dates = _parse_dates_np(list(birthdays))
+    # time_code only matters without a birth_time (as in calculate_fortune_data);
+    # anything else that is not an int is an invalid hour code (-1)
+    hour_codes = np.fromiter(
+        (12 if birth_times and birth_times[i] else _batch_hour_code(t) for i, t in enumerate(time_codes)),
+        dtype=np.int64, count=n,
+    )
+    valid_date = ~np.isnat(dates)
+    valid_hour = (hour_codes >= 0) & (hour_codes <= 12)
+    valid = valid_date & valid_hour
+
+    # Invalid rows are computed on a placeholder and masked out below
+    safe_dates = np.where(valid, dates, np.datetime64('2000-01-01', 'D'))
+    safe_hours = np.where(valid, hour_codes, 12)
+    pillars = four_pillar_indices_batch(safe_dates, safe_hours)
+    errors = np.where(valid_date, 'Invalid hour code. Use 0-12', 'Invalid date format. Use YYYY-MM-DD').tolist()
+    exact = _exact_birth_rows(birthdays, birth_times, birthplaces, valid_date, valid, hour_codes, pillars, errors)
+
+    today_p = int(day_pillar_indices_batch(today)[()])
+    extended = np.concatenate([pillars, np.full((n, 1), today_p, dtype=np.int16)], axis=1)
+    relations, group_relations = pair_relations_batch(extended)
+
+    day_stems = pillars[:, 2] % 10
+    known = pillars != UNKNOWN
+    safe = np.where(known, pillars, 0)
+    ten_gods = np.where(known, tables['ten_god'][day_stems[:, None], safe % 10], -1).astype(np.int8)
+    branch_ten_gods = np.where(known, tables['branch_ten_god'][day_stems[:, None], safe % 12], -1).astype(np.int8)
+    today_ten_god = (tables['relations'][pillars[:, 2], today_p] >> REL_TEN_GOD_SHIFT).astype(np.int8)
+    today_branch_ten_god = tables['branch_ten_god'][day_stems, today_p % 12]
+
+    element_scores_col, _, strength_col, favor = element_strength_batch(pillars)
+    today_affinity_col = today_affinity_batch(favor, today_p)
+    shinsal = shinsal_codes_batch(extended)
+
+    since_prev, until_next = term_distances_batch(safe_dates, safe_hours)
+    exact_info = [None] * n
+    for row, chart in exact:
+        since_prev[row], until_next[row] = chart.term_distance
+        safe_dates[row] = dates[row]
+        exact_info[row] = chart.exact_time
+    daeun_direction_col, daeun_start_age_col, daeun_current_col = daeun_batch(
+        pillars, since_prev, until_next, genders if genders is not None else [''] * n, safe_dates, today)
+
+    columns = {
+        'valid': valid,
+        'pillars': pillars,
+        'ten_gods': ten_gods,
+        'branch_ten_gods': branch_ten_gods,
+        'today_pillar': today_p,
+        'today_ten_god': today_ten_god,
+        'today_branch_ten_god': today_branch_ten_god,
+        'relations': relations,
+        'group_relations': group_relations,
+        'element_scores': element_scores_col,
+        'strength': strength_col,
+        'today_affinity': today_affinity_col,
+        'shinsal': shinsal,
+        'daeun_direction': daeun_direction_col,
+        'daeun_start_age': daeun_start_age_col,
+        'daeun_current': daeun_current_col,
+        'exact_birth_time': exact_info,
+    }
+    if not (as_dicts or as_results):
+        return columns
 
-    year_stem_idx = stem_to_index(year_stem)
-    branch_idx = branch_to_index(month_branch)
+    results = batch_to_results(columns, birthdays, hour_codes.tolist(), today_date, genders, errors)
+    return [r.to_dict() for r in results] if as_dicts else results
 
-    # Month stem = (year_stem_idx * 2 + branch_idx) % 10
-    # Actually, the formula is: month_stem_idx = (year_stem_idx * 2 + branch_idx) % 10
-    month_stem_idx = (year_stem_idx * 2 + branch_idx) % 10
-    month_stem = index_to_stem(month_stem_idx)
 
-    return month_stem, month_branch
+def _batch_hour_code(time_code) -> int:
+    """int(time_code), or -1 (an invalid hour code) when it does not parse."""
+    try:
+        return int(time_code)
+    except (TypeError, ValueError):
+        return -1
 
 
-def calculate_hour_pillar(day_stem: str, hour_code: int) -> Tuple[str, str]:
+def _exact_birth_rows(birthdays, birth_times, birthplaces, valid_date, valid, hour_codes, pillars, errors):
     """
-    Calculate Hour Pillar (시주).
-    The hour branch is determined by the hour code (0-11 for 12 double-hours).
-    The hour stem follows a pattern based on the day stem.
-
-    Args:
-        day_stem: The day stem
-        hour_code: Hour code (0-11), where 0=자시, 11=해시, 12=unknown
+    Patch the rows of calculate_fortune_data_batch that have an exact birth
+    time in place (pillars, hour code, validity, error) from their NatalChart.
 
     Returns:
-        Tuple of (stem, branch) or ('모름', '모름') if hour_code == 12
+        List of (row, NatalChart) for the valid exact rows
     """
-    if hour_code == 12:  # Unknown hour
-        return '모름', '모름'
+    exact = []
+    for row, birth_time in enumerate(birth_times or ()):
+        if not birth_time or not valid_date[row]:
+            continue
+        longitude, error = _validate_birth_time(birth_time, birthplaces[row] if birthplaces is not None else None)
+        if error:
+            valid[row] = False
+            errors[row] = error
+            continue
+        chart = get_natal_chart(birthdays[row], 12, birth_time, longitude)
+        valid[row] = True
+        hour_codes[row] = chart.hour_code
+        pillars[row] = chart.pillars
+        exact.append((row, chart))
+    return exact
+
+
+def _batch_errors(n: int, message: str, as_dicts: bool, as_results: bool = False):
+    """Batch result where every row failed validation."""
+    np = _numpy()
+    if as_dicts:
+        return [{'error': message} for _ in range(n)]
+    if as_results:
+        return [FortuneResult.failed(message) for _ in range(n)]
+    return {
+        'valid': np.zeros(n, dtype=bool),
+        'pillars': np.full((n, 4), UNKNOWN, dtype=np.int16),
+        'ten_gods': np.full((n, 4), -1, dtype=np.int8),
+        'branch_ten_gods': np.full((n, 4), -1, dtype=np.int8),
+        'today_pillar': UNKNOWN,
+        'today_ten_god': np.full(n, -1, dtype=np.int8),
+        'today_branch_ten_god': np.full(n, -1, dtype=np.int8),
+        'relations': np.zeros((n, len(BATCH_PAIRS)), dtype=np.uint16),
+        'group_relations': np.zeros((n, len(BATCH_TRIPLES)), dtype=np.uint8),
+        'element_scores': np.zeros((n, 5), dtype=np.int16),
+        'strength': np.full(n, -1, dtype=np.int8),
+        'today_affinity': np.zeros(n, dtype=np.int16),
+        'shinsal': np.full((n, len(BATCH_POSITIONS)), SHINSAL_UNKNOWN, dtype=np.int16),
+        'daeun_direction': np.zeros(n, dtype=np.int8),
+        'daeun_start_age': np.zeros(n, dtype=np.int8),
+        'daeun_current': np.full(n, -1, dtype=np.int8),
+        'exact_birth_time': [None] * n,
+    }
 
-    hour_branch = index_to_branch(hour_code)
 
-    # Hour stem is calculated based on day stem and hour branch
-    # The cycle repeats every 5 days (5 stems x 12 hours = 60 hours, but simplified)
-    # Formula: hour_stem_idx = (day_stem_idx * 2 + hour_code) % 10
+def relations_from_codes(
+    positions: List[str],
+    pillar_indices: List[int],
+    pair_codes: List[int],
+    group_codes: List[int],
+    include: Optional[List[bool]] = None,
+) -> Dict[str, List[Dict]]:
+    """
+    Expand packed rule bits into the find_harmonies_and_clashes dict.
 
-    day_stem_idx = stem_to_index(day_stem)
-    hour_stem_idx = (day_stem_idx * 2 + hour_code) % 10
-    hour_stem = index_to_stem(hour_stem_idx)
+    pair_codes/group_codes follow combinations() order over positions (see
+    pair_relations_batch); only active rules are emitted. If include is
+    given, only pairs/triples whose positions are all included are emitted.
+    """
+    result = _empty_relations()
+    pair_mask, group_mask = _ACTIVE_RULES['pair_mask'], _ACTIVE_RULES['group_mask']
+    k = len(positions)
+
+    for (i, j), bits in zip(combinations(range(k), 2), pair_codes):
+        bits &= pair_mask
+        if not bits or (include is not None and not (include[i] and include[j])):
+            continue
+        _emit_pair(result, bits, positions[i], pillar_indices[i], positions[j], pillar_indices[j])
+
+    for (i, j, l), bits in zip(combinations(range(k), 3), group_codes):
+        bits &= group_mask
+        if not bits or (include is not None and not (include[i] and include[j] and include[l])):
+            continue
+        _emit_group(result, bits, [positions[x] for x in (i, j, l)], [pillar_indices[x] for x in (i, j, l)])
 
-    return hour_stem, hour_branch
+    return result
 
 
-def calculate_four_pillars(birth_date: str, hour_code: int) -> Dict[str, Tuple[str, str]]:
+def batch_rows(columns: Dict, rows) -> Dict:
+    """calculate_fortune_data_batch columns restricted to rows (indices or bool mask)."""
+    np = _numpy()
+    rows = np.asarray(rows)
+    if rows.dtype == bool:
+        rows = np.flatnonzero(rows)
+    subset = {}
+    for key, value in columns.items():
+        if isinstance(value, np.ndarray):
+            subset[key] = value[rows]
+        elif isinstance(value, list):
+            subset[key] = [value[i] for i in rows.tolist()]
+        else:
+            subset[key] = value
+    return subset
+
+
+def batch_to_results(
+    columns: Dict,
+    birthdays: List[str],
+    hour_codes,
+    today_date: str,
+    genders: Optional[List[str]] = None,
+    errors=None,
+) -> List['FortuneResult']:
     """
-    Calculate all four pillars of destiny.
+    Split calculate_fortune_data_batch columns into per-person FortuneResults.
+    hour_codes may be None; they then follow from the hour pillars.
+    """
+    valid = columns['valid'].tolist()
+    pillars = columns['pillars'].tolist()
+    if hour_codes is None:
+        hour_codes = [12 if p[3] == UNKNOWN else p[3] % 12 for p in pillars]
+    relations = columns['relations'].astype('<u2')
+    group_relations = _group_masks(columns['group_relations'])
+    daeun = zip(columns['daeun_direction'].tolist(), columns['daeun_start_age'].tolist(),
+                columns['daeun_current'].tolist())
+    today_p = columns['today_pillar']
+    exact = columns.get('exact_birth_time') or [None] * len(valid)
+
+    results = []
+    for row, daeun_row in enumerate(daeun):
+        if not valid[row]:
+            results.append(FortuneResult.failed(str(errors[row]) if errors is not None else 'Invalid input'))
+            continue
+        results.append(FortuneResult(
+            birthdays[row],
+            genders[row] if genders is not None else '',
+            int(hour_codes[row]),
+            today_date,
+            tuple(pillars[row]),
+            today_p,
+            relations[row].tobytes(),
+            group_relations[row],
+            daeun_row,
+            exact_time=exact[row],
+        ))
+    return results
+
+
+def batch_to_dicts(
+    columns: Dict,
+    birthdays: List[str],
+    hour_codes,
+    today_date: str,
+    genders: Optional[List[str]] = None,
+    errors=None,
+) -> List[Dict]:
+    """Materialize calculate_fortune_data_batch columns as per-person dicts."""
+    return [r.to_dict() for r in batch_to_results(columns, birthdays, hour_codes, today_date, genders, errors)]
+
+
+def _group_masks(group_relations) -> List[int]:
+    """
+    Pack the (N, T) group_relations columns into one int per row, with
+    GROUP_RULES[g] at triple t in bit g * T + t.
+    """
+    np = _numpy()
+    t = group_relations.shape[1]
+    bits = np.zeros(group_relations.shape[0], dtype=np.int64)
+    for g in range(len(GROUP_RULES)):
+        hits = (group_relations >> g & 1).astype(np.int64)
+        bits |= hits @ np.left_shift(1, np.arange(g * t, (g + 1) * t, dtype=np.int64))
+    return bits.tolist()
 
-    Args:
-        birth_date: Date in format YYYY-MM-DD
-        hour_code: Hour code (0-11, 12 for unknown)
 
-    Returns:
-        Dictionary with keys: year, month, day, hour
-        Each value is a tuple of (stem, branch)
+# ============================================================================
+# RESULT OBJECTS
+# ============================================================================
+# FortuneResult keeps a person's result as pillar indices and packed relation
+# codes (the batch column layout) and expands it only on demand: to_dict()
+# gives the calculate_fortune_data dict, to_compact() a code-level JSON form.
+
+class FortuneResult:
+    """
+    Packed calculate_fortune_data result.
+
+    relations holds the PAIR_RULES bits per BATCH_PAIRS column pair (natal
+    pillars + today) as little-endian uint16s, groups the GROUP_RULES bits
+    per BATCH_TRIPLES triple packed as in _group_masks, and daeun the
+    (direction, start_age, current) triple. exact_time is the
+    input['exact_birth_time'] dict of an exact birth time (None otherwise).
+    A failed calculation only has error set.
     """
-    year, month, day = map(int, birth_date.split('-'))
 
-    # Calculate pillars in order
-    year_stem, year_branch = calculate_year_pillar(birth_date)
-    day_stem, day_branch = calculate_day_pillar(birth_date)
-    month_stem, month_branch = calculate_month_pillar(year, month, day, year_stem)
-    hour_stem, hour_branch = calculate_hour_pillar(day_stem, hour_code)
+    __slots__ = (
+        'birthday',
+        'gender',
+        'hour_code',
+        'today_date',
+        'pillars',
+        'today_p',
+        'relations',
+        'groups',
+        'daeun',
+        'error',
+        'exact_time',
+    )
+
+    COMPACT_VERSION = 3
+
+    def __init__(
+        self,
+        birthday: str,
+        gender: str,
+        hour_code: int,
+        today_date: str,
+        pillars: Tuple[int, int, int, int],
+        today_p: int,
+        relations: bytes,
+        groups: int,
+        daeun: Tuple[int, int, int],
+        error: Optional[str] = None,
+        exact_time: Optional[Dict] = None,
+    ):
+        self.birthday = birthday
+        self.gender = gender
+        self.hour_code = hour_code
+        self.today_date = today_date
+        self.pillars = pillars
+        self.today_p = today_p
+        self.relations = relations
+        self.groups = groups
+        self.daeun = daeun
+        self.error = error
+        self.exact_time = exact_time
+
+    @classmethod
+    def failed(cls, error: str) -> 'FortuneResult':
+        """Result of a calculation that did not pass validation."""
+        return cls('', '', 12, '', (UNKNOWN,) * 4, UNKNOWN, bytes(2 * len(BATCH_PAIRS)), 0, (0, 0, -1), error)
+
+    def to_dict(self) -> Dict:
+        """The calculate_fortune_data dict for this result."""
+        if self.error is not None:
+            return {'error': self.error}
+        natal = list(self.pillars)
+        extended = natal + [self.today_p]
+        strength = element_strength(natal)
+        pair_codes = [self.relations[2 * i] | self.relations[2 * i + 1] << 8 for i in range(len(BATCH_PAIRS))]
+        t = len(BATCH_TRIPLES)
+        group_codes = [
+            sum((self.groups >> (g * t + x) & 1) << g for g in range(len(GROUP_RULES)))
+            for x in range(t)
+        ]
+        data = _assemble_fortune_data(
+            self.birthday,
+            self.gender,
+            self.hour_code,
+            self.today_date,
+            natal[2],
+            {pos: _pillar_info(p) for pos, p in zip(POSITIONS, natal)},
+            _ten_gods_from_indices(natal),
+            relations_from_codes(BATCH_POSITIONS, extended, pair_codes, group_codes, _NATAL_COLUMNS),
+            self.today_p,
+            relations_from_codes(BATCH_POSITIONS, extended, pair_codes, group_codes),
+            _element_strength_info(*strength),
+            today_affinity(strength[3], self.today_p),
+            shinsal_codes(natal, self.today_p),
+            _daeun_info(natal[1], natal[2] % 10, *self.daeun),
+        )
+        if self.exact_time is not None:
+            data['input']['exact_birth_time'] = dict(self.exact_time)
+        return data
+
+    def to_compact(self) -> Dict:
+        """JSON-friendly form with pillar indices and relation codes only."""
+        if self.error is not None:
+            return {'error': self.error}
+        compact = {
+            'v': self.COMPACT_VERSION,
+            'birthday': self.birthday,
+            'gender': self.gender,
+            'time_code': self.hour_code,
+            'today_date': self.today_date,
+            'pillars': list(self.pillars),
+            'today_pillar': self.today_p,
+            'relations': self.relations.hex(),
+            'groups': self.groups,
+            'daeun': list(self.daeun),
+        }
+        if self.exact_time is not None:
+            compact['exact_birth_time'] = dict(self.exact_time)
+        return compact
+
+    @classmethod
+    def from_compact(cls, data: Dict) -> 'FortuneResult':
+        """Inverse of to_compact()."""
+        if 'error' in data:
+            return cls.failed(data['error'])
+        version = data.get('v')
+        if version == 1:
+            # v1: one byte of REL_* flags per pair (= the first four pair
+            # rules) and a 삼합-only triple bitmask (= group rule 0)
+            relations = b''.join(bytes((code, 0)) for code in bytes.fromhex(data['relations']))
+            groups = data['three_harmony']
+        elif version in (2, cls.COMPACT_VERSION):
+            # v2 is v3 without exact_birth_time
+            relations = bytes.fromhex(data['relations'])
+            groups = data['groups']
+        else:
+            raise ValueError(f"Unsupported compact result version: {version}")
+        return cls(
+            data['birthday'],
+            data['gender'],
+            data['time_code'],
+            data['today_date'],
+            tuple(data['pillars']),
+            data['today_pillar'],
+            relations,
+            groups,
+            tuple(data['daeun']),
+            exact_time=data.get('exact_birth_time'),
+        )
+
+
+_NATAL_COLUMNS = [True, True, True, True, False]
+
+
+def _packed_relations(extended: List[int]) -> Tuple[bytes, int]:
+    """(relations, groups) of a FortuneResult, as pair_relations_batch + _group_masks."""
+    relations = bytearray()
+    for i, j in BATCH_PAIRS:
+        p1, p2 = extended[i], extended[j]
+        bits = PAIR_RULE_BITS[p1 * 60 + p2] if p1 != UNKNOWN and p2 != UNKNOWN else 0
+        relations += bytes((bits & 0xFF, bits >> 8))
+    t = len(BATCH_TRIPLES)
+    groups = 0
+    for x, (i, j, l) in enumerate(BATCH_TRIPLES):
+        if UNKNOWN in (extended[i], extended[j], extended[l]):
+            continue
+        bits = GROUP_RULE_BITS[(extended[i] % 12 * 12 + extended[j] % 12) * 12 + extended[l] % 12]
+        for g in _GROUP_RULE_IDS[bits]:
+            groups |= 1 << (g * t + x)
+    return bytes(relations), groups
+
+
+def calculate_fortune(
+    birthday: str,
+    gender: str,
+    time_code: str,
+    today_date: str,
+    birth_time: Optional[str] = None,
+    birthplace=None,
+) -> FortuneResult:
+    """
+    calculate_fortune_data as a packed FortuneResult (see to_dict/to_compact).
 
-    return {
-        'year': (year_stem, year_branch),
-        'month': (month_stem, month_branch),
-        'day': (day_stem, day_branch),
-        'hour': (hour_stem, hour_branch),
-    }
+    Args:
+        birthday: Birth date in format YYYY-MM-DD
+        gender: Gender ('남' or '여')
+        time_code: Time code as string ('0'-'12')
+        today_date: Today's date in format YYYY-MM-DD
+        birth_time, birthplace: As in calculate_fortune_data
+    """
+    try:
+        parse_date(birthday)
+        today_ymd = parse_date(today_date)
+    except ValueError:
+        return FortuneResult.failed('Invalid date format. Use YYYY-MM-DD')
+
+    longitude = None
+    if birth_time is not None:
+        longitude, error = _validate_birth_time(birth_time, birthplace)
+        if error:
+            return FortuneResult.failed(error)
+        hour_code = 12
+    else:
+        hour_code = int(time_code)
+        if hour_code < 0 or hour_code > 12:
+            return FortuneResult.failed('Invalid hour code. Use 0-12')
+
+    chart = get_natal_chart(birthday, hour_code, birth_time, longitude)
+    today_p = day_pillar_index(*today_ymd)
+    relations, groups = _packed_relations(chart.pillars + [today_p])
+    direction, start_age = chart.daeun(gender)
+    current = daeun_index(start_age, age_on(chart.birth_ymd, today_ymd))
+    return FortuneResult(
+        birthday, gender, chart.hour_code, today_date, tuple(chart.pillars), today_p,
+        relations, groups, (direction, start_age, current),
+        exact_time=chart.exact_time,
+    )
 
 
 # ============================================================================
-# TEN GODS (십성) CALCULATION
+# CHART FINGERPRINT
 # ============================================================================
+# A short key for "same result": people with the same birth data, gender
+# and today share a fingerprint, so callers can compute (and prompt) once
+# per fingerprint. The key is built from the normalized inputs plus every
+# setting that changes the output (relation toggles, and the hour rules for
+# exact birth times), so it is known before anything is calculated.
+# Bump FINGERPRINT_VERSION whenever the engine's output changes for the
+# same inputs; stored keys then stop matching.
 
-def calculate_ten_god(day_stem: str, target_stem: str) -> str:
+FINGERPRINT_VERSION = 2
+
+
+def chart_fingerprint(
+    birthday: str,
+    gender: str,
+    time_code: str,
+    today_date: str,
+    birth_time: Optional[str] = None,
+    birthplace=None,
+) -> Optional[str]:
     """
-    Calculate the Ten God relationship between day stem and target stem.
-    Both arguments must be heavenly stems (천간).
+    Versioned fingerprint of a calculate_fortune input, e.g. 'v2:3f9a0c2e71d4b85a'.
 
-    The Ten Gods (십성):
-    - 비견: Same element, same Yin-Yang
-    - 겁재: Same element, different Yin-Yang
-    - 식신: Day stem produces target, same Yin-Yang
-    - 상관: Day stem produces target, different Yin-Yang
-    - 편인: Target produces day stem, same Yin-Yang
-    - 정인: Target produces day stem, different Yin-Yang
-    - 편재: Day stem overcomes target, same Yin-Yang
-    - 정재: Day stem overcomes target, different Yin-Yang
-    - 편관: Target overcomes day stem, same Yin-Yang
-    - 정관: Target overcomes day stem, different Yin-Yang
+    Takes the calculate_fortune arguments. Gender spellings ('남'/'m')
+    share a fingerprint; today_date covers both today's pillar and the 대운
+    age.
+
+    Returns:
+        The fingerprint, or None for input that fails validation
     """
-    day_element = get_stem_element(day_stem)
-    target_element = get_stem_element(target_stem)
-    same_yinyang = is_same_yinyang(day_stem, target_stem)
-
-    if day_element == target_element:
-        return '비견' if same_yinyang else '겁재'
-    elif PRODUCTION_CYCLE[day_element] == target_element:
-        return '식신' if same_yinyang else '상관'
-    elif PRODUCTION_CYCLE[target_element] == day_element:
-        return '편인' if same_yinyang else '정인'
-    elif OVERCOMING_CYCLE[day_element] == target_element:
-        return '편재' if same_yinyang else '정재'
-    elif OVERCOMING_CYCLE[target_element] == day_element:
-        return '편관' if same_yinyang else '정관'
+    try:
+        parse_date(birthday)
+        parse_date(today_date)
+    except ValueError:
+        return None
+
+    if birth_time is not None:
+        longitude, error = _validate_birth_time(birth_time, birthplace)
+        if error:
+            return None
+        hour, minute = parse_birth_time(birth_time)
+        birth = f"{hour * 60 + minute}@{longitude:.4f}/{_HOUR_RULES['convention']}/{_HOUR_RULES['zi_mode']}"
     else:
-        return '기타'
+        try:
+            hour_code = int(time_code)
+        except (TypeError, ValueError):
+            return None
+        if hour_code < 0 or hour_code > 12:
+            return None
+        birth = str(hour_code)
+
+    male = _GENDER_MALE.get(gender)
+    key = '|'.join((
+        birthday,
+        '' if male is None else 'mf'[not male],
+        birth,
+        today_date,
+        f"{_ACTIVE_RULES['pair_mask']:x}.{_ACTIVE_RULES['group_mask']:x}",
+    ))
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).hexdigest()
+    return f"v{FINGERPRINT_VERSION}:{digest}"
 
 
-def calculate_ten_gods(pillars: Dict[str, Tuple[str, str]]) -> Dict[str, Dict]:
+# ============================================================================
+# 궁합 (COMPATIBILITY)
+# ============================================================================
+# Day-pillar compatibility between two people, scored once for all 60 x 60
+# pillar pairs from the pair rule table; roster matrices are then a single
+# NumPy gather. Positive scores favour working together. The relation labels
+# are the registry's, so they follow set_relation_rules; one score table is
+# kept per set of active pair rules.
+
+COMPAT_WEIGHTS = {
+    '천간합': 3,
+    '천간충': -2,
+    '지지육합': 3,
+    '지지충': -3,
+    '지지반합': 2,   # HALF_HARMONIES: a 삼합 pair that includes its 왕지
+    '상생': 1,       # one day stem's element produces the other's
+}
+
+
+def _compat_labels(p1: int, p2: int, pair_mask: int) -> List[str]:
+    """COMPAT_WEIGHTS labels of two day pillars under the given PAIR_RULES mask."""
+    e1, e2 = STEM_ELEMENT_IDX[p1 % 10], STEM_ELEMENT_IDX[p2 % 10]
+    labels = [
+        PAIR_RULES[r][1] for r in _PAIR_RULE_IDS[PAIR_RULE_BITS[p1 * 60 + p2] & pair_mask]
+        if PAIR_RULES[r][1] in COMPAT_WEIGHTS
+    ]
+    if PRODUCES_IDX[e1] == e2 or PRODUCES_IDX[e2] == e1:
+        labels.append('상생')
+    return labels
+
+
+def compatibility_labels(p1: int, p2: int) -> List[str]:
+    """COMPAT_WEIGHTS labels that apply to two day pillars (active relation rules only)."""
+    return _compat_labels(p1, p2, _ACTIVE_RULES['pair_mask'])
+
+
+@lru_cache(maxsize=None)
+def _compat_scores(pair_mask: int) -> Tuple[int, ...]:
+    """60 x 60 compatibility scores, flattened, for one PAIR_RULES mask."""
+    return tuple(
+        sum(COMPAT_WEIGHTS[label] for label in _compat_labels(p1, p2, pair_mask))
+        for p1 in range(60) for p2 in range(60)
+    )
+
+
+@lru_cache(maxsize=None)
+def _compat_matrix(pair_mask: int):
+    """_compat_scores as an int8 (60, 60) NumPy array."""
+    np = _numpy()
+    return np.array(_compat_scores(pair_mask), dtype=np.int8).reshape(60, 60)
+
+
+def compatibility_score(p1: int, p2: int) -> int:
+    """Compatibility score of two day pillars (see COMPAT_WEIGHTS)."""
+    return _compat_scores(_ACTIVE_RULES['pair_mask'])[p1 * 60 + p2]
+
+
+def compatibility_matrix(day_pillars):
     """
-    Calculate Ten God relationships for all stems in the chart.
+    N x N compatibility scores for a roster.
 
     Args:
-        pillars: Dictionary with year, month, day, hour pillars
+        day_pillars: int array (N,) of day pillar indices
 
     Returns:
-        Dictionary with ten gods for each pillar position
+        int8 array (N, N); the diagonal is each member against themselves
     """
-    day_stem = pillars['day'][0]
+    np = _numpy()
+    scores = _compat_matrix(_ACTIVE_RULES['pair_mask'])
+    day_pillars = np.asarray(day_pillars, dtype=np.intp)
+    return scores[day_pillars[:, None], day_pillars[None, :]]
 
-    ten_gods = {}
-    for position in ['year', 'month', 'day', 'hour']:
-        stem, branch = pillars[position]
-        if stem != '모름':
-            ten_god = calculate_ten_god(day_stem, stem)
-            ten_gods[position] = {
-                'stem': stem,
-                'branch': branch,
-                'ten_god': ten_god,
-                'element': get_stem_element(stem),
-                'yinyang': get_stem_yinyang(stem),
-            }
-        else:
-            ten_gods[position] = {
-                'stem': '모름',
-                'branch': '모름',
-                'ten_god': '모름',
-                'element': '모름',
-                'yinyang': '모름',
-            }
 
-    return ten_gods
+def best_collaborators(day_pillars, today_p: int, candidates=None):
+    """
+    Today's best collaborator for every member.
+
+    The partner score is the pair's compatibility plus how well today's
+    pillar sits with the partner's day pillar. Only the 60 distinct pillars
+    are compared, and members sharing a best pillar are spread round-robin
+    over the members holding it, so this is O(N) rather than O(N^2).
+
+    Args:
+        day_pillars: int array (N,) of day pillar indices
+        today_p: Today's 60-cycle pillar index
+        candidates: Optional bool array (N,); only these members are suggested
+
+    Returns:
+        (best, score): int arrays (N,); best is -1 when there is no one else
+    """
+    np = _numpy()
+    scores = _compat_matrix(_ACTIVE_RULES['pair_mask']).astype(np.int16)
+    day_pillars = np.asarray(day_pillars, dtype=np.intp)
+    n = len(day_pillars)
+    if candidates is None:
+        candidates = np.ones(n, dtype=bool)
+    candidates = np.asarray(candidates, dtype=bool)
+
+    counts = np.bincount(day_pillars[candidates], minlength=60)
+    partner = scores + scores[today_p][None, :]
+    lowest = np.iinfo(np.int16).min
+    # Per own pillar: row 0 for non-candidates, row 1 for candidates, who
+    # must leave themselves out of their own pillar
+    available = np.stack([
+        np.broadcast_to(counts[None, :] > 0, (60, 60)),
+        (counts[None, :] - np.eye(60, dtype=np.int64)) > 0,
+    ])
+    masked = np.where(available, partner[None, :, :], lowest)
+    best_pillar = masked.argmax(axis=2)
+    best_score = np.take_along_axis(masked, best_pillar[:, :, None], axis=2)[:, :, 0]
+    has_best = available.any(axis=2)
+
+    variant = candidates.astype(np.intp)
+    target = best_pillar[variant, day_pillars]
+
+    # Candidates grouped by pillar, in roster order
+    order = np.flatnonzero(candidates)
+    order = order[np.argsort(day_pillars[order], kind='stable')]
+    starts = np.concatenate([[0], np.cumsum(counts)])
+    rank = np.arange(n)
+    own_pos = np.zeros(n, dtype=np.int64)
+    own_pos[order] = np.arange(len(order)) - starts[day_pillars[order]]
+
+    size = np.maximum(counts[target], 1)
+    # Within one's own pillar, offsets 1..size-1 from one's slot skip oneself
+    slot = np.where(candidates & (target == day_pillars),
+                    (own_pos + 1 + rank % np.maximum(size - 1, 1)) % size,
+                    rank % size)
+    best = order[np.minimum(starts[target] + slot, len(order) - 1)] if len(order) else np.full(n, -1)
+
+    ok = has_best[variant, day_pillars]
+    return np.where(ok, best, -1), np.where(ok, best_score[variant, day_pillars], 0)
 
 
 # ============================================================================
-# HARMONIES AND CLASHES CALCULATION
+# DAILY INDEX (오늘 충/합이 있는 사람)
 # ============================================================================
+# Which roster members each of the 60 day pillars clashes or harmonizes
+# with. A chart's answers for all 60 pillars are packed into one byte per
+# pillar (DAILY_INDEX_KINDS bits) once per roster version; invert_daily_index
+# turns a roster's codes into per-pillar member lists, so "who is affected
+# today" is a lookup instead of a scan over everyone's today_interactions.
+
+DAILY_INDEX_KINDS = [
+    # (name, bit, relation keys between today and the natal chart)
+    ('clash', 1, ('heavenly_stem_clash', 'earthly_branch_clash')),
+    ('harmony', 2, ('heavenly_stem_harmony', 'earthly_branch_six_harmony')),
+    ('three_harmony', 4, ('earthly_branch_three_harmony',)),  # today completes a 삼합 with two natal branches
+]
 
-def find_harmonies_and_clashes(pillars: Dict[str, Tuple[str, str]]) -> Dict[str, List[str]]:
+
+def _daily_index_masks() -> List[Tuple[int, int, int]]:
+    """(bit, PAIR_RULES mask, GROUP_RULES mask) per kind, limited to the active rules."""
+    masks = []
+    for _, bit, keys in DAILY_INDEX_KINDS:
+        pair_mask = sum(1 << r for r, rule in enumerate(PAIR_RULES) if rule[0] in keys)
+        group_mask = sum(1 << g for g, rule in enumerate(GROUP_RULES) if rule[0] in keys)
+        masks.append((bit, pair_mask & _ACTIVE_RULES['pair_mask'], group_mask & _ACTIVE_RULES['group_mask']))
+    return masks
+
+
+def daily_index_code(pillar_indices: List[int]) -> bytes:
     """
-    Find all harmonies and clashes in the four pillars.
+    DAILY_INDEX_KINDS bits of a natal chart against each of the 60 day pillars.
+
+    Returns:
+        60 bytes; byte t has a kind's bit set when today_relations(t) holds
+        one of its relations
+    """
+    masks = _daily_index_masks()
+    known = [p for p in pillar_indices if p != UNKNOWN]
+    group_bases = [(p1 % 12 * 12 + p2 % 12) * 12 for p1, p2 in combinations(known, 2)]
+    codes = bytearray(60)
+    for t in range(60):
+        pair_bits = group_bits = 0
+        for p in known:
+            pair_bits |= PAIR_RULE_BITS[p * 60 + t]
+        for base in group_bases:
+            group_bits |= GROUP_RULE_BITS[base + t % 12]
+        for bit, pair_mask, group_mask in masks:
+            if pair_bits & pair_mask or group_bits & group_mask:
+                codes[t] |= bit
+    return bytes(codes)
+
+
+def daily_index_batch(pillars):
+    """
+    Vectorized daily_index_code.
+
+    Args:
+        pillars: int array (N, 4) of natal pillar indices (UNKNOWN allowed)
 
-    Returns a dictionary with:
-    - heavenly_stem_harmony: List of harmonious stem pairs
-    - heavenly_stem_clash: List of clashing stem pairs
-    - earthly_branch_six_harmony: List of six harmony pairs
-    - earthly_branch_clash: List of clash pairs
-    - earthly_branch_three_harmony: List of three harmony groups
+    Returns:
+        uint8 array (N, 60)
     """
-    stems = []
-    branches = []
+    np = _numpy()
+    tables = _np_tables()
+    pillars = np.asarray(pillars)
+    known = pillars != UNKNOWN
+    safe = np.where(known, pillars, 0)
 
-    for position in ['year', 'month', 'day', 'hour']:
-        stem, branch = pillars[position]
-        if stem != '모름':
-            stems.append((position, stem))
-            branches.append((position, branch))
-
-    result = {
-        'heavenly_stem_harmony': [],
-        'heavenly_stem_clash': [],
-        'earthly_branch_six_harmony': [],
-        'earthly_branch_clash': [],
-        'earthly_branch_three_harmony': [],
-    }
+    pair_bits = np.where(known[:, :, None], tables['pair_rules'][safe], 0)
+    pair_bits = np.bitwise_or.reduce(pair_bits, axis=1)
 
-    # Check heavenly stem harmonies and clashes
-    for i, (pos1, stem1) in enumerate(stems):
-        for pos2, stem2 in stems[i+1:]:
-            key = (stem1, stem2)
-            if key in HEAVENLY_STEM_HARMONY:
-                result['heavenly_stem_harmony'].append({
-                    'positions': [pos1, pos2],
-                    'stems': [stem1, stem2],
-                    'type': '천간합'
-                })
-            elif key in HEAVENLY_STEM_CLASH:
-                result['heavenly_stem_clash'].append({
-                    'positions': [pos1, pos2],
-                    'stems': [stem1, stem2],
-                    'type': '천간충'
-                })
-
-    # Check earthly branch harmonies and clashes
-    for i, (pos1, branch1) in enumerate(branches):
-        for pos2, branch2 in branches[i+1:]:
-            key = (branch1, branch2)
-            if key in EARTHLY_BRANCH_SIX_HARMONY:
-                result['earthly_branch_six_harmony'].append({
-                    'positions': [pos1, pos2],
-                    'branches': [branch1, branch2],
-                    'type': '지지육합'
-                })
-            elif key in EARTHLY_BRANCH_CLASH:
-                result['earthly_branch_clash'].append({
-                    'positions': [pos1, pos2],
-                    'branches': [branch1, branch2],
-                    'type': '지지충'
-                })
-
-    # Check earthly branch three harmonies
-    branch_set = [b for _, b in branches if b != '모름']
-    for i, (pos1, branch1) in enumerate(branches):
-        if branch1 != '모름':
-            for j, (pos2, branch2) in enumerate(branches[i+1:], i+1):
-                if branch2 != '모름':
-                    for k, (pos3, branch3) in enumerate(branches[j+1:], j+1):
-                        if branch3 != '모름':
-                            key = tuple(sorted([branch1, branch2, branch3]))
-                            if key in THREE_HARMONIES or (branch1, branch2, branch3) in THREE_HARMONIES:
-                                result['earthly_branch_three_harmony'].append({
-                                    'positions': [pos1, pos2, pos3],
-                                    'branches': [branch1, branch2, branch3],
-                                    'type': '지지삼합'
-                                })
+    pairs = list(combinations(range(pillars.shape[1]), 2))
+    a = [i for i, _ in pairs]
+    b = [j for _, j in pairs]
+    group_bits = tables['group_rules'][safe[:, a] % 12, safe[:, b] % 12][:, :, np.arange(60) % 12]
+    group_bits = np.where((known[:, a] & known[:, b])[:, :, None], group_bits, 0)
+    group_bits = np.bitwise_or.reduce(group_bits, axis=1)
 
-    return result
+    codes = np.zeros((len(pillars), 60), dtype=np.uint8)
+    for bit, pair_mask, group_mask in _daily_index_masks():
+        codes |= np.where(((pair_bits & pair_mask) | (group_bits & group_mask)) != 0, bit, 0).astype(np.uint8)
+    return codes
+
+
+def invert_daily_index(codes: Dict[str, bytes]) -> List[Dict[str, List[str]]]:
+    """
+    Per-pillar member lists from daily_index_code results.
+
+    Args:
+        codes: member id -> 60-byte code
+
+    Returns:
+        60 dicts (one per day pillar) of kind name -> member ids, in the
+        order of codes
+    """
+    index = [{name: [] for name, _, _ in DAILY_INDEX_KINDS} for _ in range(60)]
+    for member, code in codes.items():
+        for t, c in enumerate(code):
+            if c:
+                for name, bit, _ in DAILY_INDEX_KINDS:
+                    if c & bit:
+                        index[t][name].append(member)
+    return index
 
 
 # ============================================================================
-# TODAY'S PILLAR CALCULATION
+# TEAM CHART (팀 오늘의 기운)
 # ============================================================================
+# One summary of the whole roster against today's pillar, for a single team
+# post instead of N individual readings. Everything is a reduction over the
+# calculate_fortune_data_batch columns: element scores are summed, today's
+# ten god is counted per member and the today x natal relation codes are
+# OR-ed per member before counting, so the cost is one batch plus a few
+# NumPy reductions whatever the roster size.
 
-def calculate_today_pillar(today_date: str) -> Dict[str, Tuple[str, str]]:
+# BATCH_PAIRS / BATCH_TRIPLES columns that include today (column 4)
+_TODAY_PAIR_COLUMNS = [i for i, pair in enumerate(BATCH_PAIRS) if 4 in pair]
+_TODAY_TRIPLE_COLUMNS = [i for i, triple in enumerate(BATCH_TRIPLES) if 4 in triple]
+
+
+def team_chart(columns: Dict) -> Dict:
     """
-    Calculate today's pillar (오늘의 간지).
+    Collective chart of a roster for today.
 
     Args:
-        today_date: Date in format YYYY-MM-DD
+        columns: calculate_fortune_data_batch result (column dict); rows
+            that failed validation are left out
 
     Returns:
-        Dictionary with day pillar (stem, branch)
+        Dictionary with:
+            members: number of charts counted
+            today_pillar: expanded today's pillar
+            element_totals: natal 오행 share in % over the roster
+                ('natal'), and with today's pillar added once per member
+                ('with_today')
+            today_ten_gods: today's stem as each member's 십성, TEN_GODS
+                name -> member count, most common first
+            dominant_ten_god: the most common of those (None without members)
+            relations: active relation key -> members with that relation
+                between today and their natal chart, most common first
+            clashes / harmonies: members with any DAILY_INDEX_KINDS
+                'clash' / 'harmony' or 'three_harmony' relation today
+            strength: STRENGTH_LABELS -> member count
+            average_affinity: mean today_affinity (0 without members)
     """
-    day_stem, day_branch = calculate_day_pillar(today_date)
+    np = _numpy()
+    valid = np.asarray(columns['valid'], dtype=bool)
+    today_p = columns['today_pillar']
+    members = int(valid.sum())
+
+    natal = columns['element_scores'][valid].sum(axis=0, dtype=np.int64)
+    with_today = natal + members * np.asarray(PILLAR_ELEMENT_WEIGHTS[today_p])
+
+    def shares(scores) -> Dict[str, float]:
+        total = int(scores.sum())
+        return {el: round(100 * int(s) / total, 1) if total else 0.0 for el, s in zip(ELEMENTS, scores)}
+
+    gods = np.bincount(columns['today_ten_god'][valid].astype(np.int64), minlength=len(TEN_GODS))
+    today_ten_gods = {TEN_GODS[g]: int(gods[g]) for g in np.argsort(-gods, kind='stable').tolist() if gods[g]}
+
+    # Each member counts once per relation, however many natal pillars it hits
+    pair_bits = np.bitwise_or.reduce(columns['relations'][valid][:, _TODAY_PAIR_COLUMNS], axis=1).astype(np.int64)
+    group_bits = np.bitwise_or.reduce(
+        columns['group_relations'][valid][:, _TODAY_TRIPLE_COLUMNS], axis=1).astype(np.int64)
+    pair_bits &= _ACTIVE_RULES['pair_mask']
+    group_bits &= _ACTIVE_RULES['group_mask']
+    counts = {}
+    for r, (key, _, _) in enumerate(PAIR_RULES):
+        counts[key] = int(np.count_nonzero(pair_bits >> r & 1))
+    for g, (key, _, _) in enumerate(GROUP_RULES):
+        counts[key] = int(np.count_nonzero(group_bits >> g & 1))
+    relations = {key: counts[key] for key in sorted(_ACTIVE_RULES['keys'], key=lambda k: -counts[k]) if counts[key]}
+
+    kinds = {}
+    for (name, _, _), (_, pair_mask, group_mask) in zip(DAILY_INDEX_KINDS, _daily_index_masks()):
+        kinds[name] = (pair_bits & pair_mask) | (group_bits & group_mask) != 0
+
+    strength = np.bincount(columns['strength'][valid].astype(np.int64), minlength=len(STRENGTH_LABELS))
     return {
-        'day': (day_stem, day_branch)
+        'members': members,
+        'today_pillar': _pillar_info(today_p),
+        'element_totals': {'natal': shares(natal), 'with_today': shares(with_today)},
+        'today_ten_gods': today_ten_gods,
+        'dominant_ten_god': next(iter(today_ten_gods), None),
+        'relations': relations,
+        'clashes': int(kinds['clash'].sum()),
+        'harmonies': int((kinds['harmony'] | kinds['three_harmony']).sum()),
+        'strength': {label: int(c) for label, c in zip(STRENGTH_LABELS, strength.tolist())},
+        'average_affinity': round(float(columns['today_affinity'][valid].mean()), 1) if members else 0,
     }
 
 
 # ============================================================================
-# MAIN CALCULATION FUNCTION
+# GOOD DAYS (길일 달력)
 # ============================================================================
+# Favorable days of a member over a date range. A day's score only depends
+# on its day pillar, so every chart gets a 60-entry table once (today
+# affinity plus DAILY_INDEX_KINDS adjustments from the relation tables) and
+# a range is then one lookup per day. day_pillars() walks the range once
+# for the whole roster; good_days() and the writers stream per member, so
+# memory is bounded by the range, not by roster x days.
 
-def calculate_fortune_data(
-    birthday: str,
-    gender: str,
-    time_code: str,
-    today_date: str
-) -> Dict:
+# Score adjustment per DAILY_INDEX_KINDS kind between the day and the chart
+GOOD_DAY_WEIGHTS = {'clash': -30, 'harmony': 20, 'three_harmony': 20}
+GOOD_DAY_THRESHOLD = 30  # Minimum score of a good day (scores run -100..100)
+GOOD_DAY_LABELS = {'clash': '충', 'harmony': '합', 'three_harmony': '삼합'}
+
+
+def day_pillars(start_date: str, end_date: str) -> List[Tuple[str, int]]:
+    """(date, day pillar) for every day of a range (see pillar_timeline)."""
+    return [(day_str, day_p) for day_str, _, _, day_p in pillar_timeline(start_date, end_date)]
+
+
+def day_score_table(chart: NatalChart) -> List[Dict]:
     """
-    Calculate comprehensive fortune data based on birth date and time.
+    Score of each of the 60 day pillars for a chart.
+
+    Returns:
+        60 dicts {'pillar', 'score', 'ten_god', 'relations'}, where score is
+        today_affinity plus GOOD_DAY_WEIGHTS (clamped to +-AFFINITY_SCALE)
+        and relations lists the DAILY_INDEX_KINDS names that apply
+    """
+    favor = chart.strength[3]
+    codes = daily_index_code(chart.pillars)
+    table = []
+    for t in range(60):
+        kinds = [name for name, bit, _ in DAILY_INDEX_KINDS if codes[t] & bit]
+        score = today_affinity(favor, t) + sum(GOOD_DAY_WEIGHTS[name] for name in kinds)
+        table.append({
+            'pillar': HEAVENLY_STEMS[t % 10] + EARTHLY_BRANCHES[t % 12],
+            'score': max(-AFFINITY_SCALE, min(AFFINITY_SCALE, score)),
+            'ten_god': TEN_GODS[relation_ten_god(PILLAR_RELATIONS[chart.pillars[2] * 60 + t])],
+            'relations': kinds,
+        })
+    return table
+
+
+def good_days(
+    chart: NatalChart,
+    days: Iterable[Tuple[str, int]],
+    threshold: int = GOOD_DAY_THRESHOLD,
+) -> Iterator[Dict]:
+    """
+    Yield the days of a range that score at least threshold for a chart.
 
     Args:
-        birthday: Birth date in format YYYY-MM-DD
-        gender: Gender ('남' or '여')
-        time_code: Time code as string ('0'-'12')
-        today_date: Today's date in format YYYY-MM-DD
+        chart: Natal chart (see get_natal_chart)
+        days: (date, day pillar) pairs, e.g. day_pillars(); reused across
+            members, so pass a list rather than a one-shot iterator
+        threshold: Minimum score
 
-    Returns:
-        Dictionary containing all calculated fortune data
+    Yields:
+        {'date', 'pillar', 'score', 'ten_god', 'relations'}
     """
-    hour_code = int(time_code)
+    table = day_score_table(chart)
+    good = [entry if entry['score'] >= threshold else None for entry in table]
+    for day_str, day_p in days:
+        entry = good[day_p]
+        if entry is not None:
+            yield {'date': day_str, **entry}
 
-    # Validate inputs
-    try:
-        datetime.strptime(birthday, '%Y-%m-%d')
-        datetime.strptime(today_date, '%Y-%m-%d')
-    except ValueError:
-        return {'error': 'Invalid date format. Use YYYY-MM-DD'}
 
-    if hour_code < 0 or hour_code > 12:
-        return {'error': 'Invalid hour code. Use 0-12'}
+_ICS_ESCAPES = str.maketrans({'\\': '\\\\', ';': '\\;', ',': '\\,', '\n': '\\n'})
 
-    # Calculate four pillars
-    pillars = calculate_four_pillars(birthday, hour_code)
 
-    # Calculate ten gods
-    ten_gods = calculate_ten_gods(pillars)
+def _ics_line(line: str) -> str:
+    """A content line folded at 75 octets (RFC 5545 3.1), CRLF-terminated."""
+    data = line.encode('utf-8')
+    parts = []
+    while len(data) > 75:
+        cut = 75 if not parts else 74  # continuation lines start with a space
+        while data[cut] & 0xC0 == 0x80:  # never split a UTF-8 sequence
+            cut -= 1
+        parts.append(data[:cut].decode('utf-8'))
+        data = data[cut:]
+    parts.append(data.decode('utf-8'))
+    return '\r\n '.join(parts) + '\r\n'
 
-    # Calculate harmonies and clashes
-    harmonies_clashes = find_harmonies_and_clashes(pillars)
 
-    # Calculate today's pillar
-    today_pillar = calculate_today_pillar(today_date)
-    today_stem, today_branch = today_pillar['day']
-    today_ten_god = calculate_ten_god(pillars['day'][0], today_stem)
+def write_good_days_ics(f, days: Iterable[Dict], name: str, uid: str, stamp: Optional[str] = None) -> int:
+    """
+    Write good_days() entries as an iCalendar file of all-day events.
 
-    # Find harmonies/clashes between today's pillar and birth pillars
-    extended_pillars = dict(pillars)
-    extended_pillars['today'] = (today_stem, today_branch)
-    today_interactions = find_harmonies_and_clashes(extended_pillars)
+    Args:
+        f: Text file opened with newline='' (lines end in CRLF)
+        days: good_days() entries
+        name: Calendar name (X-WR-CALNAME)
+        uid: Member id used in the event UIDs
+        stamp: DTSTAMP in UTC (YYYYMMDDTHHMMSSZ; default: now)
 
-    # Compile results
-    result = {
-        'input': {
-            'birthday': birthday,
-            'gender': gender,
-            'time_code': hour_code,
-            'time_name': HOUR_CODES[hour_code][0],
-            'today_date': today_date,
-        },
-        'four_pillars': {
-            'year': {
-                'stem': pillars['year'][0],
-                'branch': pillars['year'][1],
-                'stem_element': get_stem_element(pillars['year'][0]),
-                'branch_element': get_branch_element(pillars['year'][1]),
-                'stem_yinyang': get_stem_yinyang(pillars['year'][0]),
-            },
-            'month': {
-                'stem': pillars['month'][0],
-                'branch': pillars['month'][1],
-                'stem_element': get_stem_element(pillars['month'][0]),
-                'branch_element': get_branch_element(pillars['month'][1]),
-                'stem_yinyang': get_stem_yinyang(pillars['month'][0]),
-            },
-            'day': {
-                'stem': pillars['day'][0],
-                'branch': pillars['day'][1],
-                'stem_element': get_stem_element(pillars['day'][0]),
-                'branch_element': get_branch_element(pillars['day'][1]),
-                'stem_yinyang': get_stem_yinyang(pillars['day'][0]),
-            },
-            'hour': {
-                'stem': pillars['hour'][0],
-                'branch': pillars['hour'][1],
-                'stem_element': get_stem_element(pillars['hour'][0]) if pillars['hour'][0] != '모름' else '모름',
-                'branch_element': get_branch_element(pillars['hour'][1]) if pillars['hour'][1] != '모름' else '모름',
-                'stem_yinyang': get_stem_yinyang(pillars['hour'][0]) if pillars['hour'][0] != '모름' else '모름',
-            },
-        },
-        'ten_gods': ten_gods,
-        'harmonies_and_clashes': harmonies_clashes,
-        'today_pillar': {
-            'stem': today_stem,
-            'branch': today_branch,
-            'stem_element': get_stem_element(today_stem),
-            'branch_element': get_branch_element(today_branch),
-            'stem_yinyang': get_stem_yinyang(today_stem),
-            'ten_god_with_day_stem': today_ten_god,
-        },
-        'today_interactions': today_interactions,
-        'day_stem_info': {
-            'stem': pillars['day'][0],
-            'element': get_stem_element(pillars['day'][0]),
-            'yinyang': get_stem_yinyang(pillars['day'][0]),
-        }
-    }
+    Returns:
+        Number of events written
+    """
+    stamp = stamp or time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())
+    f.write(_ics_line('BEGIN:VCALENDAR'))
+    f.write(_ics_line('VERSION:2.0'))
+    f.write(_ics_line('PRODID:-//saju//good days//KO'))
+    f.write(_ics_line('CALSCALE:GREGORIAN'))
+    f.write(_ics_line(f"X-WR-CALNAME:{name.translate(_ICS_ESCAPES)}"))
+    # The text of an event only depends on the day pillar
+    bodies = {}
+    count = 0
+    for entry in days:
+        body = bodies.get(entry['pillar'])
+        if body is None:
+            summary = f"길일 {entry['score']:+d} ({entry['pillar']}일)"
+            description = ' · '.join([f"{entry['ten_god']}의 날"] + [GOOD_DAY_LABELS[k] for k in entry['relations']])
+            body = (_ics_line(f"DTSTAMP:{stamp}")
+                    + _ics_line(f"SUMMARY:{summary.translate(_ICS_ESCAPES)}")
+                    + _ics_line(f"DESCRIPTION:{description.translate(_ICS_ESCAPES)}")
+                    + _ics_line('END:VEVENT'))
+            bodies[entry['pillar']] = body
+        day = entry['date'].replace('-', '')
+        f.write(f"BEGIN:VEVENT\r\n{_ics_line(f'UID:{day}-{uid}@saju')}DTSTART;VALUE=DATE:{day}\r\n{body}")
+        count += 1
+    f.write(_ics_line('END:VCALENDAR'))
+    return count
+
+
+def write_good_days_json(f, days: Iterable[Dict], **meta) -> int:
+    """
+    Write good_days() entries as one JSON object, one day per line.
 
-    return result
+    meta (e.g. name, start, end, threshold) goes in front of the 'days'
+    list; days are written as they are produced.
+
+    Returns:
+        Number of days written
+    """
+    f.write(json.dumps(meta, ensure_ascii=False)[:-1] + (', ' if meta else '') + '"days": [')
+    count = 0
+    for entry in days:
+        f.write((',\n  ' if count else '\n  ') + json.dumps(entry, ensure_ascii=False))
+        count += 1
+    f.write('\n]}\n' if count else ']}\n')
+    return count
 
 
 # ============================================================================
@@ -702,6 +3979,10 @@ def pillars_to_string(pillars: Dict[str, Tuple[str, str]]) -> str:
 # ============================================================================
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ['batch']:
+        from saju_batch import batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+
     # Test case: Born 1990-05-15, male, 자시 (0), today 2026-04-05
     test_birthday = "1990-05-15"
     test_gender = "남"
@@ -743,35 +4024,35 @@ if __name__ == "__main__":
     for position in ['year', 'month', 'day', 'hour']:
         tg = ten_gods[position]
         if tg['stem'] != '모름':
-            print(f"  {position.upper():6} : {tg['ten_god']:4} ({tg['stem']}{tg['branch']})")
+            hidden = '·'.join(h['stem'] for h in tg['hidden_stems'])
+            print(f"  {position.upper():6} : {tg['ten_god']:4} / {tg['branch_ten_god']:4} "
+                  f"({tg['stem']}{tg['branch']}, 지장간 {hidden})")
+    print()
+
+    print("ELEMENT STRENGTH (오행):")
+    print("-" * 70)
+    es = result['element_strength']
+    print("  " + "  ".join(f"{el} {pct}%" for el, pct in es['distribution'].items()))
+    print(f"  {es['strength']} (support {es['support_ratio']}), favorable: {'·'.join(es['favorable_elements'])}")
+    print(f"  Today's affinity: {result['today_affinity']:+d}")
+    print()
+
+    print("신살 / 12운성:")
+    print("-" * 70)
+    for position, code in result['shinsal'].items():
+        stage, stars = decode_shinsal(code)
+        print(f"  {position.upper():6} : {stage:3} {' '.join(stars)}")
     print()
 
     print("HARMONIES AND CLASHES:")
     print("-" * 70)
     hc = result['harmonies_and_clashes']
-    if hc['heavenly_stem_harmony']:
-        print("  Heavenly Stem Harmonies (천간합):")
-        for item in hc['heavenly_stem_harmony']:
-            print(f"    {item['stems']}")
-    if hc['heavenly_stem_clash']:
-        print("  Heavenly Stem Clashes (천간충):")
-        for item in hc['heavenly_stem_clash']:
-            print(f"    {item['stems']}")
-    if hc['earthly_branch_six_harmony']:
-        print("  Earthly Branch Six Harmonies (지지육합):")
-        for item in hc['earthly_branch_six_harmony']:
-            print(f"    {item['branches']}")
-    if hc['earthly_branch_clash']:
-        print("  Earthly Branch Clashes (지지충):")
-        for item in hc['earthly_branch_clash']:
-            print(f"    {item['branches']}")
-    if hc['earthly_branch_three_harmony']:
-        print("  Earthly Branch Three Harmonies (지지삼합):")
-        for item in hc['earthly_branch_three_harmony']:
-            print(f"    {item['branches']}")
-    if not any([hc['heavenly_stem_harmony'], hc['heavenly_stem_clash'],
-                hc['earthly_branch_six_harmony'], hc['earthly_branch_clash'],
-                hc['earthly_branch_three_harmony']]):
+    for key, label, _, _ in RELATION_REGISTRY:
+        if hc.get(key):
+            print(f"  {label} ({key}):")
+            for item in hc[key]:
+                print(f"    {item.get('stems') or item['branches']}")
+    if not any(hc.values()):
         print("  None found")
     print()
 
@@ -779,6 +4060,6 @@ if __name__ == "__main__":
     print("-" * 70)
     today = result['today_pillar']
     print(f"  Date: {result['input']['today_date']}")
-    print(f"  Pillar: {today['stem']}{today['branch']} ({today['yinyang']} {today['element']})")
-    print(f"  Relationship with Day Stem: {today['ten_god_with_day_stem']}")
+    print(f"  Pillar: {today['stem']}{today['branch']} ({today['stem_yinyang']} {today['stem_element']})")
+    print(f"  Relationship with Day Stem: {today['ten_god_with_day_stem']} / {today['branch_ten_god_with_day_stem']}")
     print()
@@ -0,0 +1,207 @@
+"""
+Batch CLI for saju.py: python -m saju batch (or python saju_batch.py).
+
+Precomputes charts for a CSV/JSONL roster without Slack. Records are read
+lazily in chunks, chunks are computed in a process pool with a bounded
+number in flight, and results are written in input order, so memory stays
+flat however large the input is. Each output line is the input record plus
+a "saju" key (calculate_fortune_data dict, or FortuneResult.to_compact()
+with --output-mode compact).
+
+Kept out of saju.py so that importing the calculator does not pull in the
+CLI plumbing.
+"""
+
+from collections import deque
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from saju import (
+    HOUR_CONVENTIONS,
+    ZI_MODES,
+    calculate_fortune,
+    calculate_fortune_data,
+    calculate_fortune_data_batch,
+    parse_date,
+    set_hour_convention,
+    set_relation_rules,
+)
+
+BATCH_ENGINES = ('scalar', 'vector')
+BATCH_FIELDS = ('birthday', 'gender', 'time_code', 'today', 'birth_time', 'birthplace')
+
+
+def _read_records(path: str, fmt: str) -> Iterator[Dict]:
+    """Stream input records from a CSV (header row) or JSONL file ('-' = stdin)."""
+    f = sys.stdin if path == '-' else open(path, encoding='utf-8', newline='')
+    try:
+        if fmt == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _chunked(records: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _record_inputs(record: Dict, today: str) -> Tuple[str, str, str, str, Optional[str], Optional[str]]:
+    """calculate_fortune arguments of a record; a bad time code becomes '13' (invalid)."""
+    time_code = str(record.get('time_code', '12')).strip()
+    if not time_code.isdigit():
+        time_code = '13'
+    return (str(record.get('birthday') or ''), str(record.get('gender') or ''), time_code,
+            str(record.get('today') or today), record.get('birth_time') or None, record.get('birthplace') or None)
+
+
+def _batch_chunk(records: List[Dict], engine: str, today: str, compact: bool) -> Tuple[List[str], int]:
+    """Compute one chunk; returns its JSONL lines and the number of failed records."""
+    inputs = [_record_inputs(record, today) for record in records]
+    if engine == 'vector':
+        results = [None] * len(records)
+        by_today: Dict[str, List[int]] = {}
+        for i, args in enumerate(inputs):
+            by_today.setdefault(args[3], []).append(i)
+        for day, rows in by_today.items():
+            batch = calculate_fortune_data_batch(
+                [inputs[i][0] for i in rows], [inputs[i][2] for i in rows], day,
+                [inputs[i][1] for i in rows], as_results=True,
+                birth_times=[inputs[i][4] for i in rows], birthplaces=[inputs[i][5] for i in rows],
+            )
+            for i, result in zip(rows, batch):
+                results[i] = result.to_compact() if compact else result.to_dict()
+    elif compact:
+        results = [calculate_fortune(*args).to_compact() for args in inputs]
+    else:
+        results = [calculate_fortune_data(*args) for args in inputs]
+
+    lines = [json.dumps(dict(record, saju=result), ensure_ascii=False) for record, result in zip(records, results)]
+    return lines, sum('error' in result for result in results)
+
+
+def _init_batch_worker(disabled_rules: Tuple[str, ...], hour_convention: Tuple[Optional[str], Optional[str]]) -> None:
+    """Apply the run's rule and hour settings (in each worker process)."""
+    set_relation_rules(disabled=disabled_rules)
+    set_hour_convention(*hour_convention)
+
+
+def run_batch(
+    records: Iterable[Dict],
+    engine: str = 'vector',
+    today: Optional[str] = None,
+    compact: bool = False,
+    workers: int = 0,
+    chunk_size: int = 1000,
+    disabled_rules: Iterable[str] = (),
+    hour_convention: Tuple[Optional[str], Optional[str]] = (None, None),
+) -> Iterator[Tuple[List[str], int]]:
+    """
+    Compute records chunk by chunk, yielding (JSONL lines, errors) in input order.
+
+    Args:
+        records: Input records with BATCH_FIELDS keys (extra keys are kept)
+        engine: 'scalar' (per-record reference path) or 'vector' (NumPy batch)
+        today: Default today_date for records without one (default: today)
+        compact: Emit FortuneResult.to_compact() instead of the full dict
+        workers: Worker processes; 0 computes in this process
+        chunk_size: Records per task
+        disabled_rules: RELATION_KEYS to switch off (see set_relation_rules)
+        hour_convention: (convention, zi_mode) for exact birth times (see set_hour_convention)
+    """
+    if engine not in BATCH_ENGINES:
+        raise ValueError(f"Unknown engine: {engine} (expected one of {', '.join(BATCH_ENGINES)})")
+    today = today or date.today().isoformat()
+    disabled_rules = tuple(disabled_rules)
+    chunks = _chunked(records, chunk_size)
+
+    if workers <= 0:
+        _init_batch_worker(disabled_rules, hour_convention)
+        for chunk in chunks:
+            yield _batch_chunk(chunk, engine, today, compact)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(workers, initializer=_init_batch_worker, initargs=(disabled_rules, hour_convention)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_batch_chunk, chunk, engine, today, compact))
+            # Bounded window: at most two chunks per worker are held in memory
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def batch_main(argv: List[str]) -> int:
+    """Entry point of python -m saju batch."""
+    parser = argparse.ArgumentParser(prog='python -m saju batch', description='Precompute saju charts for a roster.')
+    parser.add_argument('input', help="CSV or JSONL file ('-' = stdin) with birthday, gender, time_code"
+                                      "[, today, birth_time, birthplace]")
+    parser.add_argument('-o', '--output', default='-', help="JSONL output file ('-' = stdout)")
+    parser.add_argument('--format', choices=('csv', 'jsonl'), help='Input format (default: from the extension)')
+    parser.add_argument('--engine', choices=BATCH_ENGINES, default='vector')
+    parser.add_argument('--output-mode', choices=('full', 'compact'), default='full')
+    parser.add_argument('--today', help='today_date for records without one (default: today)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes (0 = no pool)')
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--disable-rules', default='', help='Comma-separated RELATION_KEYS to switch off')
+    parser.add_argument('--hour-convention', choices=list(HOUR_CONVENTIONS), help='Boundaries for birth_time (default: solar)')
+    parser.add_argument('--zi-mode', choices=ZI_MODES, help='Late 자시 handling for birth_time (default: 조자시)')
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ('csv' if args.input.lower().endswith('.csv') else 'jsonl')
+    today = args.today or date.today().isoformat()
+    disabled = [k.strip() for k in args.disable_rules.split(',') if k.strip()]
+    # Validate before any work starts
+    try:
+        parse_date(today)
+    except ValueError as e:
+        parser.error(f"--today: {e}")
+    try:
+        set_relation_rules(disabled=disabled)
+    except ValueError as e:
+        parser.error(f"--disable-rules: {e}")
+
+    start = time.perf_counter()
+    records = errors = 0
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        for lines, failed in run_batch(_read_records(args.input, fmt), args.engine, today,
+                                       args.output_mode == 'compact', args.workers, args.chunk_size, disabled,
+                                       (args.hour_convention, args.zi_mode)):
+            out.write('\n'.join(lines) + '\n')
+            records += len(lines)
+            errors += failed
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"{records} records ({errors} errors) in {elapsed:.2f}s: {records / elapsed if elapsed else 0:,.0f} records/s "
+        f"[engine={args.engine}, workers={args.workers}, chunk={args.chunk_size}]",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(batch_main(sys.argv[1:]))
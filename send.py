@@ -35,6 +35,8 @@ def load_config() -> Dict[str, Any]:
         "channel_id": env("SLACK_CHANNEL_ID", required=True),
         "admin_user_ids": parse_admin_ids(env("ADMIN_USER_IDS", "")),
         "output_dir": env("OUTPUT_DIR", "output"),
+        "send_leaderboard": env_bool("SEND_LEADERBOARD", False),
+        "send_team_fortune": env_bool("SEND_TEAM_FORTUNE", False),
     }
 
 
@@ -105,6 +107,16 @@ def send_fortune_admin_only(
     print(f"  → 관리자 DM 전송: {name} → {admin_uid}")
 
 
+def format_leaderboard(leaderboard: List[Dict[str, Any]], today_pretty: str) -> str:
+    """
+    오늘의 기운 점수 순위 메시지를 만듭니다.
+    """
+    lines = [f"{today_pretty} 오늘의 기운 순위"]
+    for entry in leaderboard:
+        lines.append(f"{entry['rank']}. {entry['name']} {entry['score']:+d}점 ({entry['strength']})")
+    return "\n".join(lines)
+
+
 # ============================================================================
 # Main
 # ============================================================================
@@ -206,6 +218,32 @@ def run() -> None:
             )
             continue
 
+    # 기운 점수 순위 (SEND_LEADERBOARD=1)
+    leaderboard = data.get("leaderboard", [])
+    if cfg["send_leaderboard"] and leaderboard:
+        text = format_leaderboard(leaderboard, today_pretty)
+        try:
+            if test_mode in ("single", "all"):
+                slack_post(cfg["slack_token"], slack_open_dm(cfg["slack_token"], cfg["admin_user_ids"][0]), text)
+            else:
+                slack_post(cfg["slack_token"], cfg["channel_id"], text)
+            print("  → 기운 순위 전송 완료")
+        except Exception as e:
+            print(f"  → 기운 순위 전송 실패: {e}")
+
+    # 팀 오늘의 기운 (SEND_TEAM_FORTUNE=1)
+    team_fortune = data.get("team_fortune") or {}
+    if cfg["send_team_fortune"] and team_fortune.get("status") == "ok":
+        text = f"{today_pretty} 팀 오늘의 기운\n\n{team_fortune['fortune_text']}"
+        try:
+            if test_mode in ("single", "all"):
+                slack_post(cfg["slack_token"], slack_open_dm(cfg["slack_token"], cfg["admin_user_ids"][0]), text)
+            else:
+                slack_post(cfg["slack_token"], cfg["channel_id"], text)
+            print("  → 팀 오늘의 기운 전송 완료")
+        except Exception as e:
+            print(f"  → 팀 오늘의 기운 전송 실패: {e}")
+
     print(f"\n=== SEND COMPLETE ===")
     print(f"Sent: {sent_count}/{len(ok_fortunes)}")
 
@@ -0,0 +1,297 @@
+"""
+Tests for saju.py.
+
+The reference charts come from the published 만세력 (KASI 절입 times and
+lunar calendar) or from an independent low-precision solar position, not
+from this implementation. tools/saju_corpus.json pins the full result of
+every corpus chart against unintended output changes; regenerate it with
+python tools/bench_saju.py corpus only for an intended change.
+
+Run with: python -m pytest -q
+"""
+
+import json
+import math
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+import saju  # noqa: E402
+from bench_saju import CORPUS_PATH, CORPUS_VERSION, corpus_entry, digest  # noqa: E402
+
+TODAY = "2026-04-05"
+
+
+@pytest.fixture(autouse=True)
+def default_rules():
+    """Every test starts and ends with the default hour convention and relation rules."""
+    saju.set_hour_convention("solar", "조자시")
+    saju.set_relation_rules()
+    yield
+    saju.set_hour_convention("solar", "조자시")
+    saju.set_relation_rules()
+
+
+def chart_pillars(birthday, birth_time, birthplace="서울"):
+    """Year/month/day/hour pillars ("갑자", ...) of an exact birth time."""
+    result = saju.calculate_fortune_data(birthday, "남", "12", TODAY, birth_time, birthplace)
+    assert "error" not in result, result
+    return tuple(result["four_pillars"][pos]["stem"] + result["four_pillars"][pos]["branch"]
+                 for pos in saju.POSITIONS)
+
+
+def shift_time(birthday, clock, minutes):
+    """(date, HH:MM) minutes away from a clock time (within the same day)."""
+    hour, minute = map(int, clock.split(":"))
+    total = hour * 60 + minute + minutes
+    assert 0 <= total < 1440
+    return birthday, "%02d:%02d" % divmod(total, 60)
+
+
+# ============================================================================
+# Reference charts (만세력)
+# ============================================================================
+
+DAY_PILLARS = {
+    "1900-01-01": "갑술",
+    "2000-01-01": "무오",
+    "2024-01-01": "갑자",
+}
+
+
+@pytest.mark.parametrize("date_str,pillar", DAY_PILLARS.items())
+def test_day_pillar(date_str, pillar):
+    assert "".join(saju.calculate_day_pillar(date_str)) == pillar
+
+
+# 2024 절입 (KST) with the month pillar before and after it; 입춘 also
+# changes the year from 계묘 to 갑진
+TERMS_2024 = [
+    ("소한", "2024-01-06", "05:49", "갑자", "을축"),
+    ("입춘", "2024-02-04", "17:27", "을축", "병인"),
+    ("경칩", "2024-03-05", "11:23", "병인", "정묘"),
+    ("청명", "2024-04-04", "16:02", "정묘", "무진"),
+    ("입하", "2024-05-05", "09:10", "무진", "기사"),
+    ("망종", "2024-06-05", "13:10", "기사", "경오"),
+    ("소서", "2024-07-06", "23:20", "경오", "신미"),
+    ("입추", "2024-08-07", "09:09", "신미", "임신"),
+    ("백로", "2024-09-07", "12:11", "임신", "계유"),
+    ("한로", "2024-10-08", "04:00", "계유", "갑술"),
+    ("입동", "2024-11-07", "07:20", "갑술", "을해"),
+    ("대설", "2024-12-07", "00:17", "을해", "병자"),
+]
+
+
+@pytest.mark.parametrize("term,birthday,clock,before,after", TERMS_2024, ids=[t[0] for t in TERMS_2024])
+def test_month_pillar_changes_at_solar_term(term, birthday, clock, before, after):
+    assert chart_pillars(*shift_time(birthday, clock, -10))[1] == before
+    assert chart_pillars(*shift_time(birthday, clock, 10))[1] == after
+
+
+# 입춘 (KST): year and month pillars just before and just after
+IPCHUN = [
+    ("1990-02-04", "11:14", ("기사", "정축"), ("경오", "무인")),
+    ("2000-02-04", "21:40", ("기묘", "정축"), ("경진", "무인")),
+    ("2023-02-04", "11:42", ("임인", "계축"), ("계묘", "갑인")),
+    ("2024-02-04", "17:27", ("계묘", "을축"), ("갑진", "병인")),
+    ("2025-02-03", "23:10", ("갑진", "정축"), ("을사", "무인")),
+]
+
+
+@pytest.mark.parametrize("birthday,clock,before,after", IPCHUN, ids=[row[0][:4] for row in IPCHUN])
+def test_year_pillar_changes_at_ipchun(birthday, clock, before, after):
+    assert chart_pillars(*shift_time(birthday, clock, -10))[:2] == before
+    assert chart_pillars(*shift_time(birthday, clock, 10))[:2] == after
+
+
+# 자/축 are the 11th/12th months of the saju year; restarting the stem
+# cycle at 자 would give 임자/계축 for the 계묘 year. 1899 and 2101 are
+# outside the 절입 table (approximate boundaries).
+@pytest.mark.parametrize("birthday,month", [
+    ("2023-12-20", "갑자"),
+    ("2024-01-20", "을축"),
+    ("1984-01-15", "을축"),
+    ("2024-03-20", "정묘"),
+    ("1899-12-20", "병자"),
+    ("2101-01-20", "기축"),
+])
+def test_month_stem_follows_year_stem(birthday, month):
+    assert "".join(saju.calculate_four_pillars(birthday, 12)["month"]) == month
+
+
+# Without an exact time, an hour code stands for the middle of its clock
+# double-hour (main.TIME_CODE_TO_LABEL): 신시 15:30-17:29 -> 16:30, after
+# 청명 at 16:02; 자시 23:30-01:29 -> 00:30, after 대설 at 00:17
+@pytest.mark.parametrize("birthday,hour_code,month", [
+    ("2024-04-04", 7, "정묘"),
+    ("2024-04-04", 8, "무진"),
+    ("2024-12-07", 0, "병자"),
+])
+def test_hour_code_solar_term_moment(birthday, hour_code, month):
+    assert "".join(saju.calculate_four_pillars(birthday, hour_code)["month"]) == month
+    columns = saju.calculate_fortune_data_batch([birthday], [hour_code], TODAY)
+    assert columns["pillars"][0, 1] == saju.pillar_index(saju.stem_to_index(month[0]), saju.branch_to_index(month[1]))
+
+
+# 2024-02-09 is 계묘 day, 2024-02-10 갑진 day. Under the clock convention
+# 자시 starts at 23:30; 23:50 is late 자시 and its hour pillar is 갑자 (the
+# 자시 of a 갑 day) in both modes. 조자시 moves the day pillar to 갑진,
+# 야자시 keeps 계묘.
+@pytest.mark.parametrize("zi_mode,birth_time,day,hour", [
+    ("조자시", "23:20", "계묘", "계해"),
+    ("야자시", "23:20", "계묘", "계해"),
+    ("조자시", "23:50", "갑진", "갑자"),
+    ("야자시", "23:50", "계묘", "갑자"),
+])
+def test_late_zi(zi_mode, birth_time, day, hour):
+    saju.set_hour_convention("clock", zi_mode)
+    assert chart_pillars("2024-02-09", birth_time, 135.0)[2:] == (day, hour)
+
+
+# (solar date, lunar year, month, day, leap month): 설날, 추석 and the
+# first day of leap months
+LUNAR_DATES = [
+    ("1990-01-27", 1990, 1, 1, False),
+    ("2000-02-05", 2000, 1, 1, False),
+    ("2023-01-22", 2023, 1, 1, False),
+    ("2024-02-10", 2024, 1, 1, False),
+    ("2025-01-29", 2025, 1, 1, False),
+    ("2023-09-29", 2023, 8, 15, False),
+    ("2024-09-17", 2024, 8, 15, False),
+    ("2025-10-06", 2025, 8, 15, False),
+    ("2012-04-21", 2012, 3, 1, True),
+    ("2014-10-24", 2014, 9, 1, True),
+    ("2017-06-24", 2017, 5, 1, True),
+    ("2020-05-23", 2020, 4, 1, True),
+    ("2023-03-22", 2023, 2, 1, True),
+    ("2025-07-25", 2025, 6, 1, True),
+]
+
+
+@pytest.mark.parametrize("solar,year,month,day,leap", LUNAR_DATES, ids=[row[0] for row in LUNAR_DATES])
+def test_lunar_calendar(solar, year, month, day, leap):
+    assert saju.solar_to_lunar(*saju.parse_date(solar)) == (year, month, day, leap)
+    assert saju.lunar_to_solar(year, month, day, leap) == saju.parse_date(solar)
+
+
+def test_no_such_leap_month():
+    with pytest.raises(ValueError):
+        saju.lunar_to_solar(2024, 2, 1, True)
+
+
+# ============================================================================
+# Independent solar position
+# ============================================================================
+
+def apparent_solar_longitude(kst_minute):
+    """
+    Apparent solar longitude in degrees (Meeus, Astronomical Algorithms
+    ch. 25, low precision: ~0.01°, i.e. ~15 minutes of a 절입 time).
+    """
+    jd = 2415020.5 + (kst_minute - 9 * 60) / 1440  # 1900-01-01 00:00 UT
+    t = (jd - 2451545.0) / 36525
+    l0 = 280.46646 + 36000.76983 * t + 0.0003032 * t * t
+    m = math.radians(357.52911 + 35999.05029 * t - 0.0001537 * t * t)
+    c = ((1.914602 - 0.004817 * t - 0.000014 * t * t) * math.sin(m)
+         + (0.019993 - 0.000101 * t) * math.sin(2 * m) + 0.000289 * math.sin(3 * m))
+    omega = math.radians(125.04 - 1934.136 * t)
+    return (l0 + c - 0.00569 - 0.00478 * math.sin(omega)) % 360
+
+
+# Stem of the 인 month by year stem (갑기 -> 병인, 을경 -> 무인, ...)
+IN_MONTH_STEM = {"갑": "병", "기": "병", "을": "무", "경": "무", "병": "경", "신": "경",
+                 "정": "임", "임": "임", "무": "갑", "계": "갑"}
+STEMS = "갑을병정무기경신임계"
+BRANCHES = "자축인묘진사오미신유술해"
+
+
+def test_year_and_month_pillars_follow_solar_longitude():
+    rng = random.Random(20260405)
+    checked = 0
+    while checked < 500:
+        # Korean clocks ran on UTC+9 without DST over these years
+        year = rng.choice([y for y in range(1962, 2100) if y not in (1987, 1988)])
+        # Half of the days fall in the week around the month's 절
+        day = rng.randint(3, 9) if rng.random() < 0.5 else rng.randint(1, 28)
+        birthday = "%04d-%02d-%02d" % (year, rng.randint(1, 12), day)
+        minute_of_day = rng.randrange(1440)
+        kst_minute = (saju.days_from_civil(*saju.parse_date(birthday)) - saju._CIVIL_1900) * 1440 + minute_of_day
+        longitude = apparent_solar_longitude(kst_minute)
+        # 절 are at 15° + 30°k; skip moments within ~1.2 hours of one
+        offset = (longitude - 15) % 30
+        if min(offset, 30 - offset) < 0.05:
+            continue
+
+        months_from_in = int((longitude - 315) % 360 // 30)
+        saju_year = year - (birthday[5:7] <= "02" and months_from_in >= 10)
+        year_pillar = STEMS[(saju_year - 1984) % 10] + BRANCHES[(saju_year - 1984) % 12]
+        month_stem = STEMS[(STEMS.index(IN_MONTH_STEM[year_pillar[0]]) + months_from_in) % 10]
+        month_pillar = month_stem + BRANCHES[(2 + months_from_in) % 12]
+
+        clock = "%02d:%02d" % divmod(minute_of_day, 60)
+        assert chart_pillars(birthday, clock)[:2] == (year_pillar, month_pillar), (birthday, clock)
+        checked += 1
+
+
+# ============================================================================
+# Corpus (tools/saju_corpus.json)
+# ============================================================================
+
+with open(CORPUS_PATH, encoding="utf-8") as f:
+    CORPUS = json.load(f)
+
+
+def corpus_id(chart):
+    parts = [chart["birthday"], chart["time_code"], chart["today"]]
+    if chart.get("birth_time") is not None:
+        parts += [chart["birth_time"], chart["hour_convention"], chart["zi_mode"]]
+    return "/".join(map(str, parts))
+
+
+def test_corpus_version():
+    assert CORPUS["version"] == CORPUS_VERSION
+
+
+@pytest.mark.parametrize("expected", CORPUS["charts"], ids=corpus_id)
+def test_corpus_chart(expected):
+    actual = corpus_entry(
+        expected["birthday"], expected["gender"], expected["time_code"], expected["today"],
+        expected.get("birth_time"), expected.get("birthplace"),
+        expected.get("hour_convention"), expected.get("zi_mode"),
+    )
+    assert actual == expected
+
+
+def corpus_groups():
+    """Corpus charts grouped by (today, hour convention, 자시 mode)."""
+    groups = {}
+    for chart in CORPUS["charts"]:
+        key = (chart["today"], chart.get("hour_convention") or "solar", chart.get("zi_mode") or "조자시")
+        groups.setdefault(key, []).append(chart)
+    return sorted(groups.items())
+
+
+CORPUS_GROUPS = corpus_groups()
+
+
+@pytest.mark.parametrize("key,group", CORPUS_GROUPS, ids=["/".join(key) for key, _ in CORPUS_GROUPS])
+def test_batch_matches_corpus(key, group):
+    today, convention, zi_mode = key
+    saju.set_hour_convention(convention, zi_mode)
+    args = ([c["birthday"] for c in group], [c["time_code"] for c in group], today, [c["gender"] for c in group])
+    kwargs = {
+        "birth_times": [c.get("birth_time") for c in group],
+        "birthplaces": [c.get("birthplace") for c in group],
+    }
+    dicts = saju.calculate_fortune_data_batch(*args, as_dicts=True, **kwargs)
+    compact = [saju.FortuneResult.from_compact(json.loads(json.dumps(r.to_compact()))).to_dict()
+               for r in saju.calculate_fortune_data_batch(*args, as_results=True, **kwargs)]
+    for chart, batch_dict, compact_dict in zip(group, dicts, compact):
+        assert digest(batch_dict) == chart["digest"], corpus_id(chart)
+        assert digest(compact_dict) == chart["digest"], corpus_id(chart)
@@ -0,0 +1,310 @@
+"""
+Benchmarks and the regression corpus for saju.py.
+
+bench   times the public functions at roster sizes 1 .. 100k and reports
+        ops/sec plus allocations (tracemalloc, measured in a separate pass
+        so it does not slow the timed one). Results are written as JSON;
+        --compare prints the speedup against an earlier results file.
+
+corpus  rewrites tools/saju_corpus.json from the current implementation.
+        Only do this for an intended output change, and review the diff.
+        tests/test_saju.py checks every corpus chart (scalar, batch and
+        FortuneResult paths) against it.
+
+Inputs are generated from a fixed seed, so runs are comparable.
+
+Usage:
+    python tools/bench_saju.py bench [--sizes 1,100,10000] [--output bench.json]
+                                     [--compare old.json] [--no-alloc]
+    python tools/bench_saju.py corpus
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import saju  # noqa: E402
+
+CORPUS_PATH = os.path.join(ROOT, "tools", "saju_corpus.json")
+CORPUS_VERSION = 2
+DEFAULT_SIZES = [1, 10, 100, 1000, 10000, 100000]
+SEED = 20260405
+TODAY = "2026-04-05"
+
+# ============================================================================
+# Inputs
+# ============================================================================
+
+def random_roster(size: int, seed: int = SEED):
+    """(birthdays, time_codes, genders) for a deterministic random roster."""
+    rng = random.Random(seed)
+    birthdays, time_codes, genders = [], [], []
+    for _ in range(size):
+        year = rng.randint(1940, 2010)
+        month = rng.randint(1, 12)
+        day = rng.randint(1, 28)
+        birthdays.append(f"{year:04d}-{month:02d}-{day:02d}")
+        time_codes.append(str(rng.randint(0, 12)))
+        genders.append(rng.choice(["남", "여"]))
+    return birthdays, time_codes, genders
+
+
+def corpus_inputs():
+    """Corpus charts: random ones plus the boundaries that broke before."""
+    birthdays, time_codes, genders = random_roster(200, seed=SEED + 1)
+    inputs = [(b, g, t, TODAY) for b, t, g in zip(birthdays, time_codes, genders)]
+
+    edges = [
+        "1900-01-01", "1900-01-05", "1900-01-06", "1900-02-04", "1900-02-05",
+        "1899-12-31", "2100-12-31", "2101-01-01", "2000-01-01", "2000-02-29",
+        "1996-02-04", "1996-02-05", "1984-02-04", "1988-02-29", "2024-02-04",
+        "2024-02-10", "1970-01-01", "1955-06-06", "2012-12-07", "1993-11-07",
+    ]
+    for i, birthday in enumerate(edges):
+        for time_code in ("0", "6", "11", "12"):
+            inputs.append((birthday, "남" if i % 2 else "여", time_code, TODAY))
+
+    # Today's side: 입춘/절 days and the calendar ends
+    for today in ("1900-01-01", "1950-02-04", "2024-02-04", "2026-10-18", "2100-12-31", "2150-01-01"):
+        inputs.append(("1990-05-15", "남", "3", today))
+
+    # Exact birth times under every hour convention and 자시 mode: 자시 and
+    # hour boundaries, 절입 days, the UTC+8:30 / DST eras, local mean time
+    # before 1908 and numeric birthplaces
+    exact = [
+        ("1990-05-05", "07:45", "부산"),
+        ("1990-05-15", "23:10", None),
+        ("1990-05-15", "23:40", "서울"),
+        ("1990-05-15", "00:20", "광주"),
+        ("1990-05-15", "01:25", 126.5),
+        ("1996-02-04", "22:50", None),
+        ("1996-02-04", "23:59", "부산"),
+        ("1984-02-04", "23:30", "서울"),
+        ("1955-06-06", "12:29", "대구"),
+        ("1987-07-01", "00:45", "서울"),
+        ("1905-03-01", "11:15", "평양"),
+        ("1999-12-31", "23:45", "제주"),
+        ("2000-02-29", "05:31", "인천"),
+        ("1990-05-15", "7:5", None),
+        ("1990-05-15", "09:30", "nowhere"),
+    ]
+    for convention in ("solar", "clock"):
+        for zi_mode in ("조자시", "야자시"):
+            for i, (birthday, birth_time, birthplace) in enumerate(exact):
+                inputs.append((birthday, "남" if i % 2 else "여", "12", TODAY,
+                               birth_time, birthplace, convention, zi_mode))
+
+    # Inputs that must fail validation
+    inputs += [
+        ("1990-5-15", "남", "3", TODAY),
+        ("1990-02-30", "여", "3", TODAY),
+        ("0000-02-29", "남", "3", TODAY),
+        ("1990-05-15", "남", "13", TODAY),
+        ("1990-05-15", "", "12", "2026-13-01"),
+    ]
+    return inputs
+
+
+def digest(data) -> str:
+    """Short stable digest of a result dict."""
+    text = json.dumps(data, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def corpus_entry(birthday: str, gender: str, time_code: str, today: str, birth_time=None, birthplace=None,
+                 hour_convention=None, zi_mode=None):
+    saju.set_hour_convention(hour_convention or "solar", zi_mode or "조자시")
+    try:
+        result = saju.calculate_fortune_data(birthday, gender, time_code, today, birth_time, birthplace)
+    finally:
+        saju.set_hour_convention("solar", "조자시")
+    entry = {"birthday": birthday, "gender": gender, "time_code": time_code, "today": today}
+    if birth_time is not None:
+        entry.update(birth_time=birth_time, birthplace=birthplace, hour_convention=hour_convention, zi_mode=zi_mode)
+    if "error" in result:
+        entry["error"] = result["error"]
+    else:
+        entry["pillars"] = [
+            result["four_pillars"][pos]["stem"] + result["four_pillars"][pos]["branch"]
+            for pos in saju.POSITIONS
+        ]
+        entry["today_pillar"] = result["today_pillar"]["stem"] + result["today_pillar"]["branch"]
+    entry["digest"] = digest(result)
+    return entry
+
+
+# ============================================================================
+# Corpus
+# ============================================================================
+
+def write_corpus() -> None:
+    charts = [corpus_entry(*args) for args in corpus_inputs()]
+    with open(CORPUS_PATH, "w", encoding="utf-8") as f:
+        json.dump({"version": CORPUS_VERSION, "charts": charts}, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+    print(f"Wrote {len(charts)} charts to {CORPUS_PATH}")
+
+
+# ============================================================================
+# Benchmarks
+# ============================================================================
+
+def bench_cases(size: int):
+    """(name, callable) pairs that each process a roster of the given size."""
+    birthdays, time_codes, genders = random_roster(size)
+    pillars = [saju.calculate_four_pillars(b, int(t)) for b, t in zip(birthdays, time_codes)]
+
+    def day_pillar():
+        for b in birthdays:
+            saju.calculate_day_pillar(b)
+
+    def four_pillars():
+        for b, t in zip(birthdays, time_codes):
+            saju.calculate_four_pillars(b, int(t))
+
+    def harmonies():
+        for p in pillars:
+            saju.find_harmonies_and_clashes(p)
+
+    def fortune_data():
+        for b, t, g in zip(birthdays, time_codes, genders):
+            saju.calculate_fortune_data(b, g, t, TODAY)
+
+    def fortune_data_cold():
+        saju.get_natal_chart.cache_clear()
+        fortune_data()
+
+    def fortune_data_batch():
+        saju.calculate_fortune_data_batch(birthdays, time_codes, TODAY, genders)
+
+    def fortune_results_batch():
+        saju.calculate_fortune_data_batch(birthdays, time_codes, TODAY, genders, as_results=True)
+
+    return [
+        ("calculate_day_pillar", day_pillar),
+        ("calculate_four_pillars", four_pillars),
+        ("find_harmonies_and_clashes", harmonies),
+        ("calculate_fortune_data", fortune_data),
+        ("calculate_fortune_data (cold cache)", fortune_data_cold),
+        ("calculate_fortune_data_batch", fortune_data_batch),
+        ("calculate_fortune_data_batch (as_results)", fortune_results_batch),
+    ]
+
+
+def time_call(fn, min_seconds: float = 0.2) -> float:
+    """Best-of-3 seconds per call; short calls are repeated to fill min_seconds."""
+    fn()  # warm caches and lazy tables
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds or loops >= 1 << 16:
+            break
+        loops *= 2
+    best = elapsed / loops
+    for _ in range(2):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best
+
+
+def measure_allocations(fn):
+    """(peak bytes, blocks still allocated after the call) of one call."""
+    fn()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    return peak, blocks
+
+
+def run_bench(sizes, with_alloc: bool):
+    results = []
+    for size in sizes:
+        for name, fn in bench_cases(size):
+            seconds = time_call(fn)
+            row = {
+                "function": name,
+                "size": size,
+                "seconds": seconds,
+                "ops_per_sec": size / seconds,
+            }
+            if with_alloc:
+                row["alloc_peak_bytes"], row["alloc_retained_blocks"] = measure_allocations(fn)
+            results.append(row)
+            alloc = f"  peak {row['alloc_peak_bytes'] / 1024:10.1f} KiB" if with_alloc else ""
+            print(f"{name:44} n={size:<7} {row['ops_per_sec']:14,.0f} ops/s{alloc}")
+    return results
+
+
+def compare(results, path: str) -> None:
+    with open(path, encoding="utf-8") as f:
+        old = {(r["function"], r["size"]): r for r in json.load(f)["results"]}
+    print(f"\nSpeedup vs {path}:")
+    for row in results:
+        prev = old.get((row["function"], row["size"]))
+        if prev:
+            print(f"{row['function']:44} n={row['size']:<7} x{row['ops_per_sec'] / prev['ops_per_sec']:.2f}")
+
+
+def bench_meta():
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": numpy_version,
+        "platform": platform.platform(),
+        "today": TODAY,
+        "seed": SEED,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="saju.py benchmarks and regression corpus")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench = sub.add_parser("bench")
+    bench.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    bench.add_argument("--output", default="bench_saju.json")
+    bench.add_argument("--compare")
+    bench.add_argument("--no-alloc", action="store_true")
+    sub.add_parser("corpus")
+    args = parser.parse_args()
+
+    if args.command == "corpus":
+        write_corpus()
+    else:
+        sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+        results = run_bench(sizes, not args.no_alloc)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": bench_meta(), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\nResults saved to {args.output}")
+        if args.compare:
+            compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
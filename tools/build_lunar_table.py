@@ -0,0 +1,146 @@
+"""
+Build LUNAR_YEAR_INFO for saju.py - the packed Korean lunar calendar table.
+
+Each lunar year 1900-2100 is derived from astronomical new moons and 중기
+(principal solar terms) computed with PyEphem, on Korean standard time
+(fixed UTC+9):
+- a month starts on the KST day of a new moon
+- the month containing 동지 (winter solstice) is the 11th month
+- in a year with 13 months between two 11th months, the first month that
+  contains no 중기 is the leap month (윤달) and repeats the previous number
+
+Packed format per year (one int):
+    bits 0-3    leap month number (0 = no leap month)
+    bit  4      leap month has 30 days
+    bits 5-16   month 1..12 has 30 days (bit 5 = month 1)
+    bits 17-22  day of the solar year (0 = Jan 1) of lunar new year's day
+
+The script prints the Python literal to paste into saju.py.
+
+Usage:
+    pip install ephem
+    python tools/build_lunar_table.py
+"""
+
+import math
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+FIRST_YEAR = 1900
+LAST_YEAR = 2100
+KST_OFFSET = timedelta(hours=9)
+
+
+def kst_date(ephem, d):
+    """KST calendar date of an ephem.Date (UT)."""
+    return (ephem.Date(d).datetime() + KST_OFFSET).date()
+
+
+def sun_longitude(ephem, d) -> float:
+    sun = ephem.Sun(d)
+    ecl = ephem.Ecliptic(ephem.Equatorial(sun.ra, sun.dec, epoch=d))
+    return math.degrees(float(ecl.lon))
+
+
+def find_longitude(ephem, longitude: float, guess):
+    d = ephem.Date(guess)
+    for _ in range(50):
+        diff = (longitude - sun_longitude(ephem, d) + 180.0) % 360.0 - 180.0
+        if abs(diff) < 1e-7:
+            break
+        d = ephem.Date(d + diff / 0.9856)
+    return d
+
+
+def principal_terms(ephem, start_year: int, end_year: int):
+    """KST dates of every 중기 (multiples of 30 degrees) between the years."""
+    dates = []
+    d = ephem.Date(datetime(start_year, 1, 1))
+    end = ephem.Date(datetime(end_year + 1, 1, 1))
+    lon = (math.floor(sun_longitude(ephem, d) / 30.0) + 1) * 30 % 360
+    while d < end:
+        d = find_longitude(ephem, lon, d + 30.4 * ((lon - sun_longitude(ephem, d)) % 360) / 30.0)
+        dates.append((kst_date(ephem, d), lon))
+        lon = (lon + 30) % 360
+    return dates
+
+
+def new_moons(ephem, start_year: int, end_year: int):
+    """KST start dates of every lunar month between the years."""
+    dates = []
+    d = ephem.next_new_moon(datetime(start_year, 1, 1))
+    end = ephem.Date(datetime(end_year + 1, 1, 1))
+    while d < end:
+        dates.append(kst_date(ephem, d))
+        d = ephem.next_new_moon(d + 1)
+    return dates
+
+
+def build():
+    try:
+        import ephem
+    except ImportError:
+        raise RuntimeError("ephem package not installed. Run: pip install ephem")
+
+    moons = new_moons(ephem, FIRST_YEAR - 2, LAST_YEAR + 3)
+    terms = principal_terms(ephem, FIRST_YEAR - 2, LAST_YEAR + 2)
+    winter_solstices = [d for d, lon in terms if lon == 270]
+    term_dates = sorted(d for d, _ in terms)
+
+    def month_containing(day):
+        return bisect_right(moons, day) - 1
+
+    def has_principal_term(i):
+        k = bisect_left(term_dates, moons[i])
+        return k < len(term_dates) and term_dates[k] < moons[i + 1]
+
+    # Number every month between consecutive 11th months
+    labels = {}  # moon index -> (lunar year, month, is_leap)
+    for ws_prev, ws_next in zip(winter_solstices, winter_solstices[1:]):
+        m11_prev = month_containing(ws_prev)
+        m11_next = month_containing(ws_next)
+        leap_year = (m11_next - m11_prev) == 13
+        leap_found = False
+        number = 11
+        lunar_year = ws_prev.year
+        for i in range(m11_prev + 1, m11_next):
+            if leap_year and not leap_found and not has_principal_term(i):
+                leap_found = True
+                labels[i] = (lunar_year, number, True)
+                continue
+            number = number % 12 + 1
+            if number == 1:
+                lunar_year += 1
+            labels[i] = (lunar_year, number, False)
+
+    info = []
+    for year in range(FIRST_YEAR, LAST_YEAR + 1):
+        months = sorted(i for i, (y, _, _) in labels.items() if y == year)
+        packed = 0
+        new_year = None
+        for i in months:
+            _, number, is_leap = labels[i]
+            long_month = (moons[i + 1] - moons[i]).days == 30
+            if is_leap:
+                packed |= number
+                packed |= long_month << 4
+            else:
+                packed |= long_month << (4 + number)
+                if number == 1:
+                    new_year = moons[i]
+        packed |= (new_year - new_year.replace(month=1, day=1)).days << 17
+        info.append(packed)
+    return info
+
+
+def main():
+    info = build()
+    print("LUNAR_YEAR_INFO = (")
+    for i in range(0, len(info), 8):
+        row = ", ".join(f"0x{v:06x}" for v in info[i:i + 8])
+        print(f"    {row},  # {FIRST_YEAR + i}-{min(FIRST_YEAR + i + 7, LAST_YEAR)}")
+    print(")")
+
+
+if __name__ == "__main__":
+    main()
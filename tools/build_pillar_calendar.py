@@ -0,0 +1,111 @@
+"""
+Build data/pillar_calendar.bin - the daily pillar calendar for saju.py.
+
+For every day of the 절입 table range (1900-2100) this records the day
+pillar and the year/month pillars in effect at noon KST, computed with
+saju.py's arithmetic (day_pillar_index, year_month_pillar_indices). See
+the PILLAR CALENDAR section of saju.py for the file layout.
+
+Every Gregorian month holds exactly one 절 (days 4-9), so the month pillar
+is stored for the 1st plus the day it advances; the build checks that this
+holds for every month. The output is deterministic, so rebuilding must not
+change the committed file.
+
+--verify re-reads the file through saju.PillarCalendar (which checks the
+crc32) and compares every day against the arithmetic.
+
+Usage:
+    python tools/build_pillar_calendar.py [output_path]
+    python tools/build_pillar_calendar.py --verify [path]
+"""
+
+import os
+import sys
+import zlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import saju  # noqa: E402
+
+
+def arithmetic_days(first_year: int, last_year: int):
+    """Yield (year, month, day, year_p, month_p, day_p) from the arithmetic."""
+    for year in range(first_year, last_year + 1):
+        for month in range(1, 13):
+            month_days = saju._MONTH_DAYS[month] + (month == 2 and saju._is_leap_year(year))
+            for day in range(1, month_days + 1):
+                year_p, month_p = saju.year_month_pillar_indices(year, month, day)
+                yield year, month, day, year_p, month_p, saju.day_pillar_index(year, month, day)
+
+
+def build(path: str) -> None:
+    table = saju._solar_term_table()
+    first_year, last_year = table.first_year, table.last_year
+    years = last_year - first_year + 1
+
+    days = bytearray()
+    year_pillars = bytearray(12 * years)
+    month_pillars = bytearray(12 * years)
+    term_days = bytearray(12 * years)
+    prev = None
+    for year, month, day, year_p, month_p, day_p in arithmetic_days(first_year, last_year):
+        m = (year - first_year) * 12 + month - 1
+        code = day_p
+        if day == 1:
+            year_pillars[m], month_pillars[m], term_days[m] = year_p, month_p, 32
+        if prev is not None and month_p != prev[1]:
+            if month_p != (prev[1] + 1) % 60 or day == 1 or term_days[m] != 32:
+                raise RuntimeError(f"month pillar change not on the month's 절: {year}-{month:02d}-{day:02d}")
+            term_days[m] = day
+            code |= saju.CAL_TERM
+        if prev is not None and year_p != prev[0]:
+            if year_p != (prev[0] + 1) % 60 or month != 2 or not code & saju.CAL_TERM:
+                raise RuntimeError(f"year pillar change not on 입춘: {year}-{month:02d}-{day:02d}")
+            code |= saju.CAL_NEW_YEAR
+        days.append(code)
+        prev = (year_p, month_p)
+
+    missing = [m for m in range(1, 12 * years) if term_days[m] == 32]
+    if missing:
+        raise RuntimeError(f"{len(missing)} months without a 절")
+
+    body = bytes(days) + bytes(year_pillars) + bytes(month_pillars) + bytes(term_days)
+    header = saju._PILLAR_CALENDAR_HEADER.pack(
+        saju._PILLAR_CALENDAR_MAGIC, first_year, years, len(days), zlib.crc32(body))
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(header + body)
+
+    print(f"Wrote {len(days)} days ({first_year}-{last_year}, {len(header) + len(body)} bytes) to {path}")
+
+
+def verify(path: str) -> None:
+    calendar = saju.PillarCalendar(path)
+    mismatches = 0
+    count = 0
+    for year, month, day, year_p, month_p, day_p in arithmetic_days(calendar.first_year, calendar.last_year):
+        count += 1
+        if calendar.pillars(year, month, day) != (year_p, month_p, day_p):
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"  mismatch {year}-{month:02d}-{day:02d}: "
+                      f"{calendar.pillars(year, month, day)} != {(year_p, month_p, day_p)}")
+    print(f"Checked {count} days: {mismatches} mismatches")
+    if mismatches:
+        sys.exit(1)
+
+
+def main():
+    args = sys.argv[1:]
+    check = "--verify" in args
+    args = [a for a in args if a != "--verify"]
+    path = args[0] if args else os.path.join(ROOT, "data", "pillar_calendar.bin")
+    if check:
+        verify(path)
+    else:
+        build(path)
+
+
+if __name__ == "__main__":
+    main()
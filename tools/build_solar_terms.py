@@ -0,0 +1,101 @@
+"""
+Build data/solar_terms.bin - exact 절입 (solar term entry) times for saju.py.
+
+For every year in 1900-2100 this finds the moment the Sun's apparent
+geocentric ecliptic longitude reaches each of the 12 절 that start a saju
+month, using PyEphem (VSOP87), and stores it as minutes since
+1900-01-01 00:00 KST (fixed UTC+9), rounded to the nearest minute.
+
+File layout (little-endian):
+    header: magic b"SJT1", first_year (u16), years (u16), terms_per_year (u16), reserved (u16)
+    body:   years * terms_per_year u32 minute stamps, in chronological order
+            (소한, 입춘, 경칩, ..., 대설 for each year)
+
+The output is deterministic, so rebuilding must not change the committed file.
+
+Usage:
+    pip install ephem
+    python tools/build_solar_terms.py [output_path]
+"""
+
+import os
+import sys
+import math
+import struct
+from datetime import datetime, timedelta
+
+MAGIC = b"SJT1"
+FIRST_YEAR = 1900
+LAST_YEAR = 2100
+
+# (name, solar longitude in degrees, approximate month, approximate day)
+JEOL_TERMS = [
+    ("소한", 285, 1, 6),
+    ("입춘", 315, 2, 4),
+    ("경칩", 345, 3, 6),
+    ("청명", 15, 4, 5),
+    ("입하", 45, 5, 6),
+    ("망종", 75, 6, 6),
+    ("소서", 105, 7, 7),
+    ("입추", 135, 8, 8),
+    ("백로", 165, 9, 8),
+    ("한로", 195, 10, 8),
+    ("입동", 225, 11, 7),
+    ("대설", 255, 12, 7),
+]
+
+KST_OFFSET = timedelta(hours=9)
+EPOCH_KST = datetime(1900, 1, 1)
+
+
+def sun_longitude(ephem, d) -> float:
+    """Apparent geocentric ecliptic longitude of the Sun (degrees, of date)."""
+    sun = ephem.Sun(d)
+    ecl = ephem.Ecliptic(ephem.Equatorial(sun.ra, sun.dec, epoch=d))
+    return math.degrees(float(ecl.lon))
+
+
+def find_term(ephem, year: int, longitude: float, month: int, day: int):
+    """UT moment (ephem.Date) the Sun reaches the given longitude near month/day."""
+    d = ephem.Date(datetime(year, month, day, 0, 0) - KST_OFFSET)
+    for _ in range(50):
+        diff = (longitude - sun_longitude(ephem, d) + 180.0) % 360.0 - 180.0
+        if abs(diff) < 1e-7:
+            break
+        d = ephem.Date(d + diff / 0.9856)  # mean solar motion, degrees per day
+    return d
+
+
+def build(path: str) -> None:
+    try:
+        import ephem
+    except ImportError:
+        raise RuntimeError("ephem package not installed. Run: pip install ephem")
+
+    stamps = []
+    for year in range(FIRST_YEAR, LAST_YEAR + 1):
+        for name, longitude, month, day in JEOL_TERMS:
+            ut = find_term(ephem, year, longitude, month, day).datetime()
+            kst = ut + KST_OFFSET
+            minutes = round((kst - EPOCH_KST).total_seconds() / 60.0)
+            if stamps and minutes <= stamps[-1]:
+                raise RuntimeError(f"non-monotonic term {year} {name}")
+            stamps.append(minutes)
+
+    years = LAST_YEAR - FIRST_YEAR + 1
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(struct.pack("<4sHHHH", MAGIC, FIRST_YEAR, years, len(JEOL_TERMS), 0))
+        f.write(struct.pack(f"<{len(stamps)}I", *stamps))
+
+    print(f"Wrote {len(stamps)} terms ({FIRST_YEAR}-{LAST_YEAR}) to {path}")
+
+
+def main():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(root, "data", "solar_terms.bin")
+    build(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Build the true solar time (진태양시) tables for saju.py.
+
+KOREA_CLOCK_OFFSETS - Korean civil time since standard time was adopted on
+    1908-04-01, from the IANA Asia/Seoul zone (zoneinfo): 127.5°E (UTC+8:30)
+    in 1908-1911 and 1954-1961, 135°E (UTC+9) otherwise, plus the daylight
+    saving periods of 1948-1951, 1955-1960 and 1987-1988. One
+    (clock minute, UTC offset in minutes) entry per change, where the clock
+    minute counts from 1900-01-01 00:00 on the clocks in use just before the
+    change, so a birth time as written down can be bisected directly.
+
+EQUATION_OF_TIME - apparent minus mean solar time in seconds at noon KST
+    for each day of a leap year (index 59 = Feb 29), averaged over
+    1900-2100 with the Meeus low-precision solar formulae. Year-to-year
+    variation on a calendar day stays well under a minute.
+
+The script prints the Python literals to paste into saju.py.
+
+Usage:
+    python tools/build_time_tables.py
+"""
+
+import math
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+FIRST_YEAR = 1900
+LAST_YEAR = 2100
+STANDARD_TIME_START = datetime(1908, 4, 1)  # before this clocks kept local mean time
+EPOCH = datetime(1900, 1, 1)
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def utc_offset(zone, instant: datetime) -> int:
+    """UTC offset in seconds of zone at a UTC instant."""
+    return int(instant.replace(tzinfo=timezone.utc).astimezone(zone).utcoffset().total_seconds())
+
+
+def clock_offsets():
+    """(clock minute since 1900-01-01, UTC offset minutes) per offset change."""
+    zone = ZoneInfo("Asia/Seoul")
+    start = STANDARD_TIME_START  # a UTC instant shortly after the change to 8:30
+    end = datetime(LAST_YEAR + 1, 1, 1)
+    entries = []
+    instant = start
+    offset = utc_offset(zone, instant)
+    entries.append(((STANDARD_TIME_START - EPOCH) // timedelta(minutes=1), offset // 60))
+    step = timedelta(hours=1)
+    while instant < end:
+        following = instant + step
+        new_offset = utc_offset(zone, following)
+        if new_offset != offset:
+            # Narrow the change down to the second
+            lo, hi = instant, following
+            while hi - lo > timedelta(seconds=1):
+                mid = lo + timedelta(seconds=(hi - lo).total_seconds() // 2)
+                if utc_offset(zone, mid) == offset:
+                    lo = mid
+                else:
+                    hi = mid
+            clock = hi + timedelta(seconds=offset)
+            if new_offset % 60 or (clock - EPOCH) % timedelta(minutes=1):
+                raise RuntimeError(f"offset change not on a whole minute: {clock}")
+            entries.append(((clock - EPOCH) // timedelta(minutes=1), new_offset // 60))
+            offset = new_offset
+        instant = following
+    return entries
+
+
+def equation_of_time(instant: datetime) -> float:
+    """Apparent minus mean solar time in seconds at a UTC instant (Meeus ch. 28)."""
+    jd = (instant - datetime(2000, 1, 1, 12)) / timedelta(days=1)
+    t = jd / 36525.0
+    l0 = math.radians((280.46646 + t * (36000.76983 + t * 0.0003032)) % 360.0)
+    m = math.radians(357.52911 + t * (35999.05029 - t * 0.0001537))
+    e = 0.016708634 - t * (0.000042037 + t * 0.0000001267)
+    eps0 = 23.0 + (26.0 + (21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60.0) / 60.0
+    eps = math.radians(eps0 + 0.00256 * math.cos(math.radians(125.04 - 1934.136 * t)))
+    y = math.tan(eps / 2) ** 2
+    value = (y * math.sin(2 * l0) - 2 * e * math.sin(m) + 4 * e * y * math.sin(m) * math.cos(2 * l0)
+             - 0.5 * y * y * math.sin(4 * l0) - 1.25 * e * e * math.sin(2 * m))
+    return math.degrees(value) * 240.0
+
+
+def equation_of_time_table():
+    """Average seconds per day of a leap year over FIRST_YEAR..LAST_YEAR."""
+    totals = [0.0] * 366
+    counts = [0] * 366
+    for year in range(FIRST_YEAR, LAST_YEAR + 1):
+        day = datetime(year, 1, 1, 3)  # noon KST
+        while day.year == year:
+            index = (datetime(2000, day.month, day.day) - datetime(2000, 1, 1)).days
+            totals[index] += equation_of_time(day)
+            counts[index] += 1
+            day += timedelta(days=1)
+    return [round(total / count) for total, count in zip(totals, counts)]
+
+
+def main():
+    print("KOREA_CLOCK_OFFSETS = (")
+    for minute, offset in clock_offsets():
+        clock = EPOCH + timedelta(minutes=minute)
+        print(f"    ({minute}, {offset}),  # {clock:%Y-%m-%d %H:%M} UTC{offset // 60:+d}:{offset % 60:02d}")
+    print(")")
+    print()
+
+    table = equation_of_time_table()
+    print("EQUATION_OF_TIME = (")
+    index = 0
+    for month in range(1, 13):
+        days = (datetime(2000 + month // 12, month % 12 + 1, 1) - datetime(2000, month, 1)).days
+        values = table[index:index + days]
+        for i in range(0, days, 16):
+            row = ", ".join(f"{v:4d}" for v in values[i:i + 16])
+            comment = f"  # {MONTH_NAMES[month - 1]}" if i == 0 else ""
+            print(f"    {row},{comment}")
+        index += days
+    print(")")
+
+
+if __name__ == "__main__":
+    main()